@@ -0,0 +1,429 @@
+#!/usr/bin/env python3
+"""
+Benchmarks of the file analyzer pipeline on synthetic trees.
+
+A deterministic tree is generated (or reused) and each stage is timed in a
+fresh process, so every run starts with cold module caches and reports its
+own peak RSS:
+
+    walk        directory walk
+    metadata    metadata extraction, checksums included
+    content     content analysis
+    statistics  statistics accumulation and finalization
+    report      saving a report of a finished scan
+    end_to_end  FileAnalyzer.analyze() and save_results()
+
+Results (seconds, files/s, MB/s, peak RSS) are written as JSON. Given a
+baseline result file, stages slower or larger than the threshold are
+reported as regressions and the exit status is 1.
+
+    python benchmarks/run_benchmarks.py --files 5000 --output baseline.json
+    python benchmarks/run_benchmarks.py --files 5000 --baseline baseline.json
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+# The benchmarks run from a checkout, next to file_analyzer.py and utils/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.synthetic_tree import DEFAULT_SIZE_MIX, TreeSpec, generate_tree, parse_size_mix
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+STAGES = ('walk', 'metadata', 'content', 'statistics', 'report', 'end_to_end')
+
+# Relative increase of seconds or peak RSS reported as a regression
+DEFAULT_REGRESSION_THRESHOLD = 0.10
+
+
+def peak_rss_mb():
+    """Get the peak resident set size of this process and its children, in MB."""
+    if resource is None:
+        return None
+    
+    peak = max(
+        resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+    )
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    divisor = 1024 * 1024 if sys.platform == 'darwin' else 1024
+    return peak / divisor
+
+
+def _analyzer(tree, options, **kwargs):
+    """Create a FileAnalyzer for the tree with the benchmark options."""
+    from file_analyzer import FileAnalyzer
+    
+    settings = {
+        'output_format': options['report_format'],
+        'workers': options['workers'],
+        'statistics_backend': options['statistics_backend']
+    }
+    settings.update(kwargs)
+    return FileAnalyzer(tree, **settings)
+
+
+def _walk_files(analyzer):
+    """Get the (path, stat) pairs of the tree in scan order."""
+    analyzer.analysis_results['scan_info'] = {'total_files': 0, 'total_directories': 0, 'total_size': 0}
+    files = list(analyzer._walk_files(analyzer.target_path))
+
+    errors = analyzer.analysis_results['errors']
+    if errors:
+        raise RuntimeError(f"Walk failed: {errors[0]['path']}: {errors[0]['message']}")
+    return files
+
+
+def _time_walk(tree, options, scratch):
+    """Time the directory walk."""
+    analyzer = _analyzer(tree, options)
+    start = time.perf_counter()
+    _walk_files(analyzer)
+    return time.perf_counter() - start
+
+
+def _time_metadata(tree, options, scratch):
+    """Time metadata extraction of every file."""
+    from utils.file_handler import FileBuffer
+    
+    analyzer = _analyzer(tree, options)
+    files = _walk_files(analyzer)
+    extractor = analyzer.metadata_extractor
+    start = time.perf_counter()
+    for file_path, file_stats in files:
+        extractor.extract(file_path, file_stats, FileBuffer(file_path, file_stats))
+    return time.perf_counter() - start
+
+
+def _time_content(tree, options, scratch):
+    """Time content analysis of every file."""
+    from utils.file_handler import FileBuffer
+    
+    analyzer = _analyzer(tree, options)
+    files = _walk_files(analyzer)
+    content_analyzer = analyzer.content_analyzer
+    start = time.perf_counter()
+    for file_path, file_stats in files:
+        content_analyzer.analyze(file_path, FileBuffer(file_path, file_stats))
+    return time.perf_counter() - start
+
+
+def _time_statistics(tree, options, scratch):
+    """Time statistics accumulation over prebuilt per-file entries."""
+    from utils.report_generator import StatisticsAccumulator
+    
+    analyzer = _analyzer(tree, options)
+    entries = [
+        analyzer._build_file_analysis(file_path, file_stats)
+        for file_path, file_stats in _walk_files(analyzer)
+    ]
+    start = time.perf_counter()
+    accumulator = StatisticsAccumulator(backend=options['statistics_backend'])
+    for entry in entries:
+        accumulator.add(entry)
+    accumulator.finalize({'scan_info': {}, 'errors': []})
+    return time.perf_counter() - start
+
+
+def _time_report(tree, options, scratch):
+    """Time saving the report of a finished scan."""
+    analyzer = _analyzer(tree, options, output_format='json')
+    results = analyzer.analyze()
+    start = time.perf_counter()
+    analyzer.report_generator.save_report(
+        results, os.path.join(scratch, 'report'), options['report_format']
+    )
+    return time.perf_counter() - start
+
+
+def _time_end_to_end(tree, options, scratch):
+    """Time a complete scan, report included."""
+    start = time.perf_counter()
+    analyzer = _analyzer(tree, options, output_file=os.path.join(scratch, 'report'))
+    analyzer.analyze()
+    analyzer.save_results()
+    return time.perf_counter() - start
+
+
+_STAGE_FUNCTIONS = {
+    'walk': _time_walk,
+    'metadata': _time_metadata,
+    'content': _time_content,
+    'statistics': _time_statistics,
+    'report': _time_report,
+    'end_to_end': _time_end_to_end
+}
+
+
+def _stage_process(stage, tree, options, connection):
+    """Time one stage inside a benchmark process and send back the result."""
+    scratch = tempfile.mkdtemp(prefix='file-analyzer-bench-')
+    try:
+        seconds = _STAGE_FUNCTIONS[stage](tree, options, scratch)
+        connection.send({'seconds': seconds, 'peak_rss_mb': peak_rss_mb()})
+    except Exception as e:
+        connection.send({'error': f"{type(e).__name__}: {e}"})
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+        connection.close()
+
+
+def run_stage(stage, tree, options):
+    """
+    Time one stage in a fresh process.
+    
+    Args:
+        stage (str): Stage name from STAGES
+        tree (str): Tree to analyze
+        options (dict): Analyzer options (workers, report_format, statistics_backend)
+    
+    Returns:
+        dict: 'seconds' and 'peak_rss_mb' of the run
+    """
+    context = multiprocessing.get_context('spawn')
+    receiver, sender = context.Pipe(duplex=False)
+    process = context.Process(target=_stage_process, args=(stage, tree, options, sender))
+    process.start()
+    sender.close()
+    try:
+        result = receiver.recv()
+    except EOFError:
+        result = {'error': f"benchmark process exited with status {process.exitcode}"}
+    process.join()
+    
+    if 'error' in result:
+        raise RuntimeError(f"Stage {stage} failed: {result['error']}")
+    return result
+
+
+def run_benchmarks(tree, manifest, stages, options, repeat=3):
+    """
+    Run the stages and summarize their timings.
+    
+    Args:
+        tree (str): Generated tree
+        manifest (dict): Tree manifest from generate_tree
+        stages (list): Stage names to run
+        options (dict): Analyzer options
+        repeat (int): Runs per stage; the median time is reported
+    
+    Returns:
+        dict: Per-stage results
+    """
+    results = {}
+    for stage in stages:
+        runs = [run_stage(stage, tree, options) for _ in range(repeat)]
+        seconds = statistics.median(run['seconds'] for run in runs)
+        rss = [run['peak_rss_mb'] for run in runs if run['peak_rss_mb'] is not None]
+        
+        results[stage] = {
+            'seconds': seconds,
+            'runs': [run['seconds'] for run in runs],
+            'files_per_s': manifest['files'] / seconds if seconds else None,
+            'mb_per_s': manifest['bytes'] / (1024 * 1024) / seconds if seconds else None,
+            'peak_rss_mb': max(rss) if rss else None
+        }
+        print(
+            f"{stage:<12} {seconds:8.3f}s  {results[stage]['files_per_s'] or 0:10.0f} files/s",
+            file=sys.stderr
+        )
+    return results
+
+
+def compare_results(current, baseline, threshold=DEFAULT_REGRESSION_THRESHOLD):
+    """
+    Compare benchmark results with a baseline.
+    
+    Args:
+        current (dict): Results of this run
+        baseline (dict): Earlier results
+        threshold (float): Relative increase of seconds or peak RSS that
+            counts as a regression
+    
+    Returns:
+        dict: 'same_tree', the per-stage 'changes' and the 'regressions' among them
+    """
+    changes = []
+    for stage, result in current['stages'].items():
+        baseline_result = baseline.get('stages', {}).get(stage)
+        if not baseline_result:
+            continue
+        
+        for metric in ('seconds', 'peak_rss_mb'):
+            before = baseline_result.get(metric)
+            after = result.get(metric)
+            if not before or after is None:
+                continue
+            
+            change = after / before - 1
+            changes.append({
+                'stage': stage,
+                'metric': metric,
+                'baseline': before,
+                'current': after,
+                'change': change,
+                'regression': change > threshold
+            })
+    
+    return {
+        'threshold': threshold,
+        'same_tree': current['tree']['spec'] == baseline.get('tree', {}).get('spec'),
+        'changes': changes,
+        'regressions': [change for change in changes if change['regression']]
+    }
+
+
+def main():
+    """Command-line interface of the benchmark suite."""
+    parser = argparse.ArgumentParser(
+        description="Benchmark the file analyzer pipeline on a synthetic tree"
+    )
+    
+    parser.add_argument('--files', type=int, default=2000, help='Number of files')
+    parser.add_argument('--depth', type=int, default=3, help='Directory depth')
+    parser.add_argument('--fanout', type=int, default=4, help='Subdirectories per directory')
+    parser.add_argument(
+        '--size-mix',
+        type=parse_size_mix,
+        default=DEFAULT_SIZE_MIX,
+        help='Weights of the size categories, e.g. tiny=50,small=30,large=20 '
+             '(categories: tiny, small, medium, large, very_large)'
+    )
+    parser.add_argument('--text-ratio', type=float, default=0.8, help='Fraction of text files')
+    parser.add_argument('--duplicate-ratio', type=float, default=0.1, help='Fraction of duplicated files')
+    parser.add_argument('--seed', type=int, default=0, help='Random seed of the tree')
+    parser.add_argument(
+        '--tree',
+        help='Directory to generate the tree in and reuse across runs '
+             '(a temporary tree is used and removed otherwise)'
+    )
+    
+    parser.add_argument(
+        '--stages',
+        type=lambda value: [stage.strip() for stage in value.split(',') if stage.strip()],
+        default=list(STAGES),
+        help=f"Comma-separated stages to run (default: {','.join(STAGES)})"
+    )
+    parser.add_argument('--repeat', type=int, default=3, help='Runs per stage')
+    parser.add_argument('--workers', type=int, default=1, help='Analyzer worker processes')
+    parser.add_argument(
+        '--report-format',
+        choices=['json', 'csv', 'txt', 'ndjson', 'sqlite'],
+        default='json',
+        help='Report format of the report and end_to_end stages'
+    )
+    parser.add_argument(
+        '--stats-backend',
+        choices=['python', 'numpy'],
+        default='python',
+        help='Statistics backend'
+    )
+    
+    parser.add_argument('--output', '-o', help='Write results to this file instead of stdout')
+    parser.add_argument('--baseline', help='Earlier results to compare with')
+    parser.add_argument(
+        '--threshold',
+        type=float,
+        default=DEFAULT_REGRESSION_THRESHOLD,
+        help='Relative slowdown or memory growth reported as a regression (default: 0.10)'
+    )
+    
+    args = parser.parse_args()
+    
+    unknown = [stage for stage in args.stages if stage not in STAGES]
+    if unknown:
+        parser.error(f"unknown stages: {', '.join(unknown)}")
+    
+    try:
+        spec = TreeSpec(
+            files=args.files,
+            depth=args.depth,
+            fanout=args.fanout,
+            size_mix=args.size_mix,
+            text_ratio=args.text_ratio,
+            duplicate_ratio=args.duplicate_ratio,
+            seed=args.seed
+        )
+        baseline = None
+        if args.baseline:
+            with open(args.baseline, encoding='utf-8') as f:
+                baseline = json.load(f)
+        
+        temporary = None
+        tree = args.tree
+        if not tree:
+            temporary = tempfile.mkdtemp(prefix='file-analyzer-tree-')
+            tree = os.path.join(temporary, 'tree')
+        
+        try:
+            print(f"Generating tree: {tree}", file=sys.stderr)
+            manifest = generate_tree(tree, spec)
+            
+            options = {
+                'workers': args.workers,
+                'report_format': args.report_format,
+                'statistics_backend': args.stats_backend
+            }
+            results = {
+                'benchmark': {
+                    'created': datetime.now().isoformat(),
+                    'python': platform.python_version(),
+                    'platform': platform.platform(),
+                    'cpu_count': os.cpu_count(),
+                    'repeat': args.repeat,
+                    'options': options
+                },
+                'tree': manifest,
+                'stages': run_benchmarks(tree, manifest, args.stages, options, args.repeat)
+            }
+        finally:
+            if temporary:
+                shutil.rmtree(temporary, ignore_errors=True)
+    
+    except (OSError, ValueError, RuntimeError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    
+    regressions = []
+    if baseline is not None:
+        comparison = compare_results(results, baseline, args.threshold)
+        results['comparison'] = comparison
+        regressions = comparison['regressions']
+        
+        if not comparison['same_tree']:
+            print("Warning: the baseline was measured on a different tree", file=sys.stderr)
+        for change in comparison['changes']:
+            flag = 'REGRESSION' if change['regression'] else 'ok'
+            print(
+                f"{change['stage']:<12} {change['metric']:<12} {change['change']:+7.1%}  {flag}",
+                file=sys.stderr
+            )
+    
+    output = json.dumps(results, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+    
+    if regressions:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,243 @@
+#!/usr/bin/env python3
+"""
+Startup time budget of file_analyzer.py.
+
+Short invocations (--help, scans of a handful of files, as in CI) are
+dominated by interpreter startup and module imports rather than analysis.
+Each command is run in a fresh interpreter; its median wall-clock time and
+the import time measured with `python -X importtime` are checked against
+budgets, listing the slowest imports:
+
+    help        file_analyzer.py --help
+    small_scan  file_analyzer.py on a synthetic tree of --files files
+
+Results are written as JSON; the exit status is 1 if a budget is exceeded.
+
+    python benchmarks/startup_budget.py
+    python benchmarks/startup_budget.py --budget-ms 150 --repeat 20
+"""
+
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+from pathlib import Path
+
+# The benchmarks run from a checkout, next to file_analyzer.py and utils/
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.synthetic_tree import TreeSpec, generate_tree
+
+
+ANALYZER_SCRIPT = Path(__file__).resolve().parent.parent / 'file_analyzer.py'
+
+COMMANDS = ('help', 'small_scan')
+
+# Budgets are set from measurements on the reference machine: a 1-vCPU
+# Intel Xeon VM, Linux x86_64, Python 3.11, without python-magic installed
+# (loading libmagic is not counted). Both commands keep the 100 ms target
+# and imports get about 25% headroom. Measured, medians of 3 x 15 runs:
+# help 60-64 ms (imports 35-45 ms), small_scan 100-108 ms (imports
+# 41-43 ms) before the optional features' modules were imported lazily.
+# That change took small_scan's median CPU time from 129 to 113 ms in 25
+# interleaved runs on a busier host, about 88-95 ms on the reference
+# machine. Wall-clock times vary by 20% or more on shared hosts; re-measure
+# and pass --budget-ms/--import-budget-ms on other machines.
+
+# Wall-clock milliseconds each command may take, interpreter startup included
+DEFAULT_BUDGETS_MS = {'help': 100, 'small_scan': 100}
+
+# Milliseconds a command may spend importing modules
+DEFAULT_IMPORT_BUDGET_MS = 60
+
+# Slowest imports listed per command
+SLOWEST_IMPORTS_COUNT = 10
+
+
+def parse_import_times(stderr):
+    """
+    Parse the output of `python -X importtime`.
+    
+    Args:
+        stderr (str): Standard error of the run
+    
+    Returns:
+        tuple: (total import microseconds, list of (module, self us,
+            cumulative us) in import order)
+    """
+    imports = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # the column header
+        imports.append((fields[2].strip(), int(fields[0]), int(fields[1])))
+    
+    return sum(self_us for _, self_us, _ in imports), imports
+
+
+def measure_command(arguments, repeat=10):
+    """
+    Time a file_analyzer.py command in fresh interpreters.
+    
+    Args:
+        arguments (list): Command-line arguments of file_analyzer.py
+        repeat (int): Timed runs; the median is reported
+    
+    Returns:
+        dict: Median and per-run milliseconds, total import milliseconds
+            and the slowest imports by cumulative time
+    """
+    command = [sys.executable, str(ANALYZER_SCRIPT)] + arguments
+    
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        subprocess.run(command, check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        runs.append((time.perf_counter() - start) * 1000)
+    
+    # Measured separately; -X importtime itself slows imports down a little
+    traced = subprocess.run(
+        [sys.executable, '-X', 'importtime'] + command[1:],
+        check=True, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE, text=True
+    )
+    total_us, imports = parse_import_times(traced.stderr)
+    slowest = sorted(imports, key=lambda item: -item[2])[:SLOWEST_IMPORTS_COUNT]
+    
+    return {
+        'ms': statistics.median(runs),
+        'runs': runs,
+        'import_ms': total_us / 1000,
+        'slowest_imports': [
+            {'module': module, 'self_ms': self_us / 1000, 'cumulative_ms': cumulative_us / 1000}
+            for module, self_us, cumulative_us in slowest
+        ]
+    }
+
+
+def check_budgets(results, budgets_ms, import_budget_ms):
+    """
+    List the commands over budget.
+    
+    Args:
+        results (dict): Per-command results of measure_command
+        budgets_ms (dict): Wall-clock budget of each command
+        import_budget_ms (float): Import time budget per command
+    
+    Returns:
+        list: 'command', 'metric', 'value' and 'budget' of each exceeded budget
+    """
+    exceeded = []
+    for command, result in results.items():
+        for metric, budget in (('ms', budgets_ms[command]), ('import_ms', import_budget_ms)):
+            if result[metric] > budget:
+                exceeded.append({
+                    'command': command,
+                    'metric': metric,
+                    'value': result[metric],
+                    'budget': budget
+                })
+    return exceeded
+
+
+def main():
+    """Command-line interface of the startup budget check."""
+    parser = argparse.ArgumentParser(
+        description="Check the startup time of file_analyzer.py against a budget"
+    )
+    
+    parser.add_argument(
+        '--commands',
+        type=lambda value: [command.strip() for command in value.split(',') if command.strip()],
+        default=list(COMMANDS),
+        help=f"Comma-separated commands to time (default: {','.join(COMMANDS)})"
+    )
+    parser.add_argument('--files', type=int, default=20, help='Files in the small_scan tree')
+    parser.add_argument('--repeat', type=int, default=10, help='Runs per command')
+    parser.add_argument(
+        '--budget-ms',
+        type=float,
+        help='Median wall-clock milliseconds allowed for every command (default: '
+             + ', '.join(f'{command} {budget}' for command, budget in DEFAULT_BUDGETS_MS.items()) + ')'
+    )
+    parser.add_argument(
+        '--import-budget-ms',
+        type=float,
+        default=DEFAULT_IMPORT_BUDGET_MS,
+        help=f'Import milliseconds allowed per command (default: {DEFAULT_IMPORT_BUDGET_MS})'
+    )
+    parser.add_argument('--output', '-o', help='Write results to this file instead of stdout')
+    
+    args = parser.parse_args()
+    
+    unknown = [command for command in args.commands if command not in COMMANDS]
+    if unknown:
+        parser.error(f"unknown commands: {', '.join(unknown)}")
+    
+    scratch = tempfile.mkdtemp(prefix='file-analyzer-startup-')
+    try:
+        tree = os.path.join(scratch, 'tree')
+        generate_tree(tree, TreeSpec(files=args.files, depth=1, fanout=2, size_mix={'tiny': 1, 'small': 1}))
+        arguments = {
+            'help': ['--help'],
+            'small_scan': [tree, '--output', os.path.join(scratch, 'report.json')]
+        }
+        
+        results = {}
+        for command in args.commands:
+            results[command] = measure_command(arguments[command], args.repeat)
+            print(
+                f"{command:<12} {results[command]['ms']:7.1f} ms  "
+                f"(imports {results[command]['import_ms']:.1f} ms)",
+                file=sys.stderr
+            )
+    
+    except (OSError, ValueError, subprocess.CalledProcessError) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+    finally:
+        shutil.rmtree(scratch, ignore_errors=True)
+    
+    budgets_ms = {
+        command: args.budget_ms if args.budget_ms is not None else DEFAULT_BUDGETS_MS[command]
+        for command in results
+    }
+    exceeded = check_budgets(results, budgets_ms, args.import_budget_ms)
+    for item in exceeded:
+        print(
+            f"{item['command']:<12} {item['metric']:<10} {item['value']:.1f} ms over budget of {item['budget']:g} ms",
+            file=sys.stderr
+        )
+    
+    output = json.dumps({
+        'benchmark': {
+            'created': datetime.now().isoformat(),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'repeat': args.repeat,
+            'budgets_ms': budgets_ms,
+            'import_budget_ms': args.import_budget_ms
+        },
+        'commands': results,
+        'exceeded': exceeded
+    }, indent=2)
+    if args.output:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(output + '\n')
+    else:
+        print(output)
+    
+    if exceeded:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
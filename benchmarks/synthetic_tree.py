@@ -0,0 +1,234 @@
+"""
+Deterministic synthetic directory trees for benchmarking the file analyzer.
+"""
+
+import json
+import os
+import random
+import shutil
+from pathlib import Path
+
+
+# Size ranges per report size category, matching SIZE_CATEGORY_EDGES
+SIZE_RANGES = {
+    'tiny': (0, 1024),
+    'small': (1024, 10240),
+    'medium': (10240, 102400),
+    'large': (102400, 1048576),
+    'very_large': (1048576, 4194304)
+}
+
+DEFAULT_SIZE_MIX = {'tiny': 40, 'small': 35, 'medium': 18, 'large': 6, 'very_large': 1}
+
+TEXT_EXTENSIONS = ('.py', '.js', '.md', '.txt', '.json', '.csv', '.log')
+BINARY_EXTENSIONS = ('.bin', '.dat', '.png', '.zip')
+
+# Modification times are spread over the three years before this instant
+TIMESTAMP_BASE_NS = 1704067200 * 1000000000  # 2024-01-01T00:00:00Z
+TIMESTAMP_SPAN_NS = 3 * 365 * 86400 * 1000000000
+
+# Size of the text corpus that text files are sliced from
+_CORPUS_SIZE = 256 * 1024
+
+_WORDS = (
+    'analysis', 'buffer', 'config', 'data', 'export', 'file', 'handler', 'index',
+    'metadata', 'output', 'pattern', 'report', 'result', 'scan', 'summary', 'value'
+)
+
+
+def parse_size_mix(value):
+    """
+    Parse a size mix such as 'tiny=50,small=30,large=20'.
+    
+    Args:
+        value (str): Comma-separated category=weight pairs
+    
+    Returns:
+        dict: Weight per size category
+    """
+    mix = {}
+    for part in value.split(','):
+        name, _, weight = part.partition('=')
+        name = name.strip()
+        if name not in SIZE_RANGES:
+            raise ValueError(f"Unknown size category: {name} (available: {', '.join(SIZE_RANGES)})")
+        try:
+            mix[name] = float(weight)
+        except ValueError:
+            raise ValueError(f"Invalid weight for {name}: {weight}")
+    
+    if not any(weight > 0 for weight in mix.values()):
+        raise ValueError("Size mix needs at least one positive weight")
+    return mix
+
+
+class TreeSpec:
+    """Shape of a synthetic tree; the same spec always yields the same tree."""
+    
+    def __init__(self, files=1000, depth=3, fanout=4, size_mix=None,
+                 text_ratio=0.8, duplicate_ratio=0.1, seed=0):
+        """
+        Initialize the TreeSpec.
+        
+        Args:
+            files (int): Number of files
+            depth (int): Directory nesting depth below the root
+            fanout (int): Subdirectories per directory
+            size_mix (dict): Relative weight per size category (DEFAULT_SIZE_MIX if omitted)
+            text_ratio (float): Fraction of files that are text, 0-1
+            duplicate_ratio (float): Fraction of files that copy an earlier
+                file's content, 0-1
+            seed (int): Random seed
+        """
+        if files < 0 or depth < 0 or fanout < 1:
+            raise ValueError("Tree needs files >= 0, depth >= 0 and fanout >= 1")
+        if not 0 <= text_ratio <= 1 or not 0 <= duplicate_ratio <= 1:
+            raise ValueError("Text and duplicate ratios must be between 0 and 1")
+        
+        self.files = files
+        self.depth = depth
+        self.fanout = fanout
+        self.size_mix = dict(size_mix or DEFAULT_SIZE_MIX)
+        self.text_ratio = text_ratio
+        self.duplicate_ratio = duplicate_ratio
+        self.seed = seed
+    
+    def to_dict(self):
+        """Describe the spec for benchmark results."""
+        return {
+            'files': self.files,
+            'depth': self.depth,
+            'fanout': self.fanout,
+            'size_mix': self.size_mix,
+            'text_ratio': self.text_ratio,
+            'duplicate_ratio': self.duplicate_ratio,
+            'seed': self.seed
+        }
+
+
+def manifest_path(root):
+    """Get the manifest location of a tree, next to (not inside) its root."""
+    root = Path(root)
+    return root.with_name(f"{root.name}.manifest.json")
+
+
+def generate_tree(root, spec):
+    """
+    Create a synthetic tree, or reuse it if it was generated from the same spec.
+    
+    Text files are slices of a generated corpus of code-like lines with
+    emails, URLs, IP addresses, dates and the odd credential, so the content
+    patterns and security checks have matches to find. Binary files are
+    random bytes. Modification times are fixed by the seed.
+    
+    Args:
+        root (str): Directory to create the tree in; a tree generated with
+            a different spec is replaced
+        spec (TreeSpec): Tree shape
+    
+    Returns:
+        dict: Manifest with the spec, file and directory counts and total bytes
+    """
+    root = Path(root)
+    manifest_file = manifest_path(root)
+    if root.is_dir() and manifest_file.is_file():
+        manifest = json.loads(manifest_file.read_text(encoding='utf-8'))
+        if manifest.get('spec') == json.loads(json.dumps(spec.to_dict())):
+            return manifest
+    
+    # Only trees generated here are replaced, never arbitrary directories
+    if root.exists():
+        if not manifest_file.is_file() and any(root.iterdir()):
+            raise ValueError(f"Not a generated benchmark tree, refusing to replace: {root}")
+        shutil.rmtree(root)
+        manifest_file.unlink(missing_ok=True)
+    root.mkdir(parents=True)
+    
+    rng = random.Random(spec.seed)
+    corpus = _text_corpus(rng)
+    
+    # Every directory of a full tree of the given depth and fanout
+    directories = [root]
+    level = [root]
+    for depth in range(spec.depth):
+        next_level = []
+        for parent in level:
+            for index in range(spec.fanout):
+                directory = parent / f"d{depth}_{index}"
+                directory.mkdir()
+                next_level.append(directory)
+        directories.extend(next_level)
+        level = next_level
+    
+    categories = list(spec.size_mix)
+    weights = [spec.size_mix[category] for category in categories]
+    written = []
+    total_bytes = 0
+    
+    for index in range(spec.files):
+        directory = rng.choice(directories)
+        
+        if written and rng.random() < spec.duplicate_ratio:
+            source = rng.choice(written)
+            file_path = directory / f"f{index:06d}{source.suffix}"
+            shutil.copyfile(source, file_path)
+        else:
+            low, high = SIZE_RANGES[rng.choices(categories, weights)[0]]
+            size = rng.randrange(low, high)
+            if rng.random() < spec.text_ratio:
+                file_path = directory / f"f{index:06d}{rng.choice(TEXT_EXTENSIONS)}"
+                file_path.write_bytes(_text_slice(corpus, rng.randrange(len(corpus)), size))
+            else:
+                file_path = directory / f"f{index:06d}{rng.choice(BINARY_EXTENSIONS)}"
+                file_path.write_bytes(rng.randbytes(size))
+        
+        modified = TIMESTAMP_BASE_NS - rng.randrange(TIMESTAMP_SPAN_NS)
+        os.utime(file_path, ns=(modified, modified))
+        written.append(file_path)
+        total_bytes += file_path.stat().st_size
+    
+    manifest = {
+        'spec': spec.to_dict(),
+        'files': spec.files,
+        'directories': len(directories) - 1,
+        'bytes': total_bytes
+    }
+    manifest_file.write_text(json.dumps(manifest, indent=2), encoding='utf-8')
+    return manifest
+
+
+def _text_corpus(rng):
+    """Generate the ASCII text that text files are sliced from."""
+    lines = []
+    size = 0
+    while size < _CORPUS_SIZE:
+        kind = rng.randrange(20)
+        words = ' '.join(rng.choice(_WORDS) for _ in range(rng.randrange(3, 10)))
+        if kind == 0:
+            line = f"contact = 'user{rng.randrange(1000)}@example.com'  # {words}"
+        elif kind == 1:
+            line = f"url = 'https://{rng.choice(_WORDS)}.example.org/{rng.choice(_WORDS)}?id={rng.randrange(10000)}'"
+        elif kind == 2:
+            line = f"host = '10.{rng.randrange(256)}.{rng.randrange(256)}.{rng.randrange(1, 255)}'"
+        elif kind == 3:
+            line = f"# updated 20{rng.randrange(10, 25)}-{rng.randrange(1, 13):02d}-{rng.randrange(1, 29):02d}: {words}"
+        elif kind == 4 and rng.random() < 0.2:
+            line = f"password = '{rng.choice(_WORDS)}{rng.randrange(100000)}'"
+        elif kind < 10:
+            line = f"def {rng.choice(_WORDS)}_{rng.choice(_WORDS)}(value):"
+        else:
+            line = f"    return {words.replace(' ', '_')}  # {words}"
+        lines.append(line)
+        size += len(line) + 1
+    return ('\n'.join(lines) + '\n').encode('ascii')
+
+
+def _text_slice(corpus, offset, size):
+    """Take size bytes of the corpus from offset, wrapping around its end."""
+    chunks = []
+    while size > 0:
+        chunk = corpus[offset:offset + size]
+        chunks.append(chunk)
+        size -= len(chunk)
+        offset = 0
+    return b''.join(chunks)
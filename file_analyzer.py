@@ -7,6 +7,9 @@ and comprehensive reporting capabilities.
 """
 
 import argparse
+import collections
+import contextlib
+import itertools
 import sys
 import os
 from pathlib import Path
@@ -14,34 +17,119 @@ import json
 import time
 from datetime import datetime
 
-from utils.file_handler import FileHandler
-from utils.metadata_extractor import MetadataExtractor
+from utils.file_handler import FileHandler, FileBuffer
+from utils.metadata_extractor import MetadataExtractor, DEFAULT_HASH_ALGORITHMS, parse_hash_algorithms
 from utils.content_analyzer import ContentAnalyzer
-from utils.report_generator import ReportGenerator
+from utils.report_generator import ReportGenerator, StatisticsAccumulator, STATISTICS_BACKENDS, STREAMING_FORMATS
+from utils.file_record import FileRecord, RecordTable, json_default
+from utils.stage_timing import StageTimer, StageTimings
+from utils.profiling import PROFILE_MODES
+
+
+# Files sent to a worker process per task
+PARALLEL_BATCH_SIZE = 64
+
+# Tasks queued per worker process ahead of the merge; bounds the files held
+# between the directory walk and the pool
+PARALLEL_BATCHES_PER_WORKER = 4
 
 
 class FileAnalyzer:
     """Main class for file and directory analysis."""
     
-    def __init__(self, target_path, output_format='json', output_file=None, verbose=False):
+    def __init__(self, target_path, output_format='json', output_file=None, verbose=False,
+                 workers=1, cache_file=None, mmap_threshold=None,
+                 hash_algorithms=DEFAULT_HASH_ALGORITHMS, hash_large_files=False,
+                 find_duplicates=False, percentile_sketch_threshold=None,
+                 statistics_backend='python', resolve_owner_names=True,
+                 profile_file=None, profile_mode='cprofile'):
         """
         Initialize the FileAnalyzer.
         
         Args:
             target_path (str): Path to analyze
-            output_format (str): Output format ('json', 'csv', 'txt')
+            output_format (str): Output format ('json', 'csv', 'txt', 'ndjson',
+                'sqlite'); 'ndjson' and 'sqlite' write each file record as it
+                is analyzed, and 'sqlite' needs an output file
             output_file (str): Output file path (optional)
             verbose (bool): Enable verbose output
+            workers (int): Number of worker processes for file analysis
+                (1 analyzes serially, 0 uses every available CPU)
+            cache_file (str): SQLite scan cache path; unchanged files are served
+                from it instead of being analyzed again (optional)
+            mmap_threshold (int): Size in bytes above which text files are
+                pattern-scanned memory-mapped; 0 disables it (optional)
+            hash_algorithms (tuple): Checksums to compute; empty to skip them
+            hash_large_files (bool): Also hash files over the 10MB checksum limit
+            find_duplicates (bool): Report files with identical content
+            percentile_sketch_threshold (int): Number of files above which size
+                percentiles are estimated with a quantile sketch instead of
+                computed exactly; 0 always estimates (optional)
+            statistics_backend (str): 'python', or 'numpy' to aggregate sizes
+                and timestamps in NumPy arrays (requires NumPy)
+            resolve_owner_names (bool): Look up owner user and group names;
+                only numeric ids are reported otherwise
+            profile_file (str): Profile analyze() into this file, worker
+                processes into worker_profile_path() files next to it, with
+                a text summary of all of them (optional)
+            profile_mode (str): 'cprofile' to trace every call, or 'sampling'
+                to sample stacks with low overhead
         """
         self.target_path = Path(target_path).resolve()
         self.output_format = output_format
         self.output_file = output_file
         self.verbose = verbose
+        if workers is not None and workers < 0:
+            raise ValueError(f"Number of workers must be 0 or more, not {workers}")
+        self.workers = workers if workers else (os.cpu_count() or 1)
+        self.cache_file = cache_file
+        self.scan_cache = None
+        self.mmap_threshold = mmap_threshold
+        self.hash_algorithms = tuple(hash_algorithms)
+        self.hash_large_files = hash_large_files
+        self.resolve_owner_names = resolve_owner_names
+        self.profile_file = profile_file
+        self.profile_mode = profile_mode
+        self.profiler = None
+        if profile_file:
+            from utils.profiling import ScanProfiler
+            
+            self.profiler = ScanProfiler(profile_file, profile_mode)
+        
+        # Files are recorded by size as they are analyzed, then compared
+        # once the scan is complete; the optional features' modules are
+        # only imported when they are used, to keep short runs fast
+        self.duplicate_finder = None
+        if find_duplicates:
+            from utils.duplicate_finder import DuplicateFinder
+            
+            self.duplicate_finder = DuplicateFinder(max(8, self.workers))
+        
+        # Streaming output: records are written as they are produced
+        # instead of being kept in the file list
+        self.streaming = output_format in STREAMING_FORMATS
+        self._stream_writer = None
+        
+        # Statistics are folded in as each file is recorded
+        self._statistics_accumulator = StatisticsAccumulator(
+            sketch_threshold=percentile_sketch_threshold,
+            backend=statistics_backend
+        )
         
-        # Initialize utility classes
-        self.file_handler = FileHandler()
-        self.metadata_extractor = MetadataExtractor()
-        self.content_analyzer = ContentAnalyzer()
+        # Directory table and shared values of the compact per-file records
+        self.record_table = RecordTable(self.target_path)
+        
+        # Per-file stage timer, shared through the file handler, and the
+        # scan-wide stage timings it is collected into
+        self.stage_timer = StageTimer()
+        self.stage_timings = StageTimings()
+        
+        # Initialize utility classes; the analyzers share these instances
+        self.file_handler = FileHandler(self.stage_timer)
+        self.metadata_extractor = MetadataExtractor(
+            self.file_handler, self.hash_algorithms, hash_large_files, resolve_owner_names
+        )
+        self.content_analyzer = ContentAnalyzer(self.file_handler, self.metadata_extractor, mmap_threshold)
         self.report_generator = ReportGenerator()
         
         # Analysis results
@@ -57,9 +145,26 @@ class FileAnalyzer:
         """
         Perform comprehensive analysis of the target path.
         
+        With a profile file the analysis runs under the profiler.
+        
         Returns:
             dict: Analysis results
         """
+        if self.profiler is None:
+            return self._analyze()
+        
+        self.profiler.clear_worker_files()
+        self.profiler.start()
+        try:
+            return self._analyze()
+        finally:
+            self.profiler.stop()
+            summary_path = self.profiler.write_summary(f"Profile of the analysis of {self.target_path}")
+            if self.verbose:
+                print(f"Profile written to: {self.profile_file} (summary: {summary_path})")
+    
+    def _analyze(self):
+        """Analyze the target path; see analyze()."""
         if not self.target_path.exists():
             raise FileNotFoundError(f"Path does not exist: {self.target_path}")
         
@@ -80,12 +185,26 @@ class FileAnalyzer:
             'total_size': 0
         }
         
+        if self.cache_file:
+            self._open_cache()
+        
+        if self.streaming:
+            self._stream_writer = self.report_generator.open_stream(self.output_file, self.output_format)
+        
         try:
-            # Scan directory structure
+            # Scan directory structure and analyze its files
             self._scan_directory(self.target_path)
             
+            # Find files with identical content
+            if self.duplicate_finder is not None:
+                self._find_duplicates()
+            
             # Generate statistics
             self._generate_statistics()
+            self._record_hash_stats()
+            self._record_memo_stats()
+            self._record_encoding_stats()
+            self._record_stage_timings()
             
             # Complete scan info
             self.analysis_results['scan_info']['scan_completed'] = datetime.now().isoformat()
@@ -95,6 +214,22 @@ class FileAnalyzer:
                 print(f"Analysis completed in {self.analysis_results['scan_info']['scan_duration']:.2f} seconds")
                 print(f"Files analyzed: {self.analysis_results['scan_info']['total_files']}")
                 print(f"Directories scanned: {self.analysis_results['scan_info']['total_directories']}")
+                cache_info = self.analysis_results['scan_info'].get('cache')
+                if cache_info:
+                    print(f"Cache hits: {cache_info['hits']}, misses: {cache_info['misses']}")
+                hashing = self.analysis_results['scan_info']['hashing']
+                if hashing['files']:
+                    print(f"Hashed {hashing['files']} files at {hashing['throughput_mb_s']:.1f} MB/s")
+                content_memo = self.analysis_results['scan_info']['content_memo']
+                if content_memo['analyses_skipped']:
+                    print(f"Content analyses reused for identical files: {content_memo['analyses_skipped']}")
+                stages = self.analysis_results['scan_info']['timings']['stages']
+                if stages:
+                    stage, stage_timing = next(iter(stages.items()))
+                    print(f"Slowest stage: {stage} ({stage_timing['total_seconds']:.2f} seconds)")
+            
+            if self._stream_writer is not None:
+                self._stream_writer.write_summary(self.analysis_results)
             
         except Exception as e:
             self.analysis_results['errors'].append({
@@ -104,27 +239,146 @@ class FileAnalyzer:
             })
             if self.verbose:
                 print(f"Error during analysis: {e}")
+        finally:
+            if self.scan_cache is not None:
+                self._close_cache()
+            if self._stream_writer is not None:
+                self._stream_writer.close()
+                self._stream_writer = None
         
         return self.analysis_results
     
+    def _open_cache(self):
+        """Open the scan cache and reset its hit and miss counters."""
+        from utils.scan_cache import ScanCache
+        
+        try:
+            self.scan_cache = ScanCache(self.cache_file, settings=self._cache_settings())
+        except Exception as e:
+            self.analysis_results['errors'].append({
+                'type': 'cache_error',
+                'path': str(self.cache_file),
+                'message': str(e),
+                'timestamp': datetime.now().isoformat()
+            })
+            return
+        
+        self.analysis_results['scan_info']['cache'] = {
+            'path': str(self.cache_file),
+            'hits': 0,
+            'misses': 0,
+            'hit_rate': 0
+        }
+    
+    def _cache_settings(self):
+        """Describe the options that change cached results, for the scan cache."""
+        settings = 'hash=' + (','.join(self.hash_algorithms) or 'none')
+        if self.hash_large_files:
+            settings += ';hash_large'
+        return settings
+    
+    def _close_cache(self):
+        """Flush and close the scan cache, finalizing its statistics."""
+        cache_info = self.analysis_results['scan_info']['cache']
+        lookups = cache_info['hits'] + cache_info['misses']
+        cache_info['hit_rate'] = cache_info['hits'] / lookups if lookups else 0
+        
+        try:
+            self.scan_cache.close()
+        except Exception as e:
+            self.analysis_results['errors'].append({
+                'type': 'cache_error',
+                'path': str(self.cache_file),
+                'message': str(e),
+                'timestamp': datetime.now().isoformat()
+            })
+        self.scan_cache = None
+    
     def _scan_directory(self, directory_path):
         """
-        Recursively scan directory and analyze files.
+        Scan a directory tree and analyze files.
         
         Args:
             directory_path (Path): Directory to scan
         """
-        try:
-            for item in directory_path.iterdir():
-                if item.is_file():
-                    self._analyze_file(item)
+        files = self._walk_files(directory_path)
+        if self.workers > 1:
+            self._analyze_files_parallel(files)
+        else:
+            for file_path, file_stats in files:
+                self._analyze_file(file_path, file_stats)
+    
+    def _walk_files(self, directory_path):
+        """
+        Walk a directory tree, counting its files and directories.
+        
+        The walk is iterative, with an explicit stack of directory listings,
+        so arbitrarily deep trees cannot exhaust the recursion limit. Entries
+        come from os.scandir, whose cached type and stat information saves a
+        stat call per entry. Files are visited in the same depth-first order
+        as a recursive walk.
+        
+        Args:
+            directory_path (Path): Directory to scan
+            
+        Yields:
+            tuple: (file path, stat result or None) of each file
+        """
+        stack = []
+        entries = self._list_directory(directory_path)
+        if entries is not None:
+            stack.append(iter(entries))
+        
+        while stack:
+            entry = next(stack[-1], None)
+            if entry is None:
+                stack.pop()
+                continue
+            
+            try:
+                if entry.is_file():
+                    file_path = Path(entry.path)
+                    started = time.perf_counter()
+                    try:
+                        file_stats = entry.stat()
+                    except OSError:
+                        # Let metadata extraction report the stat failure
+                        file_stats = None
+                    self.stage_timings.add('stat', time.perf_counter() - started)
+                    
                     self.analysis_results['scan_info']['total_files'] += 1
-                elif item.is_dir():
+                    yield file_path, file_stats
+                elif entry.is_dir():
                     self.analysis_results['scan_info']['total_directories'] += 1
                     if self.verbose:
-                        print(f"Scanning directory: {item}")
-                    self._scan_directory(item)
-                    
+                        print(f"Scanning directory: {entry.path}")
+                    entries = self._list_directory(Path(entry.path))
+                    if entries is not None:
+                        stack.append(iter(entries))
+            except Exception as e:
+                self.analysis_results['errors'].append({
+                    'type': 'directory_scan_error',
+                    'path': entry.path,
+                    'message': str(e),
+                    'timestamp': datetime.now().isoformat()
+                })
+    
+    def _list_directory(self, directory_path):
+        """
+        List the entries of a single directory.
+        
+        The listing is read eagerly so that the walk holds no open directory
+        handles while descending.
+        
+        Args:
+            directory_path (Path): Directory to list
+            
+        Returns:
+            list: os.DirEntry objects, or None if the directory is unreadable
+        """
+        try:
+            with os.scandir(directory_path) as it:
+                return list(it)
         except PermissionError as e:
             self.analysis_results['errors'].append({
                 'type': 'permission_error',
@@ -139,47 +393,307 @@ class FileAnalyzer:
                 'message': str(e),
                 'timestamp': datetime.now().isoformat()
             })
+        return None
     
-    def _analyze_file(self, file_path):
+    def _analyze_file(self, file_path, file_stats=None):
         """
         Analyze a single file.
         
         Args:
             file_path (Path): File to analyze
+            file_stats (os.stat_result): Stat result from the directory walk (optional)
         """
         try:
+            cached = None
+            if self.scan_cache is not None:
+                with self.stage_timer.stage('cache'):
+                    cached = self.scan_cache.lookup(file_path, file_stats)
+            
+            file_analysis = self._build_file_analysis(file_path, file_stats, cached)
+        except Exception as e:
+            self.analysis_results['errors'].append(self._file_error(file_path, e))
+            self.stage_timer.take_file()
+            return
+        
+        self._record_file_analysis(file_analysis, file_stats, from_cache=cached is not None)
+    
+    def _build_file_analysis(self, file_path, file_stats=None, cached=None):
+        """
+        Extract metadata and analyze content of a single file.
+        
+        Args:
+            file_path (Path): File to analyze
+            file_stats (os.stat_result): Stat result from the directory walk (optional)
+            cached (dict): Checksums and content analysis from the scan cache;
+                when given only the stat-based metadata is rebuilt (optional)
+            
+        Returns:
+            dict: Per-file analysis entry
+        """
+        if cached is not None:
+            if self.verbose:
+                print(f"Using cached analysis: {file_path}")
+            
+            with self.stage_timer.stage('metadata'):
+                metadata = self.metadata_extractor.extract(file_path, file_stats, calculate_checksums=False)
+            metadata['checksums'] = cached['checksums']
+            content_analysis = cached['content_analysis']
+        else:
             if self.verbose:
                 print(f"Analyzing file: {file_path}")
             
+            # Read the file once for every stage below
+            file_buffer = FileBuffer(file_path, file_stats)
+            
             # Extract metadata
-            metadata = self.metadata_extractor.extract(file_path)
+            with self.stage_timer.stage('metadata'):
+                metadata = self.metadata_extractor.extract(file_path, file_stats, file_buffer)
             
             # Analyze content
-            content_analysis = self.content_analyzer.analyze(file_path)
+            with self.stage_timer.stage('content'):
+                content_analysis = self.content_analyzer.analyze(file_path, file_buffer)
+        
+        # Combine results
+        return {
+            'path': str(file_path.relative_to(self.target_path)),
+            'absolute_path': str(file_path),
+            'metadata': metadata,
+            'content_analysis': content_analysis
+        }
+    
+    def _record_file_analysis(self, file_analysis, file_stats=None, from_cache=False, stage_durations=None):
+        """
+        Add a per-file analysis entry to the results.
+        
+        The entry is folded into the running statistics, then stored as a
+        compact FileRecord or, when streaming, written out.
+        
+        Args:
+            file_analysis (dict): Per-file analysis entry
+            file_stats (os.stat_result): Stat result the analysis was based on (optional)
+            from_cache (bool): True if the entry was served from the scan cache
+            stage_durations (dict): Stage seconds of the file timed in a
+                worker process (optional)
+        """
+        with self.stage_timer.stage('statistics'):
+            self._statistics_accumulator.add(file_analysis)
+        
+        if self._stream_writer is not None:
+            with self.stage_timer.stage('report'):
+                self._stream_writer.write_file(file_analysis)
+        else:
+            self.analysis_results['file_analysis'].append(FileRecord(self.record_table, file_analysis))
+        self.analysis_results['scan_info']['total_size'] += file_analysis['metadata'].get('size', 0)
+        
+        if self.duplicate_finder is not None and not file_analysis['metadata'].get('error'):
+            # Paths of one inode are hardlinks, not copies (st_nlink is 0 on Windows)
+            file_id = None
+            if file_stats is not None and file_stats.st_nlink > 1:
+                file_id = (file_stats.st_dev, file_stats.st_ino)
+            self.duplicate_finder.add(
+                file_analysis['absolute_path'],
+                file_analysis['metadata'].get('size', 0),
+                file_analysis['path'],
+                file_id
+            )
+        
+        if self.scan_cache is not None:
+            cache_info = self.analysis_results['scan_info']['cache']
+            if from_cache:
+                cache_info['hits'] += 1
+            else:
+                cache_info['misses'] += 1
+                self.scan_cache.store(file_analysis['absolute_path'], file_stats, file_analysis)
+        
+        durations = self.stage_timer.take_file()
+        for stage, seconds in (stage_durations or {}).items():
+            durations[stage] = durations.get(stage, 0.0) + seconds
+        self.stage_timings.add_file(file_analysis['path'], durations)
+    
+    def _file_error(self, file_path, error):
+        """Build the error entry for a file that could not be analyzed."""
+        return {
+            'type': 'file_analysis_error',
+            'path': str(file_path),
+            'message': str(error),
+            'timestamp': datetime.now().isoformat()
+        }
+    
+    def _analyze_files_parallel(self, files):
+        """
+        Analyze files in a process pool while the walk goes on.
+        
+        Files are sent to the workers in batches as the walk yields them, and
+        the walk waits while PARALLEL_BATCHES_PER_WORKER batches per worker
+        are unmerged, so the files held do not grow with the tree. Results
+        are merged in scan order, so the output is identical to a serial
+        scan of the same tree. Files with a fresh scan cache entry are served
+        in this process and never sent to the pool.
+        
+        Args:
+            files (iterator): (file path, stat result) of each file, in scan order
+        """
+        files = (
+            (file_path, file_stats,
+             self.scan_cache is not None and self.scan_cache.contains(file_path, file_stats))
+            for file_path, file_stats in files
+        )
+        workers = self.workers
+        batch_size = PARALLEL_BATCH_SIZE
+        max_pending = workers * batch_size * PARALLEL_BATCHES_PER_WORKER
+        
+        # Small trees are walked whole first, so they start no more workers
+        # than they have files for and still spread them over all of them
+        head = list(itertools.islice(files, max_pending))
+        if len(head) < max_pending:
+            to_analyze = sum(1 for _, _, hit in head if not hit)
+            if not to_analyze:
+                for file_path, file_stats, _ in head:
+                    self._analyze_file(file_path, file_stats)
+                return
+            workers = min(workers, to_analyze)
+            batch_size = max(1, min(batch_size, to_analyze // (workers * 4)))
+        
+        if self.verbose:
+            print(f"Analyzing files with {workers} worker processes")
+        
+        import multiprocessing
+        
+        with multiprocessing.Pool(
+            processes=workers,
+            initializer=_init_worker,
+            initargs=(str(self.target_path), self.verbose, self.mmap_threshold,
+                      self.hash_algorithms, self.hash_large_files, self.resolve_owner_names,
+                      self.profile_file, self.profile_mode)
+        ) as pool:
+            # Batches in scan order, with their pending results; cache hits
+            # are batches of one without a result
+            pending = collections.deque()
+            pending_files = 0
+            batch = []
             
-            # Combine results
-            file_analysis = {
-                'path': str(file_path.relative_to(self.target_path)),
-                'absolute_path': str(file_path),
-                'metadata': metadata,
-                'content_analysis': content_analysis
-            }
+            for file_path, file_stats, hit in itertools.chain(head, files):
+                if hit:
+                    if batch:
+                        pending.append((batch, pool.apply_async(_analyze_files_in_worker, (batch,))))
+                        batch = []
+                    pending.append(([(file_path, file_stats)], None))
+                else:
+                    batch.append((file_path, file_stats))
+                    if len(batch) == batch_size:
+                        pending.append((batch, pool.apply_async(_analyze_files_in_worker, (batch,))))
+                        batch = []
+                
+                pending_files += 1
+                while pending_files > max_pending:
+                    pending_files -= self._merge_batch(*pending.popleft())
             
-            self.analysis_results['file_analysis'].append(file_analysis)
-            self.analysis_results['scan_info']['total_size'] += metadata.get('size', 0)
+            if batch:
+                pending.append((batch, pool.apply_async(_analyze_files_in_worker, (batch,))))
+            while pending:
+                self._merge_batch(*pending.popleft())
             
-        except Exception as e:
+            # Let the workers exit normally, so their exit handlers (profiles) run
+            pool.close()
+            pool.join()
+    
+    def _merge_batch(self, batch, result):
+        """
+        Record the files of a batch from the worker pool.
+        
+        Args:
+            batch (list): (file path, stat result) of each file
+            result (AsyncResult): Worker results of the batch, or None to
+                analyze its files here (cache hits)
+            
+        Returns:
+            int: Number of files in the batch
+        """
+        if result is None:
+            for file_path, file_stats in batch:
+                self._analyze_file(file_path, file_stats)
+            return len(batch)
+        
+        for (file_path, file_stats), (file_analysis, error, worker_stats) in zip(batch, result.get()):
+            self.metadata_extractor.add_hash_stats(worker_stats['hashing'])
+            self.content_analyzer.add_memo_stats(worker_stats['content_memo'])
+            self.file_handler.add_encoding_stats(worker_stats['encoding_detection'])
+            if error:
+                self.analysis_results['errors'].append(error)
+            else:
+                self._record_file_analysis(
+                    file_analysis, file_stats, stage_durations=worker_stats['stage_timings']
+                )
+        return len(batch)
+    
+    def _find_duplicates(self):
+        """Group the scanned files by content and add the duplicates section."""
+        if self.verbose:
+            print("Looking for duplicate files")
+        
+        duplicates = self.duplicate_finder.find()
+        self.analysis_results['duplicates'] = duplicates
+        
+        for error in self.duplicate_finder.errors:
             self.analysis_results['errors'].append({
-                'type': 'file_analysis_error',
-                'path': str(file_path),
-                'message': str(e),
+                'type': 'duplicate_scan_error',
+                'path': error['path'],
+                'message': error['message'],
                 'timestamp': datetime.now().isoformat()
             })
+        
+        if self.verbose:
+            print(f"Duplicate groups: {duplicates['group_count']}, "
+                  f"reclaimable: {self._format_size(duplicates['reclaimable_bytes'])}")
+    
+    def _record_hash_stats(self):
+        """Add the checksum settings and hashing throughput to the scan info."""
+        hash_stats = self.metadata_extractor.hash_stats
+        seconds = hash_stats['seconds']
+        
+        self.analysis_results['scan_info']['hashing'] = {
+            'algorithms': list(self.hash_algorithms),
+            'large_files': self.hash_large_files,
+            'files': hash_stats['files'],
+            'bytes': hash_stats['bytes'],
+            'seconds': seconds,
+            'throughput_mb_s': hash_stats['bytes'] / (1024 * 1024) / seconds if seconds else 0
+        }
+    
+    def _record_memo_stats(self):
+        """Add how many content analyses were reused from the memo to the scan info."""
+        memo_stats = self.content_analyzer.memo_stats
+        lookups = memo_stats['hits'] + memo_stats['misses']
+        
+        self.analysis_results['scan_info']['content_memo'] = {
+            'analyses_skipped': memo_stats['hits'],
+            'hits': memo_stats['hits'],
+            'misses': memo_stats['misses'],
+            'hit_rate': memo_stats['hits'] / lookups if lookups else 0
+        }
+    
+    def _record_encoding_stats(self):
+        """Add how many encodings each detection tier decided to the scan info."""
+        encoding_stats = self.file_handler.encoding_stats
+        detections = sum(encoding_stats.values())
+        
+        self.analysis_results['scan_info']['encoding_detection'] = {
+            **encoding_stats,
+            'detections': detections,
+            'fast_path_rate': 1 - encoding_stats['chardet'] / detections if detections else 0
+        }
+    
+    def _record_stage_timings(self):
+        """Add the per-stage timings and the slowest files to the scan info."""
+        self.analysis_results['scan_info']['timings'] = self.stage_timings.to_dict()
     
     def _generate_statistics(self):
         """Generate comprehensive statistics from analysis results."""
         try:
-            stats = self.report_generator.generate_statistics(self.analysis_results)
+            # Statistics were accumulated while files were recorded
+            started = time.perf_counter()
+            stats = self._statistics_accumulator.finalize(self.analysis_results)
+            self.stage_timings.add('finalize_statistics', time.perf_counter() - started)
             self.analysis_results['statistics'] = stats
         except Exception as e:
             self.analysis_results['errors'].append({
@@ -193,6 +707,12 @@ class FileAnalyzer:
         if not self.output_file:
             return
         
+        if self.streaming:
+            # Records were already written while scanning
+            if self.verbose:
+                print(f"Results saved to: {self.output_file}")
+            return
+        
         try:
             self.report_generator.save_report(
                 self.analysis_results,
@@ -219,6 +739,19 @@ class FileAnalyzer:
         print(f"Total Directories: {scan_info['total_directories']}")
         print(f"Total Size: {self._format_size(scan_info['total_size'])}")
         
+        cache_info = scan_info.get('cache')
+        if cache_info:
+            print(f"Cache Hits: {cache_info['hits']} ({cache_info['hit_rate']:.1%}), Misses: {cache_info['misses']}")
+        
+        hashing = scan_info.get('hashing')
+        if hashing and hashing['files']:
+            print(f"Hashing ({', '.join(hashing['algorithms'])}): {hashing['files']} files, "
+                  f"{hashing['throughput_mb_s']:.1f} MB/s")
+        
+        content_memo = scan_info.get('content_memo')
+        if content_memo and content_memo['analyses_skipped']:
+            print(f"Content Analyses Skipped (identical content): {content_memo['analyses_skipped']}")
+        
         if stats:
             print(f"\nFile Types Found: {len(stats.get('file_types', {}))}")
             print(f"Text Files: {stats.get('text_files', 0)}")
@@ -234,6 +767,11 @@ class FileAnalyzer:
                     for file_type, count in sorted_types[:5]:
                         print(f"  {file_type or '(no extension)'}: {count} files")
         
+        duplicates = self.analysis_results.get('duplicates')
+        if duplicates:
+            print(f"\nDuplicate Files: {duplicates['duplicate_files']} in {duplicates['group_count']} groups "
+                  f"({self._format_size(duplicates['reclaimable_bytes'])} reclaimable)")
+        
         if self.analysis_results['errors']:
             print(f"\nErrors Encountered: {len(self.analysis_results['errors'])}")
         
@@ -248,8 +786,230 @@ class FileAnalyzer:
         return f"{size_bytes:.1f} PB"
 
 
+# Per-process analyzer used by the worker pool
+_worker_analyzer = None
+
+
+def _init_worker(target_path, verbose, mmap_threshold=None,
+                 hash_algorithms=DEFAULT_HASH_ALGORITHMS, hash_large_files=False,
+                 resolve_owner_names=True, profile_file=None, profile_mode='cprofile'):
+    """Build the analyzer instance reused by every file of a worker process."""
+    global _worker_analyzer
+    _worker_analyzer = FileAnalyzer(
+        target_path,
+        verbose=verbose,
+        mmap_threshold=mmap_threshold,
+        hash_algorithms=hash_algorithms,
+        hash_large_files=hash_large_files,
+        resolve_owner_names=resolve_owner_names
+    )
+    
+    if profile_file:
+        import multiprocessing.util
+        from utils.profiling import ScanProfiler, worker_profile_path
+        
+        # Written when the worker exits, after the pool is closed and joined
+        profiler = ScanProfiler(worker_profile_path(profile_file, os.getpid()), profile_mode)
+        profiler.start()
+        multiprocessing.util.Finalize(None, profiler.stop, exitpriority=10)
+
+
+def _analyze_file_in_worker(pending_file):
+    """
+    Analyze a single file inside a worker process.
+    
+    Args:
+        pending_file (tuple): (file path, stat result from the directory walk)
+        
+    Returns:
+        tuple: (file analysis entry, error entry, worker counters since the
+            previous file); exactly one of the first two is None
+    """
+    file_path, file_stats = pending_file
+    try:
+        result = _worker_analyzer._build_file_analysis(file_path, file_stats), None
+    except Exception as e:
+        result = None, _worker_analyzer._file_error(file_path, e)
+    worker_stats = {
+        'hashing': _worker_analyzer.metadata_extractor.take_hash_stats(),
+        'content_memo': _worker_analyzer.content_analyzer.take_memo_stats(),
+        'encoding_detection': _worker_analyzer.file_handler.take_encoding_stats(),
+        'stage_timings': _worker_analyzer.stage_timer.take_file()
+    }
+    return result + (worker_stats,)
+
+
+def _analyze_files_in_worker(pending_files):
+    """
+    Analyze a batch of files inside a worker process.
+    
+    Args:
+        pending_files (list): (file path, stat result) of each file
+        
+    Returns:
+        list: Result of _analyze_file_in_worker for each file
+    """
+    return [_analyze_file_in_worker(pending_file) for pending_file in pending_files]
+
+
+def default_cache_path(output_file):
+    """
+    Get the default scan cache location.
+    
+    Args:
+        output_file (str): Output file path (optional)
+        
+    Returns:
+        str: Cache path next to the output file, or in the current directory
+    """
+    if output_file:
+        output_path = Path(output_file)
+        return str(output_path.with_name(f"{output_path.stem}.cache.sqlite"))
+    return '.file_analyzer_cache.sqlite'
+
+
+def parse_hash_algorithm_list(value):
+    """Parse the --hash option, reporting unknown names as usage errors."""
+    try:
+        return parse_hash_algorithms(value)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+
+
+def parse_worker_count(value):
+    """Parse the --workers option, reporting negative counts as usage errors."""
+    workers = int(value)
+    if workers < 0:
+        raise argparse.ArgumentTypeError(f"must be 0 or more, not {workers}")
+    return workers
+
+
+def query_main(argv):
+    """
+    Command-line interface of the query subcommand.
+    
+    Args:
+        argv (list): Arguments following 'query'
+    """
+    # Only the query subcommand reads SQLite reports
+    import sqlite3
+    from utils.index_query import IndexQuery, QUERY_OUTPUT_FORMATS, write_rows
+    
+    parser = argparse.ArgumentParser(
+        prog='file_analyzer.py query',
+        description="Query a SQLite scan report (--format sqlite) without rescanning",
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+        epilog="""
+Examples:
+  python file_analyzer.py query scan.db --order-by size --desc --limit 20
+  python file_analyzer.py query scan.db --group-by category --order-by size --desc --limit 3
+  python file_analyzer.py query scan.db --pattern api_keys --fields path,risk_level
+  python file_analyzer.py query scan.db --where risk_level=high --where 'size>1048576' --where 'modified>=2024-06-01'
+  python file_analyzer.py query scan.db --count-by extension --where 'path~src/*'
+        """
+    )
+    
+    parser.add_argument(
+        'report',
+        help='SQLite scan report path'
+    )
+    
+    parser.add_argument(
+        '--where',
+        help="Condition FIELD OPERATOR VALUE, with operators = != < <= > >= and ~ "
+             "(glob match); timestamps accept ISO dates (repeatable)",
+        action='append',
+        metavar='CONDITION'
+    )
+    
+    parser.add_argument(
+        '--pattern',
+        help='Only files with matches of this content pattern, e.g. api_keys (repeatable)',
+        action='append',
+        metavar='NAME'
+    )
+    
+    parser.add_argument(
+        '--fields',
+        help='Comma-separated file fields to output (default: path,size,category,risk_level,modified)',
+        type=lambda value: [field.strip() for field in value.split(',') if field.strip()]
+    )
+    
+    parser.add_argument(
+        '--order-by',
+        help='Field to sort files by',
+        metavar='FIELD'
+    )
+    
+    parser.add_argument(
+        '--desc',
+        help='Sort in descending order',
+        action='store_true'
+    )
+    
+    parser.add_argument(
+        '--limit', '-n',
+        help='Maximum number of rows (of files per group with --group-by)',
+        type=int
+    )
+    
+    group = parser.add_mutually_exclusive_group()
+    group.add_argument(
+        '--group-by',
+        help='Output the first --limit files of each value of FIELD',
+        metavar='FIELD'
+    )
+    group.add_argument(
+        '--count-by',
+        help='Output file counts and total size per value of FIELD',
+        metavar='FIELD'
+    )
+    
+    parser.add_argument(
+        '--format', '-f',
+        help='Output format',
+        choices=QUERY_OUTPUT_FORMATS,
+        default='csv'
+    )
+    
+    args = parser.parse_args(argv)
+    
+    try:
+        query = IndexQuery(args.report)
+        try:
+            if args.count_by:
+                names, rows = query.summarize(
+                    args.count_by, where=args.where, patterns=args.pattern, limit=args.limit
+                )
+            else:
+                names, rows = query.files(
+                    fields=args.fields,
+                    where=args.where,
+                    patterns=args.pattern,
+                    order_by=args.order_by,
+                    descending=args.desc,
+                    limit=args.limit,
+                    group_by=args.group_by
+                )
+            write_rows(names, rows, sys.stdout, args.format)
+            sys.stdout.flush()
+        finally:
+            query.close()
+        
+    except BrokenPipeError:
+        # Output piped into e.g. head; silence the flush at exit
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+    except (FileNotFoundError, ValueError, sqlite3.Error) as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(1)
+
+
 def main():
     """Main function with command-line interface."""
+    if sys.argv[1:2] == ['query']:
+        query_main(sys.argv[2:])
+        return
+    
     parser = argparse.ArgumentParser(
         description="Comprehensive File and Directory Analysis Tool",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -258,6 +1018,17 @@ Examples:
   python file_analyzer.py /path/to/analyze
   python file_analyzer.py ./attached_assets --output report.json --verbose
   python file_analyzer.py ~/documents --format csv --output analysis.csv
+  python file_analyzer.py /srv/assets --workers 0 --output report.json
+  python file_analyzer.py /srv/assets --cache --output nightly.json
+  python file_analyzer.py /srv/assets --format ndjson --output scan.ndjson
+  python file_analyzer.py /srv/assets --hash blake2b --hash-large
+  python file_analyzer.py /srv/share --hash none --duplicates --output dupes.json
+  python file_analyzer.py /data --format ndjson --percentile-sketch 1000000 -o scan.ndjson
+  python file_analyzer.py /data --format ndjson --stats-backend numpy -o scan.ndjson
+  python file_analyzer.py /data --workers 0 --profile nightly.prof -o scan.json
+  python file_analyzer.py /data --profile nightly.folded --profile-mode sampling -o scan.json
+  python file_analyzer.py /data --format sqlite --output scan.db
+  python file_analyzer.py query scan.db --where risk_level=high --order-by size --desc
         """
     )
     
@@ -277,7 +1048,7 @@ Examples:
     parser.add_argument(
         '--format', '-f',
         help='Output format',
-        choices=['json', 'csv', 'txt'],
+        choices=['json', 'csv', 'txt', 'ndjson', 'sqlite'],
         default='json'
     )
     
@@ -287,15 +1058,121 @@ Examples:
         action='store_true'
     )
     
+    parser.add_argument(
+        '--workers', '-w',
+        help='Number of worker processes for file analysis (0 = all CPUs)',
+        type=parse_worker_count,
+        default=1
+    )
+    
+    parser.add_argument(
+        '--mmap-threshold',
+        help='Size in MB above which text files are pattern-scanned memory-mapped '
+             '(0 disables memory mapping, default: 256)',
+        type=int
+    )
+    
+    parser.add_argument(
+        '--hash',
+        help='Comma-separated checksums to compute: md5, sha1, sha256, blake2b, '
+             'or none (default: md5,sha1,sha256)',
+        type=parse_hash_algorithm_list,
+        default=DEFAULT_HASH_ALGORITHMS
+    )
+    
+    parser.add_argument(
+        '--hash-large',
+        help='Also hash files over 10MB (read in large buffers, digests updated in parallel)',
+        action='store_true'
+    )
+    
+    parser.add_argument(
+        '--no-owner-names',
+        help='Report file owners by numeric uid/gid only, without user and group name lookups',
+        action='store_true'
+    )
+    
+    parser.add_argument(
+        '--profile',
+        help='Profile the scan into FILE, worker processes into files named like '
+             'FILE with .worker-PID before its extension (scan.prof: '
+             'scan.worker-PID.prof), and write a top-50 cumulative summary to FILE.txt',
+        metavar='FILE'
+    )
+    
+    parser.add_argument(
+        '--profile-mode',
+        help='cprofile traces every call (pstats output); sampling records stacks '
+             'every 5 ms with low overhead (collapsed stacks output, Unix only)',
+        choices=PROFILE_MODES,
+        default='cprofile'
+    )
+    
+    parser.add_argument(
+        '--duplicates',
+        help='Find files with identical content (compared by size, then a hash '
+             'of their first and last 64KB, then a full hash)',
+        action='store_true'
+    )
+    
+    parser.add_argument(
+        '--percentile-sketch',
+        help='Estimate size percentiles with a KLL quantile sketch (about 1.3%% rank '
+             'error) once more than this many files are scanned (0 = always; '
+             'default: exact)',
+        type=int,
+        metavar='FILES'
+    )
+    
+    parser.add_argument(
+        '--stats-backend',
+        help='Aggregate file sizes and timestamps in pure Python or in NumPy '
+             'int64 arrays (faster on millions of files, requires NumPy)',
+        choices=STATISTICS_BACKENDS,
+        default='python'
+    )
+    
+    parser.add_argument(
+        '--cache',
+        help='Reuse analysis of unchanged files from a SQLite scan cache '
+             '(stored next to the output file unless --cache-file is given)',
+        action='store_true'
+    )
+    
+    parser.add_argument(
+        '--cache-file',
+        help='Scan cache path (implies --cache)',
+        type=str
+    )
+    
     args = parser.parse_args()
     
+    cache_file = args.cache_file
+    if args.cache and not cache_file:
+        cache_file = default_cache_path(args.output)
+    
+    mmap_threshold = None
+    if args.mmap_threshold is not None:
+        mmap_threshold = args.mmap_threshold * 1024 * 1024
+    
     try:
         # Initialize analyzer
         analyzer = FileAnalyzer(
             target_path=args.path,
             output_format=args.format,
             output_file=args.output,
-            verbose=args.verbose
+            verbose=args.verbose,
+            workers=args.workers,
+            cache_file=cache_file,
+            mmap_threshold=mmap_threshold,
+            hash_algorithms=args.hash,
+            hash_large_files=args.hash_large,
+            find_duplicates=args.duplicates,
+            percentile_sketch_threshold=args.percentile_sketch,
+            statistics_backend=args.stats_backend,
+            resolve_owner_names=not args.no_owner_names,
+            profile_file=args.profile,
+            profile_mode=args.profile_mode
         )
         
         # Perform analysis
@@ -305,14 +1182,18 @@ Examples:
         if args.output:
             analyzer.save_results()
         
-        # Print summary
-        analyzer.print_summary()
+        # Print summary, keeping stdout clean when NDJSON is streamed to it
+        if args.format == 'ndjson' and not args.output:
+            with contextlib.redirect_stdout(sys.stderr):
+                analyzer.print_summary()
+        else:
+            analyzer.print_summary()
         
         # Print results to stdout if no output file
         if not args.output:
             if args.format == 'json':
-                print(json.dumps(results, indent=2, default=str))
-            else:
+                print(json.dumps(results, indent=2, default=json_default))
+            elif args.format != 'ndjson':  # NDJSON was streamed while scanning
                 print("Use --output option to save results in CSV or TXT format")
         
     except FileNotFoundError as e:
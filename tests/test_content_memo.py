@@ -0,0 +1,58 @@
+"""
+Tests of the content analysis memo of identical files.
+"""
+
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.content_analyzer import ContentAnalyzer
+from utils.file_handler import FileBuffer
+
+
+CONTENT = b'select name from users where email = "user@example.com"\n'
+
+
+class ContentMemoTest(unittest.TestCase):
+    """Identical text files of the same type are analyzed once."""
+    
+    def setUp(self):
+        self.directory = Path(tempfile.mkdtemp())
+        self.analyzer = ContentAnalyzer()
+    
+    def tearDown(self):
+        shutil.rmtree(self.directory)
+    
+    def analyze(self, name, content=CONTENT):
+        """Write a file and analyze it through a shared buffer."""
+        file_path = self.directory / name
+        file_path.write_bytes(content)
+        return self.analyzer.analyze(file_path, FileBuffer(file_path))
+    
+    def test_identical_text_files_share_an_analysis(self):
+        first = self.analyze('a.txt')
+        second = self.analyze('b.txt')
+        
+        self.assertEqual(self.analyzer.memo_stats, {'hits': 1, 'misses': 1})
+        self.assertEqual(first, second)
+    
+    def test_type_is_part_of_the_key(self):
+        text = self.analyze('query.txt')
+        code = self.analyze('query.py')
+        
+        self.assertEqual(self.analyzer.memo_stats, {'hits': 0, 'misses': 2})
+        self.assertNotEqual(text['file_type_analysis'], code['file_type_analysis'])
+    
+    def test_binary_files_are_not_memoized(self):
+        self.analyze('a.bin', b'\x00\x01' * 100)
+        self.analyze('b.bin', b'\x00\x01' * 100)
+        
+        self.assertEqual(self.analyzer.memo_stats, {'hits': 0, 'misses': 0})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,71 @@
+"""
+Tests of the compact per-file records against the entries they are built from.
+"""
+
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from file_analyzer import FileAnalyzer
+from utils.file_record import FileRecord, RecordTable
+
+
+FILES = {
+    'README.md': b'# Title\n\nContact user@example.com\n',
+    'setup.CFG': b'[metadata]\nname = example\n',
+    '.gitignore': b'*.pyc\n',
+    'archive.tar.gz': b'\x1f\x8b\x08\x00' + b'\x00' * 64,
+    'src/main.py': b'import os\n\n\ndef main():\n    return os.getcwd()\n',
+    'src/data/values.json': b'{"a": [1, 2, {"b": null}]}\n',
+    'src/data/empty.txt': b'',
+    'src/data/no_suffix': b'plain text\n',
+}
+
+
+class FileRecordTest(unittest.TestCase):
+    """FileRecord.to_dict() must rebuild the analyzer's entry exactly."""
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.directory = Path(tempfile.mkdtemp()).resolve()
+        for name, content in FILES.items():
+            file_path = cls.directory / name
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            file_path.write_bytes(content)
+        cls.analyzer = FileAnalyzer(cls.directory, hash_algorithms=('md5',))
+    
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(cls.directory)
+    
+    def entries(self):
+        """Analyze every file of the tree."""
+        for name in FILES:
+            file_path = self.directory / name
+            yield self.analyzer._build_file_analysis(file_path, file_path.stat())
+    
+    def test_round_trip(self):
+        table = RecordTable(self.directory)
+        for entry in self.entries():
+            record = FileRecord(table, entry)
+            self.assertIsNone(record._entry, entry['path'])
+            self.assertEqual(record.to_dict(), entry)
+            self.assertEqual(dict(record), entry)
+    
+    def test_entries_not_derived_from_the_path_are_kept(self):
+        table = RecordTable(self.directory)
+        entry = next(self.entries())
+        renamed = {**entry, 'metadata': {**entry['metadata'], 'name': 'other.md'}}
+        elsewhere = {**entry, 'absolute_path': '/elsewhere/' + entry['path']}
+        
+        for changed in (renamed, elsewhere):
+            record = FileRecord(table, changed)
+            self.assertIs(record.to_dict(), changed)
+
+
+if __name__ == '__main__':
+    unittest.main()
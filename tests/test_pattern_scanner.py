@@ -0,0 +1,95 @@
+"""
+Tests of the streaming pattern scan against whole-content findall().
+"""
+
+import random
+import sys
+import unittest
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from utils.content_analyzer import ContentAnalyzer
+
+
+OVERLAP = 1024
+
+_WORDS = (
+    'select', 'from', 'where', 'insert', 'into', 'values', 'users', 'name',
+    'user@example.com', 'https://example.org/a?b=1', '10.0.0.1', 'password=hunter2',
+    'api_key=abcdefghijklmnop1234', '2024-01-31', '555-123-4567',
+    'password :', '"secret1"', 'exec(', '$x', ')', 'innerHTML +', '1234 5678 9012 3456'
+)
+
+
+def _text(rng, lines, words_per_line):
+    """Generate lines of random words and pattern matches."""
+    return '\n'.join(
+        ' '.join(rng.choice(_WORDS) for _ in range(words_per_line))
+        for _ in range(lines)
+    ) + '\n'
+
+
+class StreamingScanTest(unittest.TestCase):
+    """Streamed results must equal PatternScanner.findall() on the whole content."""
+    
+    @classmethod
+    def setUpClass(cls):
+        analyzer = ContentAnalyzer()
+        cls.scanners = (analyzer.pattern_scanner, analyzer.security_scanner)
+    
+    def assert_stream_matches(self, content, chunk_size, overlap=OVERLAP):
+        """Compare streamed counts and values with findall() for every pattern."""
+        for scanner in self.scanners:
+            expected = scanner.findall(content)
+            
+            counting = scanner.stream(count_only=True, overlap=overlap)
+            collecting = scanner.stream(overlap=overlap)
+            for offset in range(0, len(content), chunk_size):
+                counting.feed(content[offset:offset + chunk_size])
+                collecting.feed(content[offset:offset + chunk_size])
+            counts = counting.finish()
+            values = collecting.finish()
+            
+            for name, matches in expected.items():
+                message = f'{name} (chunk size {chunk_size}, overlap {overlap})'
+                self.assertEqual(counts[name], len(matches), message)
+                self.assertEqual(sum(values[name].values()), len(matches), message)
+                self.assertEqual(list(values[name]), list(dict.fromkeys(matches)), message)
+    
+    def test_short_lines(self):
+        rng = random.Random(1)
+        self.assert_stream_matches(_text(rng, 2000, 8), chunk_size=700)
+    
+    def test_lines_longer_than_overlap(self):
+        rng = random.Random(2)
+        self.assert_stream_matches(_text(rng, 12, 3000), chunk_size=4096)
+    
+    def test_single_line_without_newline(self):
+        rng = random.Random(3)
+        self.assert_stream_matches(_text(rng, 1, 5000).rstrip('\n'), chunk_size=1500)
+    
+    def test_match_start_long_before_its_end(self):
+        content = 'select ' + 'a' * 50_000 + ' from t\n' + 'password = ' + 'x' * 20_000 + '\n'
+        self.assert_stream_matches(content, chunk_size=4096)
+    
+    def test_random_content_small_overlaps(self):
+        rng = random.Random(4)
+        separators = (' ', ' ', ' ', '\n', '\t', '')
+        for _ in range(60):
+            pieces = []
+            for _ in range(rng.randrange(10, 300)):
+                if rng.random() < 0.03:
+                    pieces.append('a' * rng.randrange(50, 600))
+                else:
+                    pieces.append(rng.choice(_WORDS))
+                pieces.append(rng.choice(separators))
+            self.assert_stream_matches(
+                ''.join(pieces),
+                chunk_size=rng.randrange(1, 300),
+                overlap=rng.choice((16, 64, 200))
+            )
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,400 @@
+"""
+Mergeable running aggregates for single-pass statistics.
+"""
+
+import heapq
+import math
+import random
+from bisect import bisect_right
+from collections import Counter
+from itertools import accumulate
+
+from utils.timestamps import month_range
+
+
+# Accuracy parameter of QuantileSketch; larger is more accurate and larger
+QUANTILE_SKETCH_K = 200
+
+# Smallest capacity of a QuantileSketch level
+_MIN_LEVEL_CAPACITY = 8
+
+
+class MinMax:
+    """
+    Count, minimum and maximum of values seen one at a time.
+    
+    Works for any ordered values, such as numbers or datetimes.
+    """
+    
+    __slots__ = ('count', 'min', 'max')
+    
+    def __init__(self):
+        """Initialize the MinMax."""
+        self.count = 0
+        self.min = None
+        self.max = None
+    
+    def add(self, value):
+        """
+        Add one value.
+        
+        Args:
+            value: Value comparable with the values added so far
+        """
+        if self.count:
+            if value < self.min:
+                self.min = value
+            elif value > self.max:
+                self.max = value
+        else:
+            self.min = self.max = value
+        self.count += 1
+    
+    def merge(self, other):
+        """
+        Fold in the values of another MinMax.
+        
+        Args:
+            other (MinMax): Aggregate of other values
+        """
+        if not other.count:
+            return
+        if not self.count or other.min < self.min:
+            self.min = other.min
+        if not self.count or other.max > self.max:
+            self.max = other.max
+        self.count += other.count
+
+
+class Summary(MinMax):
+    """Count, sum, minimum and maximum of numeric values."""
+    
+    __slots__ = ('total',)
+    
+    def __init__(self):
+        """Initialize the Summary."""
+        super().__init__()
+        self.total = 0
+    
+    def add(self, value):
+        """
+        Add one value.
+        
+        Args:
+            value (int or float): Value to add
+        """
+        super().add(value)
+        self.total += value
+    
+    def merge(self, other):
+        """
+        Fold in the values of another Summary.
+        
+        Args:
+            other (Summary): Aggregate of other values
+        """
+        super().merge(other)
+        self.total += other.total
+    
+    @property
+    def mean(self):
+        """Mean of the values, or 0 if there are none."""
+        return self.total / self.count if self.count else 0
+
+
+class TopK:
+    """
+    The k items with the largest keys.
+    
+    Items are kept in a min-heap of size k. Among equal keys the item added
+    first wins, like a stable sort by descending key; merged items count as
+    added after the items already held.
+    """
+    
+    def __init__(self, k):
+        """
+        Initialize the TopK.
+        
+        Args:
+            k (int): Number of items to keep
+        """
+        self.k = k
+        self.seen = 0
+        self._heap = []  # (key, -sequence, item)
+    
+    def add(self, key, item):
+        """
+        Offer one item.
+        
+        Args:
+            key: Sort key of the item
+            item: Item kept if its key is among the k largest
+        """
+        self._push((key, -self.seen, item))
+        self.seen += 1
+    
+    def merge(self, other):
+        """
+        Fold in the items of another TopK.
+        
+        Args:
+            other (TopK): Items offered after those of this TopK
+        """
+        for key, negative_sequence, item in other._heap:
+            self._push((key, negative_sequence - self.seen, item))
+        self.seen += other.seen
+    
+    def _push(self, entry):
+        """Add an entry to the heap if it belongs among the k largest."""
+        if len(self._heap) < self.k:
+            heapq.heappush(self._heap, entry)
+        elif entry > self._heap[0]:
+            heapq.heapreplace(self._heap, entry)
+    
+    def items(self):
+        """
+        Get the kept items.
+        
+        Returns:
+            list: (key, item) tuples, largest key first
+        """
+        return [(key, item) for key, _, item in sorted(self._heap, reverse=True)]
+
+
+class Histogram:
+    """
+    Counts of values falling into fixed buckets.
+    
+    Bucket i holds values v with edges[i - 1] <= v < edges[i]; the first
+    bucket is unbounded below and the last unbounded above.
+    """
+    
+    def __init__(self, edges, labels):
+        """
+        Initialize the Histogram.
+        
+        Args:
+            edges (sequence): Ascending bucket boundaries
+            labels (sequence): Bucket names, one more than edges
+        """
+        if len(labels) != len(edges) + 1:
+            raise ValueError("Histogram needs one more label than edges")
+        self.edges = tuple(edges)
+        self.labels = tuple(labels)
+        self.counts = [0] * len(self.labels)
+    
+    def add(self, value):
+        """
+        Count one value.
+        
+        Args:
+            value: Value comparable with the edges
+        """
+        self.counts[bisect_right(self.edges, value)] += 1
+    
+    def merge(self, other):
+        """
+        Fold in the counts of another Histogram with the same buckets.
+        
+        Args:
+            other (Histogram): Histogram of other values
+        """
+        if other.edges != self.edges:
+            raise ValueError("Cannot merge histograms with different buckets")
+        self.counts = [count + other_count for count, other_count in zip(self.counts, other.counts)]
+    
+    def to_dict(self):
+        """
+        Get the counts by bucket.
+        
+        Returns:
+            dict: Bucket label to count, in bucket order
+        """
+        return dict(zip(self.labels, self.counts))
+
+
+
+class MonthCounter:
+    """
+    Counts of raw timestamps by local calendar month.
+    
+    The nanosecond range of each month seen is cached, so counting a
+    timestamp is a bisect over integers; calendar conversion only happens
+    once per distinct month.
+    """
+    
+    def __init__(self):
+        """Initialize the MonthCounter."""
+        self.counts = Counter()  # (year, month) -> count
+        self._starts = []
+        self._ranges = []  # (end, (year, month)), parallel to _starts
+    
+    def add(self, value):
+        """
+        Count one timestamp.
+        
+        Args:
+            value (int): Nanoseconds since the epoch
+        """
+        index = bisect_right(self._starts, value) - 1
+        if index >= 0 and value < self._ranges[index][0]:
+            self.counts[self._ranges[index][1]] += 1
+            return
+        
+        year, month, start, end = month_range(value)
+        self.counts[(year, month)] += 1
+        if start <= value < end:
+            self._starts.insert(index + 1, start)
+            self._ranges.insert(index + 1, (end, (year, month)))
+    
+    def merge(self, other):
+        """
+        Fold in the counts of another MonthCounter.
+        
+        Args:
+            other (MonthCounter): Counts of other timestamps
+        """
+        self.counts.update(other.counts)
+
+
+class QuantileSketch:
+    """
+    KLL sketch estimating quantiles of a stream in bounded memory.
+    
+    Values enter level 0. When a level fills up it is sorted and every other
+    value, starting at a random offset, moves up one level, where each value
+    stands for twice as many input values. Level capacities shrink
+    geometrically (by 2/3) below the top level, so the sketch holds roughly
+    3k values however many are added.
+    
+    An estimated quantile's rank is within rank_error * count of the true
+    rank with 99% confidence, about 1.3% for the default k = 200. Sketches
+    merge by concatenating their levels and compacting again, with the same
+    bound.
+    """
+    
+    def __init__(self, k=QUANTILE_SKETCH_K, seed=0):
+        """
+        Initialize the QuantileSketch.
+        
+        Args:
+            k (int): Capacity of the top level, which sets the accuracy
+            seed (int): Seed of the compaction offsets, so results are
+                reproducible
+        """
+        self.k = k
+        self.count = 0
+        self._levels = [[]]
+        self._size = 0
+        self._max_size = self._capacity(0)
+        self._random = random.Random(seed)
+    
+    @property
+    def rank_error(self):
+        """Normalized rank error bound at 99% confidence."""
+        # Empirical fit for KLL sketches with 2/3 capacity decay
+        return 2.296 / self.k ** 0.9723
+    
+    def add(self, value):
+        """
+        Add one value.
+        
+        Args:
+            value: Value comparable with the values added so far
+        """
+        self._levels[0].append(value)
+        self._size += 1
+        self.count += 1
+        if self._size >= self._max_size:
+            self._compress()
+    
+    def merge(self, other):
+        """
+        Fold in the values of another QuantileSketch.
+        
+        Args:
+            other (QuantileSketch): Sketch of other values
+        """
+        while len(self._levels) < len(other._levels):
+            self._levels.append([])
+        for level, values in enumerate(other._levels):
+            self._levels[level].extend(values)
+        
+        self.count += other.count
+        self._size += other._size
+        self._max_size = self._total_capacity()
+        if self._size >= self._max_size:
+            self._compress()
+    
+    def quantile(self, fraction):
+        """
+        Estimate a quantile.
+        
+        Args:
+            fraction (float): Quantile between 0 and 1
+        
+        Returns:
+            The retained value at the estimated rank, or None if the sketch is empty
+        """
+        return self.quantiles([fraction])[0]
+    
+    def quantiles(self, fractions):
+        """
+        Estimate several quantiles at once.
+        
+        Each estimate is the smallest retained value whose estimated rank
+        exceeds int(count * fraction), matching the index an exact sorted
+        list would be read at.
+        
+        Args:
+            fractions (sequence): Quantiles between 0 and 1
+        
+        Returns:
+            list: Estimated values, None for each if the sketch is empty
+        """
+        if not self.count:
+            return [None] * len(fractions)
+        
+        weighted = sorted(
+            (value, 1 << level)
+            for level, values in enumerate(self._levels)
+            for value in values
+        )
+        cumulative = list(accumulate(weight for _, weight in weighted))
+        
+        results = []
+        for fraction in fractions:
+            index = bisect_right(cumulative, int(self.count * fraction))
+            results.append(weighted[min(index, len(weighted) - 1)][0])
+        return results
+    
+    def _capacity(self, level):
+        """Capacity of a level, shrinking with its depth below the top level."""
+        depth = len(self._levels) - level - 1
+        return max(int(math.ceil(self.k * (2 / 3) ** depth)), _MIN_LEVEL_CAPACITY)
+    
+    def _total_capacity(self):
+        """Number of values the sketch holds before compacting."""
+        return sum(self._capacity(level) for level in range(len(self._levels)))
+    
+    def _compress(self):
+        """Compact the lowest full level until the sketch fits its capacity."""
+        while self._size >= self._max_size:
+            for level, values in enumerate(self._levels):
+                if len(values) < self._capacity(level):
+                    continue
+                
+                if level + 1 == len(self._levels):
+                    self._levels.append([])
+                
+                values.sort()
+                # An odd value out stays on this level
+                kept = [values.pop()] if len(values) % 2 else []
+                promoted = values[self._random.getrandbits(1)::2]
+                
+                self._levels[level + 1].extend(promoted)
+                self._levels[level] = kept
+                self._size -= len(values) - len(promoted)
+                break
+            
+            self._max_size = self._total_capacity()
@@ -3,16 +3,53 @@ Content analysis utilities for files.
 """
 
 import re
+import hashlib
 from pathlib import Path
-from collections import Counter
+from collections import Counter, OrderedDict
 import json
 
+from utils.pattern_scanner import PatternScanner, DIGIT
+from utils.text_statistics import TextStatistics
+
+
+# Analyses kept for reuse by files with identical content
+CONTENT_MEMO_SIZE = 1024
+
+# Everything but brackets, removed before their nesting is measured
+_NON_BRACKETS = re.compile(r'[^()\[\]{}]+')
+
 
 class ContentAnalyzer:
     """Analyzes file content for various patterns and characteristics."""
     
-    def __init__(self):
-        """Initialize the ContentAnalyzer."""
+    def __init__(self, file_handler=None, metadata_extractor=None, mmap_threshold=None,
+                 memo_size=CONTENT_MEMO_SIZE):
+        """
+        Initialize the ContentAnalyzer.
+        
+        Args:
+            file_handler (FileHandler): Shared file handler (optional)
+            metadata_extractor (MetadataExtractor): Shared metadata extractor (optional)
+            mmap_threshold (int): Size in bytes above which ASCII/UTF-8 text
+                files are pattern-scanned memory-mapped; 0 disables it
+                (optional, defaults to MMAP_THRESHOLD)
+            memo_size (int): Number of analyses kept for files with identical
+                content; 0 disables the memo
+        """
+        from utils.file_handler import FileHandler, MMAP_THRESHOLD
+        from utils.metadata_extractor import MetadataExtractor
+        
+        # Long-lived helpers, reused for every analyzed file
+        self.file_handler = file_handler or FileHandler()
+        self.metadata_extractor = metadata_extractor or MetadataExtractor(self.file_handler)
+        self.stage_timer = self.file_handler.stage_timer
+        self.mmap_threshold = MMAP_THRESHOLD if mmap_threshold is None else mmap_threshold
+        
+        # Least recently used analyses by (content hash, suffix)
+        self.memo_size = memo_size
+        self._memo = OrderedDict()
+        self.memo_stats = {'hits': 0, 'misses': 0}
+        
         # Common patterns for analysis
         self.patterns = {
             'emails': re.compile(r'\b[A-Za-z0-9._%+-]+@[A-Za-z0-9.-]+\.[A-Z|a-z]{2,}\b'),
@@ -34,57 +71,187 @@ class ContentAnalyzer:
             'sql_injection_risk': re.compile(r'(?i)(exec|execute|eval)\s*\(.*\$.*\)'),
             'xss_risk': re.compile(r'(?i)(innerHTML|outerHTML|document\.write)\s*\+|eval\s*\('),
         }
+        
+        # Substrings every match of a pattern must contain; each tuple lists
+        # alternatives, and patterns whose requirements fail are not run
+        pattern_prefilters = {
+            'emails': [('@',), ('.',)],
+            'urls': [('http://', 'https://')],
+            'ip_addresses': [('.',), (DIGIT,)],
+            'phone_numbers': [(DIGIT,)],
+            'dates': [('/', '-'), (DIGIT,)],
+            'credit_cards': [(DIGIT,)],
+            'social_security': [('-',), (DIGIT,)],
+            'passwords': [('passw', 'pwd'), (':', '=')],
+            'api_keys': [('key', 'token'), (':', '=')],
+            'sql_queries': [('select', 'insert', 'update', 'delete', 'create', 'drop', 'alter'), ('from',)],
+        }
+        security_prefilters = {
+            'potential_secrets': [('secret', 'password', 'key', 'token', 'auth', 'credential')],
+            'hardcoded_credentials': [('pass', 'pwd'), (':', '='), ('"', "'")],
+            'sql_injection_risk': [('exec', 'eval'), ('$',), ('(',)],
+            'xss_risk': [('innerhtml', 'outerhtml', 'document.write', 'eval')],
+        }
+        
+        # Regexes matching wherever a match of a pattern can begin; patterns
+        # sharing a start regex share its candidate positions
+        number_start = r'\d(?<!\w\d)'  # digit at a word boundary
+        pattern_starts = {
+            'ip_addresses': number_start,
+            'phone_numbers': r'[+(\d]',
+            'dates': number_start,
+            'credit_cards': number_start,
+            'social_security': number_start,
+        }
+        
+        # Compiled scanners for the content and security pattern sets
+        self.pattern_scanner = PatternScanner(self.patterns, pattern_prefilters, pattern_starts)
+        self.security_scanner = PatternScanner(self.security_patterns, security_prefilters)
     
-    def analyze(self, file_path):
+    def analyze(self, file_path, file_buffer=None):
         """
         Perform comprehensive content analysis on a file.
         
+        Text files read whole from the shared buffer are looked up in the
+        memo once their type is known: a file with the same content and type
+        as a recently analyzed one gets that file's results without being
+        analyzed again. Memoized results share their nested dicts and must
+        not be modified.
+        
         Args:
             file_path (Path): Path to the file
+            file_buffer (FileBuffer): Shared content buffer (optional)
             
         Returns:
             dict: Analysis results
         """
         file_path = Path(file_path)
         
-        analysis = {
-            'file_type_analysis': {},
+        try:
+            # Get file type information
+            file_type_info = self.file_handler.get_file_type(file_path, file_buffer)
+        except Exception as e:
+            return self._analysis_result(error=str(e))
+        
+        memo_key = self._memo_key(file_path, file_type_info, file_buffer)
+        if memo_key is not None:
+            memoized = self._memo.get(memo_key)
+            if memoized is not None:
+                self._memo.move_to_end(memo_key)
+                self.memo_stats['hits'] += 1
+                return dict(memoized)
+            self.memo_stats['misses'] += 1
+        
+        analysis = self._analyze_file(file_path, file_type_info, file_buffer)
+        
+        if memo_key is not None and not analysis['error']:
+            self._memo[memo_key] = analysis
+            if len(self._memo) > self.memo_size:
+                self._memo.popitem(last=False)
+        
+        return analysis
+    
+    def _memo_key(self, file_path, file_type_info, file_buffer=None):
+        """
+        Get the memo key of a file.
+        
+        Only text files read whole are memoized; other files get no content
+        analysis worth saving, so they are neither read nor hashed for it.
+        The detected type is part of the key because it decides the checks
+        run and is part of the results; it tells apart names the suffix does
+        not ('.tar.gz' and '.gz').
+        
+        Args:
+            file_path (Path): Path to the file
+            file_type_info (dict): File type information
+            file_buffer (FileBuffer): Shared content buffer (optional)
+            
+        Returns:
+            tuple: (content hash, file type values), or None if the file is
+                not memoized
+        """
+        if not self.memo_size or file_buffer is None or not file_type_info['is_text']:
+            return None
+        if self._is_large_text(file_path, file_buffer):
+            return None
+        
+        with self.stage_timer.stage('read'):
+            data = file_buffer.read()
+        if data is None:
+            return None
+        
+        return hashlib.blake2b(data, digest_size=16).digest(), tuple(file_type_info.values())
+    
+    def take_memo_stats(self):
+        """
+        Return the memo hit and miss counts gathered so far and reset them.
+        
+        Returns:
+            dict: Memo hits and misses
+        """
+        memo_stats = self.memo_stats
+        self.memo_stats = {'hits': 0, 'misses': 0}
+        return memo_stats
+    
+    def add_memo_stats(self, memo_stats):
+        """
+        Add memo counts gathered elsewhere, e.g. in a worker process.
+        
+        Args:
+            memo_stats (dict): Counts as returned by take_memo_stats()
+        """
+        for key, value in memo_stats.items():
+            self.memo_stats[key] += value
+    
+    def _analysis_result(self, file_type_info=None, error=None):
+        """Create the analysis results of a file, before any stage has run."""
+        return {
+            'file_type_analysis': file_type_info or {},
             'content_patterns': {},
             'security_analysis': {},
             'structure_analysis': {},
             'quality_metrics': {},
-            'error': None
+            'error': error
         }
+    
+    def _analyze_file(self, file_path, file_type_info, file_buffer=None):
+        """Run every content analysis stage on a file of a known type."""
+        analysis = self._analysis_result(file_type_info)
         
         try:
-            from utils.file_handler import FileHandler
-            from utils.metadata_extractor import MetadataExtractor
-            
-            file_handler = FileHandler()
-            metadata_extractor = MetadataExtractor()
-            
-            # Get file type information
-            file_type_info = file_handler.get_file_type(file_path)
-            analysis['file_type_analysis'] = file_type_info
+            file_handler = self.file_handler
+            metadata_extractor = self.metadata_extractor
+            stage = self.stage_timer.stage
             
             # Analyze based on file type
-            if file_type_info['is_text']:
-                content_info = file_handler.read_text_file(file_path)
+            if file_type_info['is_text'] and self._is_large_text(file_path, file_buffer):
+                # Too large to read whole: analyze it chunk by chunk
+                use_mmap = self._should_mmap(file_path, file_buffer)
+                with stage('streamed_text'):
+                    analysis.update(self._analyze_stream(file_path, file_type_info, file_buffer, use_mmap))
+            
+            elif file_type_info['is_text']:
+                with stage('read_text'):
+                    content_info = file_handler.read_text_file(file_path, file_buffer=file_buffer)
                 
                 if content_info['content'] and not content_info['error']:
                     content = content_info['content']
                     
                     # Pattern analysis
-                    analysis['content_patterns'] = self._analyze_patterns(content)
+                    with stage('patterns'):
+                        analysis['content_patterns'] = self._analyze_patterns(content)
                     
                     # Security analysis
-                    analysis['security_analysis'] = self._analyze_security(content, file_type_info)
+                    with stage('security'):
+                        analysis['security_analysis'] = self._analyze_security(content, file_type_info)
                     
                     # Structure analysis
-                    analysis['structure_analysis'] = self._analyze_structure(content, file_type_info)
+                    with stage('structure'):
+                        analysis['structure_analysis'] = self._analyze_structure(content, file_type_info)
                     
                     # Quality metrics
-                    analysis['quality_metrics'] = self._analyze_quality(content, file_type_info)
+                    with stage('quality'):
+                        analysis['quality_metrics'] = self._analyze_quality(content, file_type_info)
                     
                 else:
                     analysis['error'] = content_info.get('error', 'Could not read file content')
@@ -94,7 +261,8 @@ class ContentAnalyzer:
                 analysis['content_patterns'] = {'file_type': 'binary', 'readable': False}
                 
                 # Extract extended metadata for specific binary types
-                extended_metadata = metadata_extractor.extract_extended_metadata(file_path, file_type_info)
+                with stage('extended_metadata'):
+                    extended_metadata = metadata_extractor.extract_extended_metadata(file_path, file_type_info, file_buffer)
                 if extended_metadata:
                     analysis['structure_analysis'] = extended_metadata
         
@@ -103,6 +271,128 @@ class ContentAnalyzer:
         
         return analysis
     
+    def _is_large_text(self, file_path, file_buffer=None):
+        """Check whether a text file exceeds what read_text_file reads whole."""
+        from utils.file_handler import TEXT_READ_MAX_SIZE
+        
+        if file_buffer is not None:
+            file_size = file_buffer.size
+        else:
+            file_size = file_path.stat().st_size
+        return file_size > TEXT_READ_MAX_SIZE
+    
+    def _should_mmap(self, file_path, file_buffer=None):
+        """Check whether a large text file is pattern-scanned memory-mapped."""
+        from utils.file_handler import MMAP_ENCODINGS
+        
+        if not self.mmap_threshold:
+            return False
+        if not (self.pattern_scanner.supports_buffers and self.security_scanner.supports_buffers):
+            return False
+        
+        if file_buffer is not None:
+            file_size = file_buffer.size
+        else:
+            file_size = file_path.stat().st_size
+        if file_size <= self.mmap_threshold:
+            return False
+        
+        encoding = self.file_handler.detect_encoding(file_path, file_buffer=file_buffer) or 'utf-8'
+        return encoding.lower() in MMAP_ENCODINGS
+    
+    def _analyze_stream(self, file_path, file_type_info, file_buffer=None, use_mmap=False):
+        """
+        Analyze a large text file in fixed-size chunks.
+        
+        Pattern and security pattern counts, line, word and paragraph counts
+        and the generic structure and complexity metrics are exact, while
+        memory stays bounded by the chunk size. Checks that need the whole
+        content (JSON parsing, markup and language-specific checks) are
+        skipped.
+        
+        With use_mmap the patterns run over the memory-mapped file as bytes
+        instead of over decoded chunks; only the line and word statistics
+        decode the content, one chunk at a time.
+        
+        Args:
+            file_path (Path): Path to the file
+            file_type_info (dict): File type information
+            file_buffer (FileBuffer): Shared content buffer (optional)
+            use_mmap (bool): Scan patterns over a memory map of the file
+            
+        Returns:
+            dict: Content patterns, security, structure and quality results
+        """
+        statistics = TextStatistics()
+        
+        if use_mmap:
+            with self.file_handler.map_file(file_path) as mapped:
+                pattern_values = self.pattern_scanner.scan_buffer(mapped)
+                security_counts = self.security_scanner.scan_buffer(mapped, count_only=True)
+            
+            for chunk in self.file_handler.iter_text_chunks(file_path, file_buffer=file_buffer):
+                statistics.feed(chunk)
+        else:
+            pattern_scan = self.pattern_scanner.stream()
+            security_scan = self.security_scanner.stream(count_only=True)
+            
+            for chunk in self.file_handler.iter_text_chunks(file_path, file_buffer=file_buffer):
+                statistics.feed(chunk)
+                pattern_scan.feed(chunk)
+                security_scan.feed(chunk)
+            
+            pattern_values = pattern_scan.finish()
+            security_counts = security_scan.finish()
+        
+        statistics.finish()
+        
+        content_patterns = {}
+        for pattern_name, values in pattern_values.items():
+            content_patterns[pattern_name] = {
+                'count': sum(values.values()),
+                'unique_count': len(values),
+                'samples': list(values)[:5]  # First 5 unique matches
+            }
+        
+        security_issues, pattern_matches = self._security_pattern_issues(security_counts)
+        
+        structure = {
+            'line_count': statistics.lines,
+            'character_count': statistics.characters,
+            'word_count': statistics.words,
+            'paragraph_count': statistics.paragraphs,
+            'average_line_length': statistics.average_line_length,
+            'longest_line_length': statistics.longest_line,
+            'indentation_style': statistics.indentation_style,
+            'line_ending_style': statistics.line_ending_style,
+            'streamed': True,
+            'memory_mapped': use_mmap
+        }
+        
+        quality = {
+            'readability_score': 0,
+            'complexity_indicators': {
+                'nested_structures': statistics.max_nesting,
+                'long_lines': statistics.long_lines,
+                'very_long_lines': statistics.very_long_lines,
+                'empty_lines_ratio': statistics.empty_lines / statistics.lines
+            },
+            'consistency_metrics': {},
+            'best_practices': {}
+        }
+        
+        return {
+            'content_patterns': content_patterns,
+            'security_analysis': {
+                'issues_found': len(security_issues),
+                'issues': security_issues,
+                'pattern_matches': pattern_matches,
+                'risk_level': self._calculate_risk_level(security_issues)
+            },
+            'structure_analysis': structure,
+            'quality_metrics': quality
+        }
+    
     def _analyze_patterns(self, content):
         """
         Analyze content for various patterns.
@@ -115,8 +405,7 @@ class ContentAnalyzer:
         """
         results = {}
         
-        for pattern_name, pattern in self.patterns.items():
-            matches = pattern.findall(content)
+        for pattern_name, matches in self.pattern_scanner.findall(content).items():
             results[pattern_name] = {
                 'count': len(matches),
                 'unique_count': len(set(matches)) if matches else 0,
@@ -136,20 +425,10 @@ class ContentAnalyzer:
         Returns:
             dict: Security analysis results
         """
-        security_issues = []
-        pattern_matches = {}
-        
         # Check security patterns
-        for pattern_name, pattern in self.security_patterns.items():
-            matches = pattern.findall(content)
-            if matches:
-                pattern_matches[pattern_name] = len(matches)
-                security_issues.append({
-                    'type': pattern_name,
-                    'severity': self._get_severity(pattern_name),
-                    'count': len(matches),
-                    'description': self._get_security_description(pattern_name)
-                })
+        security_issues, pattern_matches = self._security_pattern_issues(
+            self.security_scanner.count(content)
+        )
         
         # File-type specific security checks
         if file_type_info['category'] == 'code':
@@ -170,6 +449,31 @@ class ContentAnalyzer:
             'risk_level': self._calculate_risk_level(security_issues)
         }
     
+    def _security_pattern_issues(self, match_counts):
+        """
+        Turn security pattern match counts into issues.
+        
+        Args:
+            match_counts (dict): Security pattern name to number of matches
+            
+        Returns:
+            tuple: (list of issues, dict of pattern name to non-zero count)
+        """
+        security_issues = []
+        pattern_matches = {}
+        
+        for pattern_name, match_count in match_counts.items():
+            if match_count:
+                pattern_matches[pattern_name] = match_count
+                security_issues.append({
+                    'type': pattern_name,
+                    'severity': self._get_severity(pattern_name),
+                    'count': match_count,
+                    'description': self._get_security_description(pattern_name)
+                })
+        
+        return security_issues, pattern_matches
+    
     def _analyze_structure(self, content, file_type_info):
         """
         Analyze content structure.
@@ -345,16 +649,17 @@ class ContentAnalyzer:
     
     def _count_nested_structures(self, content):
         """Count nested structures like brackets, braces, etc."""
-        nesting_chars = {'(': ')', '[': ']', '{': '}'}
         max_depth = 0
         current_depth = 0
         
-        for char in content:
-            if char in nesting_chars.keys():
+        # Only the brackets are walked, not every character
+        for char in _NON_BRACKETS.sub('', content):
+            if char in '([{':
                 current_depth += 1
-                max_depth = max(max_depth, current_depth)
-            elif char in nesting_chars.values():
-                current_depth = max(0, current_depth - 1)
+                if current_depth > max_depth:
+                    max_depth = current_depth
+            elif current_depth:
+                current_depth -= 1
         
         return max_depth
     
@@ -0,0 +1,204 @@
+"""
+Content-addressed duplicate file detection.
+"""
+
+import hashlib
+import threading
+from collections import defaultdict
+
+
+# Bytes hashed at each end of a file by the partial-hash prefilter
+PARTIAL_HASH_SIZE = 64 * 1024
+
+# Read size when fully hashing duplicate candidates
+FULL_HASH_BUFFER_SIZE = 1024 * 1024
+
+
+# Read buffers are reused by each hashing thread
+_buffer_local = threading.local()
+
+
+class DuplicateFinder:
+    """
+    Finds files with identical content.
+    
+    Files are recorded with their size while the tree is scanned, then
+    narrowed down in three stages so that most files are never read:
+    
+    - hardlinks: paths of the same inode are one file, hashed and counted
+      once, and listed separately since deleting one of them frees nothing;
+    
+    - size: only files sharing their size with another file can be duplicates;
+    - partial hash: candidates are grouped by a hash of their first and last
+      PARTIAL_HASH_SIZE bytes, which separates almost all non-duplicates;
+    - full hash: files still sharing a group are hashed completely. Files no
+      larger than both partial blocks were already hashed whole.
+    
+    Hashing uses BLAKE2b and runs in a thread pool, as both reading and
+    hashing release the GIL.
+    """
+    
+    def __init__(self, workers=8):
+        """
+        Initialize the DuplicateFinder.
+        
+        Args:
+            workers (int): Threads reading and hashing files
+        """
+        self.workers = max(1, workers)
+        self._paths_by_size = defaultdict(list)
+        self._links = {}  # (device, inode) -> (size, display paths)
+        self.errors = []
+    
+    def add(self, file_path, size, display_path=None, file_id=None):
+        """
+        Record a scanned file.
+        
+        Args:
+            file_path (str): Absolute path of the file
+            size (int): File size in bytes
+            display_path (str): Path shown in the report (optional)
+            file_id (tuple): (st_dev, st_ino) of a file with several links
+                (optional); paths with the same id are one file
+        """
+        # Empty files are identical but reclaim nothing
+        if size <= 0:
+            return
+        
+        display_path = display_path or str(file_path)
+        if file_id is not None:
+            links = self._links.get(file_id)
+            if links is not None:
+                links[1].append(display_path)
+                return
+            self._links[file_id] = (size, [display_path])
+        
+        self._paths_by_size[size].append((str(file_path), display_path))
+    
+    def find(self):
+        """
+        Group the recorded files by content.
+        
+        Returns:
+            dict: Duplicate groups (largest reclaimable space first), number of
+                redundant copies, reclaimable bytes and files read per stage
+        """
+        same_size = [
+            (size, file_entry)
+            for size, files in self._paths_by_size.items() if len(files) > 1
+            for file_entry in files
+        ]
+        
+        from concurrent.futures import ThreadPoolExecutor
+        
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            same_ends = self._group_by_hash(executor, same_size, self._partial_hash)
+            
+            # Files no larger than both partial blocks were already hashed whole
+            groups = [
+                self._group(size, digest, files)
+                for (size, digest), files in same_ends.items()
+                if len(files) > 1 and size <= 2 * PARTIAL_HASH_SIZE
+            ]
+            
+            candidates = [
+                (size, file_entry)
+                for (size, _), files in same_ends.items()
+                if len(files) > 1 and size > 2 * PARTIAL_HASH_SIZE
+                for file_entry in files
+            ]
+            same_content = self._group_by_hash(executor, candidates, self._full_hash)
+        
+        groups.extend(
+            self._group(size, digest, files)
+            for (size, digest), files in same_content.items() if len(files) > 1
+        )
+        groups.sort(key=lambda group: group['reclaimable_bytes'], reverse=True)
+        
+        hardlinks = sorted(
+            ({'size': size, 'count': len(paths), 'paths': sorted(paths)}
+             for size, paths in self._links.values() if len(paths) > 1),
+            key=lambda link: link['size'],
+            reverse=True
+        )
+        
+        return {
+            'groups': groups,
+            'group_count': len(groups),
+            'duplicate_files': sum(group['count'] - 1 for group in groups),
+            'reclaimable_bytes': sum(group['reclaimable_bytes'] for group in groups),
+            'hardlinks': hardlinks,
+            'hardlinked_paths': sum(link['count'] - 1 for link in hardlinks),
+            'files_partially_hashed': len(same_size),
+            'files_fully_hashed': len(candidates)
+        }
+    
+    def _group_by_hash(self, executor, files, hash_function):
+        """
+        Hash files in the pool and group them by size and digest.
+        
+        Args:
+            executor (ThreadPoolExecutor): Pool running the hash function
+            files (list): (size, (file path, display path)) tuples
+            hash_function (callable): Takes a path and returns a hex digest
+        
+        Returns:
+            dict: (size, digest) to list of (file path, display path); files
+                that could not be read are left out and recorded in errors
+        """
+        def hash_file(file_path):
+            try:
+                return hash_function(file_path)
+            except OSError as e:
+                self.errors.append({'path': file_path, 'message': str(e)})
+                return None
+        
+        digests = executor.map(hash_file, [file_entry[0] for _, file_entry in files])
+        grouped = defaultdict(list)
+        
+        for (size, file_entry), digest in zip(files, digests):
+            if digest is not None:
+                grouped[(size, digest)].append(file_entry)
+        
+        return grouped
+    
+    def _group(self, size, digest, files):
+        """Build the report entry of one set of identical files."""
+        return {
+            'size': size,
+            'blake2b': digest,
+            'count': len(files),
+            'reclaimable_bytes': size * (len(files) - 1),
+            'paths': sorted(display_path for _, display_path in files)
+        }
+    
+    def _partial_hash(self, file_path):
+        """Hash the first and last PARTIAL_HASH_SIZE bytes of a file."""
+        hasher = hashlib.blake2b()
+        
+        with open(file_path, 'rb') as f:
+            head = f.read(PARTIAL_HASH_SIZE)
+            hasher.update(head)
+            if len(head) == PARTIAL_HASH_SIZE:
+                # Seek so that the tail block never overlaps the head block
+                f.seek(max(PARTIAL_HASH_SIZE, f.seek(0, 2) - PARTIAL_HASH_SIZE))
+                hasher.update(f.read(PARTIAL_HASH_SIZE))
+        
+        return hasher.hexdigest()
+    
+    def _full_hash(self, file_path):
+        """Hash a whole file, reading into the thread's reused buffer."""
+        buffer = getattr(_buffer_local, 'buffer', None)
+        if buffer is None:
+            buffer = _buffer_local.buffer = bytearray(FULL_HASH_BUFFER_SIZE)
+        view = memoryview(buffer)
+        hasher = hashlib.blake2b()
+        
+        with open(file_path, 'rb', buffering=0) as f:
+            while True:
+                read = f.readinto(buffer)
+                if not read:
+                    break
+                hasher.update(view[:read])
+        
+        return hasher.hexdigest()
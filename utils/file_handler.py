@@ -2,35 +2,197 @@
 File handling utilities for file and directory analysis.
 """
 
+import codecs
+import io
 import os
+import mmap
 import mimetypes
+import threading
 from pathlib import Path
-import chardet
-import magic
+
+from utils.stage_timing import StageTimer
+
+
+# Files up to this size are read into memory once and shared by every stage
+BUFFER_MAX_SIZE = 10 * 1024 * 1024  # 10MB, same as the checksum limit
+
+# Bytes handed to libmagic for files too large to buffer; covers libmagic's
+# default bytes_max (7MB), so detection matches magic.from_file
+MAGIC_SAMPLE_SIZE = 8 * 1024 * 1024
+
+# Text files up to this size are read whole; larger ones are analyzed in chunks
+TEXT_READ_MAX_SIZE = 1024 * 1024  # 1MB
+
+# Characters decoded per chunk when streaming a large text file
+TEXT_CHUNK_SIZE = 1024 * 1024
+
+# Text files above this size are pattern-scanned as memory-mapped bytes
+MMAP_THRESHOLD = 256 * 1024 * 1024  # 256MB
+
+# Encodings whose bytes can be scanned directly with ASCII bytes patterns
+MMAP_ENCODINGS = {'ascii', 'utf-8', 'utf-8-sig'}
+
+
+# Byte order marks, longest first, with the encoding names chardet reports for them
+ENCODING_BOMS = (
+    (codecs.BOM_UTF32_LE, 'UTF-32'),
+    (codecs.BOM_UTF32_BE, 'UTF-32'),
+    (codecs.BOM_UTF8, 'UTF-8-SIG'),
+    (codecs.BOM_UTF16_LE, 'UTF-16'),
+    (codecs.BOM_UTF16_BE, 'UTF-16')
+)
+
+# Encoding detection tiers, in the order they are tried; the counts per tier
+# in the scan info show how often chardet was avoided
+ENCODING_DETECTION_TIERS = ('bom', 'ascii', 'utf8', 'chardet')
+
+# libmagic cookies are not thread-safe, so each thread keeps its own
+_magic_local = threading.local()
+
+
+def _get_mime_magic():
+    """
+    Get the MIME-detecting magic instance of the current thread.
+    
+    The instance is created on first use and then reused for every file
+    analyzed by the thread; worker processes each build their own.
+    
+    Returns:
+        magic.Magic: Magic instance with mime=True
+    """
+    mime = getattr(_magic_local, 'mime', None)
+    if mime is None:
+        # Imported on first use; loading libmagic is slow for a short run
+        import magic
+        mime = magic.Magic(mime=True)
+        _magic_local.mime = mime
+    return mime
+
+
+class FileBuffer:
+    """
+    Bytes of a single file, read from disk at most once.
+    
+    Metadata extraction, type detection, encoding detection and content
+    decoding all take their input from the same buffer instead of reopening
+    the file. Files larger than max_size are not held in memory; only a
+    leading sample is cached and consumers stream the rest from disk.
+    """
+    
+    def __init__(self, file_path, file_stats=None, max_size=BUFFER_MAX_SIZE):
+        """
+        Initialize the FileBuffer.
+        
+        Args:
+            file_path (Path): Path to the file
+            file_stats (os.stat_result): Already-known stat result (optional)
+            max_size (int): Largest file size to hold in memory
+        """
+        self.path = Path(file_path)
+        self.max_size = max_size
+        self._stats = file_stats
+        self._data = None
+        self._head = b''
+    
+    @property
+    def stats(self):
+        """os.stat_result of the file, fetched on first use."""
+        if self._stats is None:
+            self._stats = self.path.stat()
+        return self._stats
+    
+    @property
+    def size(self):
+        """File size in bytes."""
+        return self.stats.st_size
+    
+    @property
+    def fully_buffered(self):
+        """True if the whole file fits in the buffer."""
+        return self.size <= self.max_size
+    
+    def read(self):
+        """
+        Return the whole file content.
+        
+        Returns:
+            bytes: File content, or None if the file is larger than max_size
+        """
+        if not self.fully_buffered:
+            return None
+        
+        if self._data is None:
+            with open(self.path, 'rb') as f:
+                self._data = f.read()
+        return self._data
+    
+    def head(self, size):
+        """
+        Return the first bytes of the file.
+        
+        Args:
+            size (int): Number of bytes wanted
+            
+        Returns:
+            bytes: Up to size leading bytes of the file
+        """
+        if self.fully_buffered:
+            return self.read()[:size]
+        
+        if len(self._head) < size:
+            with open(self.path, 'rb') as f:
+                self._head = f.read(size)
+        return self._head[:size]
+    
+    def open(self):
+        """
+        Open the content as a binary file object.
+        
+        Returns:
+            file object: In-memory stream when buffered, otherwise the file on disk
+        """
+        data = self.read()
+        if data is not None:
+            return io.BytesIO(data)
+        return open(self.path, 'rb')
 
 
 class FileHandler:
     """Handles file operations and type detection."""
     
-    def __init__(self):
-        """Initialize the FileHandler."""
-        # Initialize mimetypes
-        mimetypes.init()
+    def __init__(self, stage_timer=None):
+        """
+        Initialize the FileHandler.
         
-        # Try to use python-magic for better file type detection
-        self.use_magic = True
-        try:
-            # Test if magic is available and working
-            magic.Magic()
-        except:
-            self.use_magic = False
+        Args:
+            stage_timer (StageTimer): Timer of the analysis stages, shared
+                with the analyzers using this handler (optional)
+        """
+        self.stage_timer = stage_timer or StageTimer()
+        self.encoding_stats = dict.fromkeys(ENCODING_DETECTION_TIERS, 0)
+        
+        # Whether python-magic works is only checked when the first file is typed
+        self._use_magic = None
+    
+    @property
+    def use_magic(self):
+        """True if python-magic is available and working, for better file type detection."""
+        if self._use_magic is None:
+            try:
+                # Test if magic is available and working; the instance is kept
+                _get_mime_magic()
+                self._use_magic = True
+            except Exception:
+                self._use_magic = False
+        return self._use_magic
     
-    def get_file_type(self, file_path):
+    def get_file_type(self, file_path, file_buffer=None):
         """
         Determine file type using multiple methods.
         
         Args:
             file_path (Path): Path to the file
+            file_buffer (FileBuffer): Shared content buffer (optional)
             
         Returns:
             dict: File type information
@@ -45,15 +207,21 @@ class FileHandler:
             'is_binary': False
         }
         
-        # Get MIME type using mimetypes
+        # Get MIME type using mimetypes (the system MIME databases are read
+        # on the first call, once per process)
         mime_type, _ = mimetypes.guess_type(str(file_path))
         result['mime_type'] = mime_type
         
         # Use python-magic if available for better detection
-        if self.use_magic and file_path.exists():
+        if self.use_magic and (file_buffer is not None or file_path.exists()):
             try:
-                mime = magic.Magic(mime=True)
-                magic_mime = mime.from_file(str(file_path))
+                mime = _get_mime_magic()
+                with self.stage_timer.stage('magic'):
+                    if file_buffer is not None and file_buffer.size:
+                        magic_mime = mime.from_buffer(file_buffer.head(MAGIC_SAMPLE_SIZE))
+                    else:
+                        # Empty files are reported as inode/x-empty only by from_file
+                        magic_mime = mime.from_file(str(file_path))
                 if magic_mime:
                     result['mime_type'] = magic_mime
             except:
@@ -159,34 +327,109 @@ class FileHandler:
         
         return 'unknown'
     
-    def detect_encoding(self, file_path, sample_size=8192):
+    def detect_encoding(self, file_path, sample_size=8192, file_buffer=None):
         """
         Detect file encoding for text files.
         
+        Cheap checks run before chardet: a byte order mark, then plain ASCII,
+        then a strict UTF-8 decode. Samples that decode as UTF-8 are reported
+        as UTF-8, which is correct for them but may differ from chardet's
+        guess (chardet reports some UTF-8 with 4-byte sequences, such as
+        emoji, as Windows-1252 or not at all), however few non-ASCII
+        characters they hold. chardet is left the rest: legacy code pages
+        and ASCII with escape sequences or NUL bytes.
+        
         Args:
             file_path (Path): Path to the file
             sample_size (int): Size of sample to read for detection
+            file_buffer (FileBuffer): Shared content buffer (optional)
             
         Returns:
             str: Detected encoding or None
         """
         try:
-            with open(file_path, 'rb') as f:
-                sample = f.read(sample_size)
-                if sample:
-                    result = chardet.detect(sample)
-                    return result.get('encoding')
+            if file_buffer is not None:
+                sample = file_buffer.head(sample_size)
+            else:
+                with open(file_path, 'rb') as f:
+                    sample = f.read(sample_size)
+            if sample:
+                with self.stage_timer.stage('encoding'):
+                    tier, encoding = self._detect_sample_encoding(sample, len(sample) < sample_size)
+                self.encoding_stats[tier] += 1
+                return encoding
         except Exception:
             pass
         return None
     
-    def read_text_file(self, file_path, max_size=1024*1024):  # 1MB max
+    def _detect_sample_encoding(self, sample, whole=False):
+        """
+        Detect the encoding of a sample, trying the cheapest checks first.
+        
+        The tier says which check decided; it is a cost breakdown, not a
+        statement that chardet would have agreed. Samples without NUL bytes
+        that are valid UTF-8 with non-ASCII characters are always utf-8,
+        however few those characters are; chardet may guess a legacy code
+        page for such a sample, but is not asked.
+        
+        Args:
+            sample (bytes): Leading bytes of the file
+            whole (bool): Whether the sample is the whole file
+            
+        Returns:
+            tuple: (detection tier, encoding or None)
+        """
+        for bom, encoding in ENCODING_BOMS:
+            if sample.startswith(bom):
+                return 'bom', encoding
+        
+        # chardet looks for UTF-16/32 in samples with NUL bytes and for
+        # ISO-2022/HZ in ASCII samples with escape sequences
+        if b'\x00' not in sample:
+            if sample.isascii():
+                if b'\x1b' not in sample and b'~{' not in sample:
+                    return 'ascii', 'ascii'
+            else:
+                try:
+                    # A cut sample may end inside a character, a whole file may not
+                    codecs.getincrementaldecoder('utf-8')().decode(sample, final=whole)
+                    return 'utf8', 'utf-8'
+                except UnicodeDecodeError:
+                    pass
+        
+        # Imported on first use; most scans never need it
+        import chardet
+        return 'chardet', chardet.detect(sample).get('encoding')
+    
+    def take_encoding_stats(self):
+        """
+        Return the encoding detections per tier gathered so far and reset them.
+        
+        Returns:
+            dict: Detections per tier
+        """
+        encoding_stats = self.encoding_stats
+        self.encoding_stats = dict.fromkeys(ENCODING_DETECTION_TIERS, 0)
+        return encoding_stats
+    
+    def add_encoding_stats(self, encoding_stats):
+        """
+        Add encoding detection counts gathered elsewhere, e.g. in a worker process.
+        
+        Args:
+            encoding_stats (dict): Counts as returned by take_encoding_stats()
+        """
+        for key, value in encoding_stats.items():
+            self.encoding_stats[key] += value
+    
+    def read_text_file(self, file_path, max_size=TEXT_READ_MAX_SIZE, file_buffer=None):
         """
         Safely read text file content.
         
         Args:
             file_path (Path): Path to the file
             max_size (int): Maximum file size to read
+            file_buffer (FileBuffer): Shared content buffer (optional)
             
         Returns:
             dict: Content information
@@ -205,20 +448,22 @@ class FileHandler:
         
         try:
             # Check file size
-            file_size = file_path.stat().st_size
+            if file_buffer is not None:
+                file_size = file_buffer.size
+            else:
+                file_size = file_path.stat().st_size
             if file_size > max_size:
                 result['truncated'] = True
                 result['error'] = f"File too large ({file_size} bytes), content truncated"
             
             # Detect encoding
-            encoding = self.detect_encoding(file_path)
+            encoding = self.detect_encoding(file_path, file_buffer=file_buffer)
             if not encoding:
                 encoding = 'utf-8'
             
             result['encoding'] = encoding
             
-            # Read content
-            with open(file_path, 'r', encoding=encoding, errors='replace') as f:
+            with self._open_text(file_path, encoding, file_buffer) as f:
                 if result['truncated']:
                     content = f.read(max_size)
                 else:
@@ -237,6 +482,64 @@ class FileHandler:
         
         return result
     
+    def iter_text_chunks(self, file_path, chunk_size=TEXT_CHUNK_SIZE, file_buffer=None):
+        """
+        Decode a text file chunk by chunk.
+        
+        Only one chunk is held at a time, so files of any size can be
+        processed in bounded memory. Decoding is the same as in
+        read_text_file (detected encoding, invalid bytes replaced).
+        
+        Args:
+            file_path (Path): Path to the file
+            chunk_size (int): Characters per chunk
+            file_buffer (FileBuffer): Shared content buffer (optional)
+            
+        Yields:
+            str: Consecutive chunks of the decoded content
+        """
+        encoding = self.detect_encoding(file_path, file_buffer=file_buffer) or 'utf-8'
+        
+        with self._open_text(file_path, encoding, file_buffer) as f:
+            while True:
+                chunk = f.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+    
+    def _open_text(self, file_path, encoding, file_buffer=None):
+        """
+        Open a file for decoding.
+        
+        Args:
+            file_path (Path): Path to the file
+            encoding (str): Text encoding
+            file_buffer (FileBuffer): Shared content buffer (optional)
+            
+        Returns:
+            file object: Text stream over the shared buffer when the whole file
+                is in it, otherwise over the file on disk
+        """
+        if file_buffer is not None and file_buffer.fully_buffered:
+            return io.TextIOWrapper(io.BytesIO(file_buffer.read()), encoding=encoding, errors='replace')
+        return open(file_path, 'r', encoding=encoding, errors='replace')
+    
+    def map_file(self, file_path):
+        """
+        Memory-map a file read-only.
+        
+        The map is served from the page cache without copying the content
+        into the process; close it (or use it as a context manager) when done.
+        
+        Args:
+            file_path (Path): Path to the file
+            
+        Returns:
+            mmap.mmap: Read-only map of the whole file
+        """
+        with open(file_path, 'rb') as f:
+            return mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    
     def is_readable(self, file_path):
         """
         Check if file is readable.
@@ -0,0 +1,326 @@
+"""
+Compact in-memory representation of per-file analysis results.
+"""
+
+import os
+import sys
+from collections.abc import Mapping
+from pathlib import Path
+
+from utils.timestamps import format_metadata_timestamps
+
+
+# Keys of the per-file entries, in the order the analyzers produce them
+METADATA_KEYS = (
+    'name', 'stem', 'suffix', 'size', 'created', 'modified', 'accessed',
+    'permissions', 'owner', 'checksums', 'error'
+)
+CONTENT_KEYS = (
+    'file_type_analysis', 'content_patterns', 'security_analysis',
+    'structure_analysis', 'quality_metrics', 'error'
+)
+RECORD_KEYS = ('path', 'absolute_path', 'metadata', 'content_analysis')
+
+
+def json_default(value):
+    """
+    Serialize values json cannot handle natively.
+    
+    Args:
+        value: Object json.dump could not serialize
+    
+    Returns:
+        dict or str: The report entry of a FileRecord, otherwise str(value)
+    """
+    if isinstance(value, FileRecord):
+        return export_entry(value)
+    return str(value)
+
+
+def export_entry(entry):
+    """
+    Get a per-file analysis entry as written to reports.
+    
+    Metadata timestamps are kept as raw nanoseconds while scanning and
+    formatted as ISO strings only here.
+    
+    Args:
+        entry (dict or FileRecord): Per-file analysis entry
+    
+    Returns:
+        dict: The entry with ISO timestamps
+    """
+    if isinstance(entry, FileRecord):
+        entry = entry.to_dict()
+    
+    metadata = entry.get('metadata')
+    if not metadata:
+        return entry
+    
+    formatted = format_metadata_timestamps(metadata)
+    if formatted is metadata:
+        return entry
+    return {**entry, 'metadata': formatted}
+
+
+class RecordTable:
+    """
+    Values shared by the FileRecords of one scan.
+    
+    Holds the directory table that record paths index into, and interns
+    strings and small dicts that repeat across files (file type analyses,
+    permissions, owners, empty results), so each distinct value is stored
+    once however many files carry it.
+    """
+    
+    def __init__(self, root):
+        """
+        Initialize the RecordTable.
+        
+        Args:
+            root (Path): Scan root that record paths are relative to
+        """
+        self.root = str(root)
+        self.directories = []
+        self._directory_index = {}
+        self._shared = {}
+    
+    def directory_index(self, directory):
+        """
+        Get the index of a relative directory, adding it if needed.
+        
+        Args:
+            directory (str): Directory relative to the root ('' for the root)
+        
+        Returns:
+            int: Index into self.directories
+        """
+        index = self._directory_index.get(directory)
+        if index is None:
+            index = len(self.directories)
+            self.directories.append(directory)
+            self._directory_index[directory] = index
+        return index
+    
+    def share(self, value):
+        """
+        Get the shared instance of a flat value.
+        
+        Strings are interned; dicts whose values are all scalars or empty
+        containers are replaced by one shared equal dict. Other values are
+        returned unchanged.
+        
+        Args:
+            value: Value to share
+        
+        Returns:
+            The shared equal value, which must not be modified
+        """
+        if isinstance(value, str):
+            return sys.intern(value)
+        
+        if not isinstance(value, dict):
+            return value
+        
+        key = _freeze(value)
+        if key is None:
+            return value
+        
+        shared = self._shared.get(key)
+        if shared is None:
+            shared = {name: self.share(item) for name, item in value.items()}
+            self._shared[key] = shared
+        return shared
+    
+    def share_empty(self, value):
+        """Share a value only if it is empty, e.g. {} results of skipped stages."""
+        return value if value else self.share(value)
+
+
+class FileRecord(Mapping):
+    """
+    Per-file analysis entry stored compactly.
+    
+    The record keeps the file's directory as an index into the scan's
+    RecordTable, derives name, stem, suffix and the absolute path instead of
+    storing them, holds metadata and content analysis as value tuples rather
+    than dicts, and shares repeated values through the table. It reads like
+    the entry dict it was built from (record['metadata']['size']); to_dict()
+    rebuilds that dict and export_entry() its report form.
+    Values must be treated as read-only.
+    
+    Sub-dicts are kept as they are, one per file, except where sharing pays:
+    permissions, owner, file_type_analysis and security_analysis, and the
+    per-pattern entries of content_patterns, are shared when they are flat
+    (scalar or empty values); checksums, structure_analysis and
+    quality_metrics only when empty. Non-flat values (pattern samples,
+    security issues, EXIF data) stay full per-file dicts.
+    """
+    
+    __slots__ = ('_table', '_directory', '_name', '_metadata', '_content', '_entry')
+    
+    def __init__(self, table, entry):
+        """
+        Initialize the FileRecord.
+        
+        Entries whose shape the compact form cannot reproduce exactly, such
+        as unexpected keys or a name, stem, suffix or absolute path other
+        than the one derived from the path, are kept as they are.
+        
+        Args:
+            table (RecordTable): Shared table of the scan
+            entry (dict): Per-file analysis entry
+        """
+        self._table = table
+        self._entry = None
+        
+        try:
+            self._compact(entry)
+        except (KeyError, TypeError, ValueError):
+            self._entry = entry
+    
+    def _compact(self, entry):
+        """Split an entry into the record's slots."""
+        table = self._table
+        
+        if tuple(entry) != RECORD_KEYS:
+            raise ValueError("Unexpected entry keys")
+        metadata = entry['metadata']
+        content = entry['content_analysis']
+        if tuple(metadata) != METADATA_KEYS or tuple(content) != CONTENT_KEYS:
+            raise ValueError("Unexpected metadata or content keys")
+        
+        # Everything else is stored or shared as an equal value, so checking
+        # what is derived keeps to_dict() equal to the entry
+        directory, name = os.path.split(entry['path'])
+        name_path = Path(name)
+        if (metadata['name'], metadata['stem'], metadata['suffix']) != (name, name_path.stem, name_path.suffix.lower()):
+            raise ValueError("Name, stem or suffix not derived from the path")
+        if entry['absolute_path'] != os.path.join(table.root, entry['path']):
+            raise ValueError("Absolute path not under the scan root")
+        
+        self._directory = table.directory_index(directory)
+        self._name = name
+        
+        # Per-file values (timestamps, checksums, text structure) are kept
+        # as they are; only values that repeat across files are shared
+        self._metadata = (
+            metadata['size'],
+            metadata['created'],
+            metadata['modified'],
+            metadata['accessed'],
+            table.share(metadata['permissions']),
+            table.share(metadata['owner']),
+            table.share_empty(metadata['checksums']),
+            metadata['error']
+        )
+        self._content = (
+            table.share(content['file_type_analysis']),
+            _share_patterns(table, content['content_patterns']),
+            table.share(content['security_analysis']),
+            table.share_empty(content['structure_analysis']),
+            table.share_empty(content['quality_metrics']),
+            content['error']
+        )
+    
+    @property
+    def path(self):
+        """Path relative to the scan root."""
+        if self._entry is not None:
+            return self._entry['path']
+        directory = self._table.directories[self._directory]
+        return os.path.join(directory, self._name) if directory else self._name
+    
+    @property
+    def absolute_path(self):
+        """Absolute path of the file."""
+        if self._entry is not None:
+            return self._entry['absolute_path']
+        return os.path.join(self._table.root, self.path)
+    
+    def metadata(self):
+        """Build the metadata dict."""
+        if self._entry is not None:
+            return self._entry['metadata']
+        
+        name_path = Path(self._name)
+        # name, stem and suffix are derived instead of stored
+        derived = (self._name, name_path.stem, name_path.suffix.lower())
+        return dict(zip(METADATA_KEYS, derived + self._metadata))
+    
+    def content_analysis(self):
+        """Build the content analysis dict."""
+        if self._entry is not None:
+            return self._entry['content_analysis']
+        return dict(zip(CONTENT_KEYS, self._content))
+    
+    def to_dict(self):
+        """
+        Rebuild the per-file analysis entry.
+        
+        Returns:
+            dict: Entry equal to the one the record was built from
+        """
+        if self._entry is not None:
+            return self._entry
+        
+        return {
+            'path': self.path,
+            'absolute_path': self.absolute_path,
+            'metadata': self.metadata(),
+            'content_analysis': self.content_analysis()
+        }
+    
+    def __getitem__(self, key):
+        """Get one part of the entry, built on demand."""
+        if key == 'path':
+            return self.path
+        elif key == 'absolute_path':
+            return self.absolute_path
+        elif key == 'metadata':
+            return self.metadata()
+        elif key == 'content_analysis':
+            return self.content_analysis()
+        raise KeyError(key)
+    
+    def __iter__(self):
+        """Iterate over the entry keys."""
+        return iter(RECORD_KEYS)
+    
+    def __len__(self):
+        """Number of entry keys."""
+        return len(RECORD_KEYS)
+    
+    def __repr__(self):
+        """Show the record's path."""
+        return f"FileRecord({self.path!r})"
+
+
+def _share_patterns(table, content_patterns):
+    """Share the per-pattern entries of content patterns, most of which are empty."""
+    if not isinstance(content_patterns, dict):
+        return content_patterns
+    
+    shared = table.share(content_patterns)
+    if shared is not content_patterns:
+        return shared
+    return {name: table.share(entry) for name, entry in content_patterns.items()}
+
+
+def _freeze(value):
+    """
+    Build a hashable key for a flat dict.
+    
+    Returns:
+        tuple: Key, or None if a value is neither a scalar nor an empty container
+    """
+    items = []
+    for name, item in value.items():
+        if item is None or isinstance(item, (str, int, float)):
+            # bool is an int; keep True and 1 apart
+            items.append((name, type(item), item))
+        elif isinstance(item, (list, dict, tuple)) and not item:
+            items.append((name, type(item), None))
+        else:
+            return None
+    return tuple(items)
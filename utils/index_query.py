@@ -0,0 +1,262 @@
+"""
+Queries over saved SQLite scan reports.
+"""
+
+import csv
+import json
+import re
+import sqlite3
+from pathlib import Path
+
+from utils.sqlite_report import SQLITE_REPORT_VERSION
+from utils.timestamps import TIMESTAMP_FIELDS, format_timestamp, timestamp_ns
+
+
+# Columns listed when no fields are requested
+DEFAULT_QUERY_FIELDS = ('path', 'size', 'category', 'risk_level', 'modified')
+
+QUERY_OUTPUT_FORMATS = ('csv', 'ndjson')
+
+# field, operator, value; '~' matches a glob pattern such as 'src/*.py'
+_CONDITION = re.compile(r'^\s*(\w+)\s*(!=|<=|>=|=|<|>|~)\s*(.*?)\s*$')
+
+_OPERATORS = {'=': '=', '!=': '!=', '<': '<', '<=': '<=', '>': '>', '>=': '>=', '~': 'GLOB'}
+
+_BOOLEAN_VALUES = {'true': 1, 'yes': 1, 'false': 0, 'no': 0}
+
+
+class IndexQuery:
+    """
+    Filters, top-N and group-by queries over a SQLite scan report.
+    
+    Field names are the file columns written by SQLiteReportWriter, which
+    follow the report fields (path, size, extension, category, mime_type,
+    created, modified, security_issues, risk_level, ...). Queries are
+    translated to SQL over the report indexes and rows are yielded from the
+    cursor one at a time, so result size does not affect memory.
+    """
+    
+    def __init__(self, database):
+        """
+        Open a SQLite scan report read-only.
+        
+        Args:
+            database (str): Report path, as written with --format sqlite
+        """
+        database_path = Path(database)
+        if not database_path.is_file():
+            raise FileNotFoundError(f"Report not found: {database}")
+        
+        self.connection = sqlite3.connect(f"{database_path.resolve().as_uri()}?mode=ro", uri=True)
+        
+        try:
+            version = self.connection.execute('PRAGMA user_version').fetchone()[0]
+            columns = self.connection.execute('PRAGMA table_info(files)').fetchall()
+        except sqlite3.DatabaseError:
+            version, columns = None, []
+        if version != SQLITE_REPORT_VERSION or not columns:
+            self.connection.close()
+            raise ValueError(f"Not a file analyzer SQLite report: {database}")
+        
+        # name -> declared type
+        self.fields = {column[1]: column[2] for column in columns}
+    
+    def close(self):
+        """Close the report."""
+        self.connection.close()
+    
+    def files(self, fields=None, where=None, patterns=None, order_by=None,
+              descending=False, limit=None, group_by=None):
+        """
+        Query matching files.
+        
+        Args:
+            fields (list): File fields to return (DEFAULT_QUERY_FIELDS if omitted)
+            where (list): Conditions like 'size>1048576', 'risk_level=high',
+                'modified>=2024-01-01' or 'path~src/*', all of which must hold
+            patterns (list): Content pattern names, such as 'api_keys', the
+                files must have matches of; their match counts are returned
+                as extra fields
+            order_by (str): Field to sort by (optional)
+            descending (bool): Sort in descending order
+            limit (int): Maximum number of files, or of files per group
+                value with group_by (optional)
+            group_by (str): Field to return the first files of each value
+                of, such as the largest files per category; requires limit
+                (summarize() counts files per value instead)
+        
+        Returns:
+            tuple: (column names, iterator of row tuples)
+        """
+        fields = list(fields or DEFAULT_QUERY_FIELDS)
+        patterns = list(patterns or [])
+        for field in fields + [order_by, group_by]:
+            if field is not None:
+                self._check_field(field)
+        
+        joins, pattern_columns, params = self._pattern_joins(patterns)
+        conditions, condition_params = self._conditions(where)
+        params += condition_params
+        
+        columns = [f'files.{field}' for field in fields] + pattern_columns
+        names = fields + patterns
+        order = f"files.{order_by} {'DESC' if descending else 'ASC'}" if order_by else 'files.id'
+        from_clause = f"FROM files {joins}{self._where_clause(conditions)}"
+        
+        if group_by:
+            if not limit:
+                raise ValueError("Grouped file queries need a limit of files per group")
+            
+            # Rank files inside each group value and keep the first of each
+            sql = (
+                f"SELECT {', '.join(f'q{index}' for index in range(len(columns)))} FROM ("
+                f"SELECT {', '.join(f'{column} AS q{index}' for index, column in enumerate(columns))}, "
+                f"files.{group_by} AS query_group, "
+                f"ROW_NUMBER() OVER (PARTITION BY files.{group_by} ORDER BY {order}) AS query_rank "
+                f"{from_clause}) WHERE query_rank <= ? ORDER BY query_group, query_rank"
+            )
+            params.append(limit)
+        else:
+            sql = f"SELECT {', '.join(columns)} {from_clause} ORDER BY {order}"
+            if limit:
+                sql += ' LIMIT ?'
+                params.append(limit)
+        
+        return names, self._rows(sql, params, names)
+    
+    def summarize(self, group_by, where=None, patterns=None, limit=None):
+        """
+        Count matching files and their total size per value of a field.
+        
+        Args:
+            group_by (str): Field to group by
+            where (list): Conditions, as for files()
+            patterns (list): Content pattern names the files must have matches of
+            limit (int): Maximum number of groups (optional)
+        
+        Returns:
+            tuple: (column names, iterator of (value, files, total_size)
+                tuples, largest groups first)
+        """
+        self._check_field(group_by)
+        
+        joins, _, params = self._pattern_joins(list(patterns or []))
+        conditions, condition_params = self._conditions(where)
+        params += condition_params
+        
+        sql = (
+            f"SELECT files.{group_by}, COUNT(*) AS files, SUM(files.size) AS total_size "
+            f"FROM files {joins}{self._where_clause(conditions)} "
+            f"GROUP BY files.{group_by} ORDER BY files DESC, total_size DESC"
+        )
+        if limit:
+            sql += ' LIMIT ?'
+            params.append(limit)
+        
+        names = [group_by, 'files', 'total_size']
+        return names, self._rows(sql, params, names)
+    
+    def _check_field(self, field):
+        """Reject names that are not file fields before they reach SQL."""
+        if field not in self.fields:
+            raise ValueError(
+                f"Unknown field: {field} (available: {', '.join(self.fields)})"
+            )
+    
+    def _pattern_joins(self, patterns):
+        """Build joins restricting files to those with matches of each pattern."""
+        joins = []
+        columns = []
+        params = []
+        for index, pattern in enumerate(patterns):
+            joins.append(
+                f"JOIN patterns AS pattern{index} ON pattern{index}.file_id = files.id "
+                f"AND pattern{index}.pattern = ? "
+            )
+            columns.append(f'pattern{index}.count')
+            params.append(pattern)
+        return ''.join(joins), columns, params
+    
+    def _conditions(self, where):
+        """Parse conditions into SQL expressions and their parameters."""
+        conditions = []
+        params = []
+        for condition in where or []:
+            match = _CONDITION.match(condition)
+            if not match:
+                raise ValueError(f"Invalid condition: {condition} (expected FIELD OPERATOR VALUE)")
+            
+            field, operator, value = match.groups()
+            self._check_field(field)
+            conditions.append(f"files.{field} {_OPERATORS[operator]} ?")
+            params.append(value if operator == '~' else self._convert_value(field, value))
+        return conditions, params
+    
+    def _convert_value(self, field, value):
+        """Convert a condition value to the type stored for a field."""
+        if field in TIMESTAMP_FIELDS:
+            try:
+                return int(value)
+            except ValueError:
+                pass
+            converted = timestamp_ns(value)
+            if converted is None:
+                raise ValueError(f"Invalid timestamp for {field}: {value}")
+            return converted
+        
+        if self.fields[field] == 'INTEGER':
+            if value.lower() in _BOOLEAN_VALUES:
+                return _BOOLEAN_VALUES[value.lower()]
+            try:
+                return int(value)
+            except ValueError:
+                raise ValueError(f"Invalid number for {field}: {value}")
+        
+        return value
+    
+    @staticmethod
+    def _where_clause(conditions):
+        """Join conditions into a WHERE clause."""
+        return f"WHERE {' AND '.join(conditions)}" if conditions else ''
+    
+    def _rows(self, sql, params, names):
+        """Yield result rows with timestamps formatted for output."""
+        timestamp_columns = [index for index, name in enumerate(names) if name in TIMESTAMP_FIELDS]
+        cursor = self.connection.execute(sql, params)
+        for row in cursor:
+            if timestamp_columns:
+                row = list(row)
+                for index in timestamp_columns:
+                    row[index] = format_timestamp(row[index])
+            yield tuple(row)
+
+
+def write_rows(names, rows, output, format_type='csv'):
+    """
+    Write query rows as they are produced.
+    
+    Args:
+        names (list): Column names
+        rows (iterable): Row tuples
+        output (file): Text stream to write to
+        format_type (str): 'csv' with a header row, or 'ndjson' with one
+            object per row
+    
+    Returns:
+        int: Number of rows written
+    """
+    count = 0
+    if format_type == 'csv':
+        writer = csv.writer(output)
+        writer.writerow(names)
+        for row in rows:
+            writer.writerow(row)
+            count += 1
+    elif format_type == 'ndjson':
+        for row in rows:
+            output.write(json.dumps(dict(zip(names, row)), ensure_ascii=False))
+            output.write('\n')
+            count += 1
+    else:
+        raise ValueError(f"Unsupported format: {format_type}")
+    return count
@@ -4,27 +4,206 @@ Metadata extraction utilities for files.
 
 import os
 import stat
+import time
 from pathlib import Path
-from datetime import datetime
 import hashlib
 
+from utils.stage_timing import StageTimer
+
+try:
+    import grp
+    import pwd
+except ImportError:
+    # Not available on Windows
+    grp = pwd = None
+
+
+# Digests --hash can select, and those computed by default
+HASH_ALGORITHMS = ('md5', 'sha1', 'sha256', 'blake2b')
+DEFAULT_HASH_ALGORITHMS = ('md5', 'sha1', 'sha256')
+
+# Files above this size are only hashed when large-file hashing is enabled
+CHECKSUM_MAX_SIZE = 10 * 1024 * 1024  # 10MB
+
+# Read size for files hashed from disk; a whole number of pages
+HASH_BUFFER_SIZE = 1024 * 1024
+
+
+def parse_hash_algorithms(value):
+    """
+    Parse a comma-separated list of digest names.
+    
+    Args:
+        value (str): Names from HASH_ALGORITHMS, or 'none'
+        
+    Returns:
+        tuple: Selected algorithms in the given order, empty for 'none'
+        
+    Raises:
+        ValueError: If a name is not a supported algorithm
+    """
+    names = [name.strip().lower() for name in value.split(',') if name.strip()]
+    if names == ['none']:
+        return ()
+    
+    for name in names:
+        if name not in HASH_ALGORITHMS:
+            raise ValueError(f"Unsupported hash algorithm: {name} (choose from {', '.join(HASH_ALGORITHMS)} or none)")
+    
+    return tuple(dict.fromkeys(names))
+
+
+# Pillow modules, imported with the first image; False if Pillow is missing
+_pil = None
+
+# zipfile and tarfile by name, each imported with the first archive needing it
+_archive_modules = {}
+
+# User and group names by id, shared by every extractor in the process.
+# A lookup can be a directory service round trip (LDAP, SSSD), while a
+# tree rarely has more than a few distinct owners.
+_user_names = {}
+_group_names = {}
+
+
+def user_name(uid):
+    """
+    Get the name of a user id, looked up once per process.
+    
+    Args:
+        uid (int): User id
+        
+    Returns:
+        str: User name, or None if unknown or unsupported on this platform
+    """
+    if pwd is None:
+        return None
+    return _cached_name(_user_names, uid, pwd.getpwuid, 'pw_name')
+
+
+def group_name(gid):
+    """
+    Get the name of a group id, looked up once per process.
+    
+    Args:
+        gid (int): Group id
+        
+    Returns:
+        str: Group name, or None if unknown or unsupported on this platform
+    """
+    if grp is None:
+        return None
+    return _cached_name(_group_names, gid, grp.getgrgid, 'gr_name')
+
+
+def _load_pil():
+    """
+    Import Pillow on first use, remembering a failed import.
+    
+    Returns:
+        tuple: (PIL.Image, EXIF tag names), or None without Pillow
+    """
+    global _pil
+    if _pil is None:
+        try:
+            from PIL import Image
+            from PIL.ExifTags import TAGS
+            _pil = (Image, TAGS)
+        except ImportError:
+            _pil = False
+    return _pil or None
+
+
+def _load_archive_module(name):
+    """
+    Import an archive module on first use.
+    
+    Args:
+        name (str): 'zipfile' or 'tarfile'; a scan of zip archives only
+            never loads tarfile, nor tar archives zipfile
+    
+    Returns:
+        module: The imported module
+    """
+    module = _archive_modules.get(name)
+    if module is None:
+        if name == 'zipfile':
+            import zipfile as module
+        else:
+            import tarfile as module
+        _archive_modules[name] = module
+    return module
+
+
+def _cached_name(cache, key, lookup, attribute):
+    """Look up a name through a cache; failed lookups are cached as None."""
+    try:
+        return cache[key]
+    except KeyError:
+        pass
+    
+    try:
+        name = getattr(lookup(key), attribute)
+    except (KeyError, OSError):
+        # User or group not found
+        name = None
+    
+    cache[key] = name
+    return name
+
 
 class MetadataExtractor:
     """Extracts metadata from files."""
     
-    def __init__(self):
-        """Initialize the MetadataExtractor."""
-        pass
+    def __init__(self, file_handler=None, hash_algorithms=DEFAULT_HASH_ALGORITHMS, hash_large_files=False,
+                 resolve_owner_names=True):
+        """
+        Initialize the MetadataExtractor.
+        
+        Args:
+            file_handler (FileHandler): Shared file handler (optional, one is
+                created on first use otherwise)
+            hash_algorithms (tuple): Checksums to compute, from HASH_ALGORITHMS;
+                empty to skip checksums
+            hash_large_files (bool): Also hash files over CHECKSUM_MAX_SIZE
+            resolve_owner_names (bool): Look up user and group names of file
+                owners; only the numeric ids are reported otherwise
+        """
+        self._file_handler = file_handler
+        # Stages are timed on the file handler's timer
+        self.stage_timer = file_handler.stage_timer if file_handler is not None else StageTimer()
+        self.hash_algorithms = tuple(hash_algorithms)
+        self.hash_large_files = hash_large_files
+        self.resolve_owner_names = resolve_owner_names
+        
+        # Running hashing totals, for throughput reporting
+        self.hash_stats = {'files': 0, 'bytes': 0, 'seconds': 0.0}
+        
+        # Read buffers and update threads reused for every file hashed from disk
+        self._hash_buffers = None
+        self._hash_executor = None
     
-    def extract(self, file_path):
+    @property
+    def file_handler(self):
+        """FileHandler used for extended metadata, reused across files."""
+        if self._file_handler is None:
+            from utils.file_handler import FileHandler
+            self._file_handler = FileHandler(self.stage_timer)
+        return self._file_handler
+    
+    def extract(self, file_path, file_stats=None, file_buffer=None, calculate_checksums=True):
         """
         Extract comprehensive metadata from a file.
         
         Args:
             file_path (Path): Path to the file
+            file_stats (os.stat_result): Already-known stat result, avoids
+                another stat call when the caller has one (optional)
+            file_buffer (FileBuffer): Shared content buffer (optional)
+            calculate_checksums (bool): Compute content checksums
             
         Returns:
-            dict: File metadata
+            dict: File metadata, timestamps in nanoseconds since the epoch
         """
         file_path = Path(file_path)
         
@@ -44,13 +223,15 @@ class MetadataExtractor:
         
         try:
             # Get file stats
-            file_stats = file_path.stat()
+            if file_stats is None:
+                file_stats = file_buffer.stats if file_buffer is not None else file_path.stat()
             
             # Basic information
             metadata['size'] = file_stats.st_size
-            metadata['created'] = datetime.fromtimestamp(file_stats.st_ctime).isoformat()
-            metadata['modified'] = datetime.fromtimestamp(file_stats.st_mtime).isoformat()
-            metadata['accessed'] = datetime.fromtimestamp(file_stats.st_atime).isoformat()
+            # Raw nanoseconds; reports format them (utils.timestamps)
+            metadata['created'] = file_stats.st_ctime_ns
+            metadata['modified'] = file_stats.st_mtime_ns
+            metadata['accessed'] = file_stats.st_atime_ns
             
             # Permissions
             metadata['permissions'] = self._extract_permissions(file_stats)
@@ -58,9 +239,10 @@ class MetadataExtractor:
             # Owner information (Unix-like systems)
             metadata['owner'] = self._extract_owner_info(file_stats)
             
-            # Calculate checksums for smaller files
-            if metadata['size'] <= 10 * 1024 * 1024:  # 10MB limit
-                metadata['checksums'] = self._calculate_checksums(file_path)
+            # Calculate checksums, for smaller files unless large files are enabled
+            if calculate_checksums and self.hash_algorithms and (
+                    self.hash_large_files or metadata['size'] <= CHECKSUM_MAX_SIZE):
+                metadata['checksums'] = self._calculate_checksums(file_path, file_buffer)
             
         except Exception as e:
             metadata['error'] = str(e)
@@ -148,65 +330,132 @@ class MetadataExtractor:
             'groupname': None
         }
         
-        # Try to get username and group name (Unix-like systems)
-        try:
-            import pwd
-            import grp
-            
-            owner_info['username'] = pwd.getpwuid(file_stats.st_uid).pw_name
-            owner_info['groupname'] = grp.getgrgid(file_stats.st_gid).gr_name
-        except (ImportError, KeyError, OSError):
-            # Not available on Windows or user/group not found
-            pass
+        # Names are cached per id for the whole process
+        if self.resolve_owner_names:
+            owner_info['username'] = user_name(file_stats.st_uid)
+            owner_info['groupname'] = group_name(file_stats.st_gid)
         
         return owner_info
     
-    def _calculate_checksums(self, file_path):
+    def _calculate_checksums(self, file_path, file_buffer=None):
         """
         Calculate file checksums.
         
         Args:
             file_path (Path): Path to the file
+            file_buffer (FileBuffer): Shared content buffer (optional)
             
         Returns:
             dict: Checksums
         """
-        checksums = {
-            'md5': None,
-            'sha1': None,
-            'sha256': None,
-            'error': None
-        }
+        checksums = dict.fromkeys(self.hash_algorithms)
+        checksums['error'] = None
         
         try:
             # Initialize hash objects
-            md5_hash = hashlib.md5()
-            sha1_hash = hashlib.sha1()
-            sha256_hash = hashlib.sha256()
+            hashers = [hashlib.new(name) for name in self.hash_algorithms]
+            started = time.perf_counter()
             
-            # Read file in chunks to handle large files
-            with open(file_path, 'rb') as f:
-                while chunk := f.read(8192):
-                    md5_hash.update(chunk)
-                    sha1_hash.update(chunk)
-                    sha256_hash.update(chunk)
+            with self.stage_timer.stage('hashing'):
+                with self.stage_timer.stage('read'):
+                    data = file_buffer.read() if file_buffer is not None else None
+                if data is not None:
+                    # Hash the shared buffer in one pass
+                    for hasher in hashers:
+                        hasher.update(data)
+                    size = len(data)
+                else:
+                    size = self._hash_file(file_path, hashers)
+                
+                for name, hasher in zip(self.hash_algorithms, hashers):
+                    checksums[name] = hasher.hexdigest()
             
-            checksums['md5'] = md5_hash.hexdigest()
-            checksums['sha1'] = sha1_hash.hexdigest()
-            checksums['sha256'] = sha256_hash.hexdigest()
+            self.hash_stats['files'] += 1
+            self.hash_stats['bytes'] += size
+            self.hash_stats['seconds'] += time.perf_counter() - started
             
         except Exception as e:
             checksums['error'] = str(e)
         
         return checksums
     
-    def extract_extended_metadata(self, file_path, file_type_info):
+    def _hash_file(self, file_path, hashers):
+        """
+        Feed a file on disk to hash objects.
+        
+        The file is read with readinto() into two reused buffers. While one
+        buffer is being hashed, every digest updating in its own thread
+        (hashlib releases the GIL), the next block is read into the other.
+        
+        Args:
+            file_path (Path): Path to the file
+            hashers (list): hashlib objects to update
+            
+        Returns:
+            int: Number of bytes hashed
+        """
+        if self._hash_buffers is None:
+            self._hash_buffers = (bytearray(HASH_BUFFER_SIZE), bytearray(HASH_BUFFER_SIZE))
+        from concurrent.futures import ThreadPoolExecutor, wait
+        
+        if self._hash_executor is None:
+            self._hash_executor = ThreadPoolExecutor(
+                max_workers=len(HASH_ALGORITHMS), thread_name_prefix='hash'
+            )
+        
+        size = 0
+        pending = []
+        index = 0
+        
+        with open(file_path, 'rb', buffering=0) as f:
+            while True:
+                view = memoryview(self._hash_buffers[index])
+                read = f.readinto(view)
+                
+                # The other buffer must be fully hashed before it is reused
+                wait(pending)
+                for future in pending:
+                    future.result()
+                
+                if not read:
+                    break
+                
+                block = view[:read]
+                pending = [self._hash_executor.submit(hasher.update, block) for hasher in hashers]
+                size += read
+                index ^= 1
+        
+        return size
+    
+    def take_hash_stats(self):
+        """
+        Return the hashing totals gathered so far and reset them.
+        
+        Returns:
+            dict: Files hashed, bytes hashed and seconds spent
+        """
+        hash_stats = self.hash_stats
+        self.hash_stats = {'files': 0, 'bytes': 0, 'seconds': 0.0}
+        return hash_stats
+    
+    def add_hash_stats(self, hash_stats):
+        """
+        Add hashing totals gathered elsewhere, e.g. in a worker process.
+        
+        Args:
+            hash_stats (dict): Totals as returned by take_hash_stats()
+        """
+        for key, value in hash_stats.items():
+            self.hash_stats[key] += value
+    
+    def extract_extended_metadata(self, file_path, file_type_info, file_buffer=None):
         """
         Extract extended metadata based on file type.
         
         Args:
             file_path (Path): Path to the file
             file_type_info (dict): File type information
+            file_buffer (FileBuffer): Shared content buffer (optional)
             
         Returns:
             dict: Extended metadata
@@ -217,29 +466,33 @@ class MetadataExtractor:
             category = file_type_info.get('category', '')
             
             if category == 'image':
-                extended = self._extract_image_metadata(file_path)
+                extended = self._extract_image_metadata(file_path, file_buffer)
             elif category == 'code':
-                extended = self._extract_code_metadata(file_path)
+                extended = self._extract_code_metadata(file_path, file_buffer)
             elif category == 'text':
-                extended = self._extract_text_metadata(file_path)
+                extended = self._extract_text_metadata(file_path, file_buffer)
             elif category == 'archive':
-                extended = self._extract_archive_metadata(file_path)
+                extended = self._extract_archive_metadata(file_path, file_buffer)
                 
         except Exception as e:
             extended['extraction_error'] = str(e)
         
         return extended
     
-    def _extract_image_metadata(self, file_path):
+    def _extract_image_metadata(self, file_path, file_buffer=None):
         """Extract metadata from image files."""
         metadata = {}
         
+        # Try to use Pillow if available
+        pil = _load_pil()
+        if pil is None:
+            metadata['error'] = "PIL/Pillow not available for image metadata extraction"
+            return metadata
+        Image, TAGS = pil
+        
         try:
-            # Try to use Pillow if available
-            from PIL import Image
-            from PIL.ExifTags import TAGS
-            
-            with Image.open(file_path) as img:
+            # Pillow leaves file objects it is given open, so the handle is closed here
+            with self._open_content(file_path, file_buffer) as handle, Image.open(handle) as img:
                 metadata['width'] = img.width
                 metadata['height'] = img.height
                 metadata['format'] = img.format
@@ -254,25 +507,25 @@ class MetadataExtractor:
                         exif[tag] = str(value)
                     metadata['exif'] = exif
                     
-        except ImportError:
-            metadata['error'] = "PIL/Pillow not available for image metadata extraction"
+        except Image.UnidentifiedImageError:
+            # Pillow names the in-memory stream rather than the file
+            metadata['error'] = f"cannot identify image file {str(file_path)!r}"
         except Exception as e:
             metadata['error'] = str(e)
         
         return metadata
     
-    def _extract_code_metadata(self, file_path):
+    def _extract_code_metadata(self, file_path, file_buffer=None):
         """Extract metadata from code files."""
         metadata = {}
         
         try:
-            from utils.file_handler import FileHandler
-            file_handler = FileHandler()
+            file_handler = self.file_handler
             
             # Read file content if it's text
-            file_type = file_handler.get_file_type(file_path)
+            file_type = file_handler.get_file_type(file_path, file_buffer)
             if file_type['is_text']:
-                content_info = file_handler.read_text_file(file_path)
+                content_info = file_handler.read_text_file(file_path, file_buffer=file_buffer)
                 
                 if content_info['content'] and not content_info['error']:
                     content = content_info['content']
@@ -296,15 +549,14 @@ class MetadataExtractor:
         
         return metadata
     
-    def _extract_text_metadata(self, file_path):
+    def _extract_text_metadata(self, file_path, file_buffer=None):
         """Extract metadata from text files."""
         metadata = {}
         
         try:
-            from utils.file_handler import FileHandler
-            file_handler = FileHandler()
+            file_handler = self.file_handler
             
-            content_info = file_handler.read_text_file(file_path)
+            content_info = file_handler.read_text_file(file_path, file_buffer=file_buffer)
             
             if content_info['content'] and not content_info['error']:
                 content = content_info['content']
@@ -328,25 +580,27 @@ class MetadataExtractor:
         
         return metadata
     
-    def _extract_archive_metadata(self, file_path):
+    def _extract_archive_metadata(self, file_path, file_buffer=None):
         """Extract metadata from archive files."""
         metadata = {}
         
         try:
-            import zipfile
-            import tarfile
-            
             suffix = file_path.suffix.lower()
             
+            # zipfile and tarfile leave file objects they are given open,
+            # so the handle is closed here
             if suffix == '.zip':
-                with zipfile.ZipFile(file_path, 'r') as zip_file:
+                zipfile = _load_archive_module('zipfile')
+                with self._open_content(file_path, file_buffer) as handle, zipfile.ZipFile(handle, 'r') as zip_file:
                     metadata['archive_type'] = 'zip'
                     metadata['file_count'] = len(zip_file.filelist)
                     metadata['compressed_size'] = sum(f.compress_size for f in zip_file.filelist)
                     metadata['uncompressed_size'] = sum(f.file_size for f in zip_file.filelist)
                     
             elif suffix in ['.tar', '.tar.gz', '.tar.bz2', '.tar.xz']:
-                with tarfile.open(file_path, 'r') as tar_file:
+                tarfile = _load_archive_module('tarfile')
+                with self._open_content(file_path, file_buffer) as handle, \
+                        tarfile.open(fileobj=handle, mode='r') as tar_file:
                     metadata['archive_type'] = 'tar'
                     members = tar_file.getmembers()
                     metadata['file_count'] = len(members)
@@ -357,6 +611,22 @@ class MetadataExtractor:
         
         return metadata
     
+    def _open_content(self, file_path, file_buffer=None):
+        """
+        Open a file's content as a binary file object.
+        
+        Args:
+            file_path (Path): Path to the file
+            file_buffer (FileBuffer): Shared content buffer (optional)
+            
+        Returns:
+            file object: Stream over the shared buffer, or the file on disk;
+                the caller closes it
+        """
+        if file_buffer is not None:
+            return file_buffer.open()
+        return open(file_path, 'rb')
+    
     def _count_comment_lines(self, lines, file_extension):
         """Count comment lines based on file type."""
         comment_count = 0
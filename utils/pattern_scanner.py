@@ -0,0 +1,590 @@
+"""
+Multi-pattern scanning engine used by content analysis.
+"""
+
+import re
+from collections import Counter
+
+
+# Characters of lookahead a streaming scan keeps beyond the matches it
+# accepts; matches the regex engine decides within this distance of their
+# start are found exactly even when they cross a chunk boundary
+STREAM_OVERLAP = 64 * 1024
+
+# Characters kept before a streaming scan's resume position, so lookbehinds
+# and \b see the real preceding text
+_STREAM_CONTEXT = 16
+
+# Marker for "content contains at least one decimal digit"
+DIGIT = object()
+
+_DIGIT_PATTERN = re.compile(r'\d')
+
+# Global inline flags such as (?i), which must stay at the start of a pattern
+_INLINE_FLAGS = re.compile(r'^\(\?[aiLmsux]+\)')
+
+# Non-ASCII characters that IGNORECASE matching equates with ASCII letters
+# (dotted/dotless i, long s, Kelvin sign). Content without them lowercases
+# to a same-length string on which lowercased patterns match exactly where
+# the originals match case-insensitively.
+_ASCII_CASE_FOLDING_CHARS = ('\u0130', '\u0131', '\u017f', '\u212a')
+
+# Constructs whose meaning changes when letters are lowercased: character
+# escapes by code (\x41, \u0041, \N{...}, octal) and mixed-case ranges
+_CASE_SENSITIVE_SYNTAX = re.compile(r'\\[xuUN0-7]|[A-Z]-[a-z]|[a-z]-[A-Z]')
+
+
+class PatternScanner:
+    """
+    Runs a set of named regular expressions over content.
+    
+    Results are exactly those of calling findall for every pattern, but the
+    work is shared between patterns and most positions are never visited by
+    the regex engine:
+    
+    - prefilters: every pattern can list requirements that any of its matches
+      necessarily satisfies, each requirement being a tuple of alternative
+      substrings (or DIGIT). The substring checks are evaluated once per
+      content, and patterns whose requirements fail are not run at all.
+    - starts: a pattern can name a start regex matching at every position
+      where one of its matches can begin. Candidate positions are found once
+      per distinct start regex and shared by all patterns using it; the
+      pattern itself is then only tried at those positions, reproducing the
+      leftmost, non-overlapping scan of findall.
+    - IGNORECASE patterns run case-sensitively over the lowercased content,
+      which lets the engine use literal prefixes; matched groups are sliced
+      from the original content. Content containing characters that fold to
+      ASCII letters falls back to the original patterns.
+    """
+    
+    def __init__(self, patterns, prefilters=None, starts=None):
+        """
+        Initialize the PatternScanner.
+        
+        Args:
+            patterns (dict): Pattern name to compiled regular expression
+            prefilters (dict): Pattern name to list of requirements (optional);
+                literals of IGNORECASE patterns must be lowercase
+            starts (dict): Pattern name to start regex source (optional); it is
+                compiled with the pattern's flags
+        """
+        self.patterns = patterns
+        self.prefilters = prefilters or {}
+        starts = starts or {}
+        
+        self._compiled = {
+            name: _CompiledPattern(pattern, starts.get(name))
+            for name, pattern in patterns.items()
+        }
+    
+    def findall(self, content):
+        """
+        Find all matches of every pattern.
+        
+        Args:
+            content (str): Content to scan
+            
+        Returns:
+            dict: Pattern name to findall() result
+        """
+        return self._scan(content, count_only=False)
+    
+    def count(self, content):
+        """
+        Count the matches of every pattern.
+        
+        Cheaper than findall() when match values are not needed.
+        
+        Args:
+            content (str): Content to scan
+            
+        Returns:
+            dict: Pattern name to number of findall() matches
+        """
+        return self._scan(content, count_only=True)
+    
+    def stream(self, count_only=False, overlap=STREAM_OVERLAP):
+        """
+        Start a scan over content that arrives in chunks.
+        
+        Args:
+            count_only (bool): Count matches instead of collecting their values
+            overlap (int): Lookahead kept across chunk boundaries
+            
+        Returns:
+            StreamingScan: Scan to feed the chunks to
+        """
+        return StreamingScan(self, count_only, overlap)
+    
+    @property
+    def supports_buffers(self):
+        """True if every pattern has a bytes form for scan_buffer()."""
+        return all(compiled.bytes_pattern is not None for compiled in self._compiled.values())
+    
+    def scan_buffer(self, buffer, count_only=False):
+        """
+        Run every pattern over ASCII-compatible bytes, such as a memory map.
+        
+        The bytes forms of the patterns search the buffer in place, without
+        decoding it or copying it into a str. Their \w, \d, \s and \b are
+        ASCII-only, so results equal findall() on the decoded content for
+        ASCII text and for UTF-8 text except where non-ASCII letters, digits
+        or spaces touch a match.
+        
+        Args:
+            buffer (bytes-like): Content to scan, e.g. an mmap.mmap
+            count_only (bool): Count matches instead of collecting their values
+            
+        Returns:
+            dict: Pattern name to number of matches when counting, otherwise
+                to a Counter of findall() values (decoded as UTF-8) in
+                first-seen order
+        """
+        requirement_cache = {}
+        results = {}
+        
+        for name, compiled in self._compiled.items():
+            requirements = self.prefilters.get(name) or ()
+            if not all(
+                _buffer_contains(buffer, alternatives, compiled.ignore_case, requirement_cache)
+                for alternatives in requirements
+            ):
+                results[name] = 0 if count_only else Counter()
+            elif count_only:
+                results[name] = sum(1 for _ in compiled.bytes_pattern.finditer(buffer))
+            else:
+                results[name] = Counter(
+                    compiled._findall_value(match, buffer, decode=True)
+                    for match in compiled.bytes_pattern.finditer(buffer)
+                )
+        
+        return results
+    
+    def _scan(self, content, count_only):
+        """Run every pattern whose prefilter passes over the content."""
+        prepared = _PreparedContent(content)
+        results = {}
+        
+        for name, compiled in self._compiled.items():
+            if prepared.may_match(compiled.ignore_case, self.prefilters.get(name)):
+                results[name] = compiled.scan(prepared, count_only)
+            else:
+                results[name] = 0 if count_only else []
+        
+        return results
+
+
+class StreamingScan:
+    """
+    Incremental findall() of every pattern over chunked content.
+    
+    Chunks are appended to a window. Each pass accepts the matches that start
+    at least `overlap` characters before the end of the window (moved back to
+    a line start where one is near) and keeps the rest of the window, so a
+    match crossing a chunk boundary is found whole on a later pass. A match
+    is only accepted once the window holds its whole last line and at least
+    `overlap` characters after it; until then more content could still
+    extend it ('.*' on a long line) or change how it ends (a word boundary
+    at the cut), so the pattern stays where it was and the window grows.
+    Likewise no pattern moves past the start of a line not yet fed whole: a
+    match starting there may only be found once its end arrives ('select'
+    early on a long line, its 'from' in a later chunk). Every pattern
+    resumes where its findall() would, which keeps the non-overlapping,
+    left-to-right semantics exact. Memory is bounded by the window (a few
+    times the overlap plus one chunk, or the longest line) and, when values
+    are collected, by the distinct values matched.
+    """
+    
+    def __init__(self, scanner, count_only=False, overlap=STREAM_OVERLAP):
+        """
+        Initialize the StreamingScan.
+        
+        Args:
+            scanner (PatternScanner): Scanner whose patterns are run
+            count_only (bool): Count matches instead of collecting their values
+            overlap (int): Lookahead kept across chunk boundaries
+        """
+        self.scanner = scanner
+        self.count_only = count_only
+        self.overlap = overlap
+        
+        self._window = ''
+        self._base = 0  # Offset of the window in the whole content
+        self._scan_at = 2 * overlap  # Window length of the next pass
+        self._resume = dict.fromkeys(scanner._compiled, 0)
+        self._results = {
+            name: 0 if count_only else Counter()
+            for name in scanner._compiled
+        }
+    
+    def feed(self, text):
+        """
+        Add the next chunk of content.
+        
+        Args:
+            text (str): Content following everything fed so far
+        """
+        self._window += text
+        if len(self._window) >= self._scan_at:
+            self._scan(final=False)
+    
+    def finish(self):
+        """
+        Scan the remaining content.
+        
+        Returns:
+            dict: Pattern name to number of matches when counting, otherwise
+                to a Counter of findall() values in first-seen order
+        """
+        self._scan(final=True)
+        self._window = ''
+        return self._results
+    
+    def _scan(self, final):
+        """Accept the matches that no later chunk can change, then trim the window."""
+        window = self._window
+        base = self._base
+        end = base + len(window)
+        if final:
+            limit = safe_end = open_line = end
+        else:
+            # Cut at a line start where one is near, so matches that stop at
+            # the end of their line ('.*') are decided within the window
+            cut = len(window) - self.overlap
+            newline = window.rfind('\n', 0, cut)
+            if newline >= cut - self.overlap:
+                cut = newline + 1
+            limit = base + cut
+            
+            # Matches must end on a line the window holds whole, and far
+            # enough from its end that later content cannot change them
+            safe_end = base + min(len(window) - self.overlap, window.rfind('\n'))
+            
+            # Start of the line still being fed, its trailing whitespace
+            # included since patterns cross lines only through '\s'; whether
+            # a match starts on it depends on the rest of the line
+            open_line = base + window.rfind('\n', 0, len(window.rstrip())) + 1
+        prepared = _PreparedContent(window)
+        held_back = False
+        
+        for name, compiled in self.scanner._compiled.items():
+            resume = self._resume[name]
+            held = False
+            if resume < limit and prepared.may_match(compiled.ignore_case, self.scanner.prefilters.get(name)):
+                result = self._results[name]
+                for match in compiled.finditer(prepared, resume - base):
+                    start, stop = match.span()
+                    if base + start >= limit:
+                        break
+                    if base + stop > safe_end:
+                        # Decided on a later pass, from the last accepted match
+                        held = True
+                        break
+                    if self.count_only:
+                        result += 1
+                    else:
+                        result[compiled._findall_value(match, window)] += 1
+                    # findall resumes after the match (after an empty one, one further)
+                    resume = base + (stop if stop > start else start + 1)
+                if self.count_only:
+                    self._results[name] = result
+            if held:
+                self._resume[name] = resume
+                held_back = True
+            else:
+                # No match starts between the last accepted one and the limit,
+                # or the open line if that starts first
+                self._resume[name] = max(resume, min(limit, open_line))
+                held_back = held_back or self._resume[name] < limit
+        
+        if not final:
+            keep_from = max(base, min(self._resume.values()) - _STREAM_CONTEXT)
+            self._window = window[keep_from - base:]
+            self._base = keep_from
+            
+            # A window kept for a held-back match is rescanned once it has
+            # doubled, so long lines cost linear rather than quadratic time
+            if held_back:
+                self._scan_at = max(2 * self.overlap, 2 * len(self._window))
+            else:
+                self._scan_at = max(2 * self.overlap, len(self._window) + self.overlap)
+
+
+class _CompiledPattern:
+    """A pattern together with its faster equivalent forms."""
+    
+    def __init__(self, pattern, start=None):
+        """
+        Initialize the compiled pattern.
+        
+        Args:
+            pattern (re.Pattern): Original pattern
+            start (str): Start regex source (optional)
+        """
+        self.pattern = pattern
+        self.ignore_case = bool(pattern.flags & re.IGNORECASE)
+        self.groups = pattern.groups
+        self.start = re.compile(start, pattern.flags) if start else None
+        self.lowered = self._compile_lowered(pattern) if self.ignore_case else None
+        self.bytes_pattern = self._compile_bytes(pattern)
+    
+    def _compile_lowered(self, pattern):
+        """
+        Build the case-sensitive equivalent for lowercased content.
+        
+        Returns:
+            re.Pattern: Lowercased pattern, or None if it cannot be derived safely
+        """
+        if not isinstance(pattern.pattern, str):
+            return None
+        
+        flags, body = _split_inline_flags(pattern.pattern)
+        if _CASE_SENSITIVE_SYNTAX.search(body):
+            return None
+        flags = flags.replace('i', '') if flags != '(?i)' else ''
+        
+        try:
+            lowered = re.compile(flags + _lowercase_literals(body), pattern.flags & ~re.IGNORECASE)
+        except re.error:
+            return None
+        
+        return lowered if lowered.groups == self.groups else None
+    
+    def _compile_bytes(self, pattern):
+        """
+        Build the equivalent pattern for ASCII-compatible bytes.
+        
+        Returns:
+            re.Pattern: Bytes pattern, or None if the source is not ASCII
+        """
+        if not isinstance(pattern.pattern, str) or not pattern.pattern.isascii():
+            return None
+        
+        try:
+            return re.compile(pattern.pattern.encode('ascii'), pattern.flags & ~re.UNICODE)
+        except re.error:
+            return None
+    
+    def scan(self, prepared, count_only=False):
+        """
+        Find or count matches, like re.Pattern.findall.
+        
+        Args:
+            prepared (_PreparedContent): Content to scan
+            count_only (bool): Return the number of matches only
+            
+        Returns:
+            list or int: Matches in findall() format, or their number
+        """
+        if self.lowered is not None and prepared.can_lower:
+            # Match positions are identical in the lowercased content
+            if count_only:
+                return len(self.lowered.findall(prepared.lowered))
+            matches = self.lowered.finditer(prepared.lowered)
+        elif self.start is not None:
+            matches = self._match_at_starts(prepared)
+            if count_only:
+                return len(matches)
+        else:
+            if count_only:
+                return len(self.pattern.findall(prepared.content))
+            return self.pattern.findall(prepared.content)
+        
+        return [self._findall_value(match, prepared.content) for match in matches]
+    
+    def finditer(self, prepared, pos=0):
+        """
+        Iterate over the matches in the content from a position on.
+        
+        Args:
+            prepared (_PreparedContent): Content to scan
+            pos (int): Position the search starts at
+            
+        Returns:
+            iterator: re.Match objects, with spans valid in the original content
+        """
+        if self.lowered is not None and prepared.can_lower:
+            return self.lowered.finditer(prepared.lowered, pos)
+        return self.pattern.finditer(prepared.content, pos)
+    
+    def _match_at_starts(self, prepared):
+        """Try the pattern at candidate start positions, left to right."""
+        content = prepared.content
+        match_at = self.pattern.match
+        matches = []
+        next_position = 0
+        
+        for position in prepared.start_positions(self.start):
+            if position < next_position:
+                continue
+            match = match_at(content, position)
+            if match:
+                matches.append(match)
+                # findall resumes after the match (after an empty one, one further)
+                next_position = match.end() if match.end() > position else position + 1
+        
+        return matches
+    
+    def _findall_value(self, match, content, decode=False):
+        """
+        Convert a match to the value findall() returns, taken from content.
+        
+        With decode, content is bytes and the values are decoded as UTF-8.
+        """
+        groups = self.groups
+        if groups == 0:
+            value = content[match.start():match.end()]
+            return value.decode('utf-8', 'replace') if decode else value
+        
+        values = []
+        for index in range(1, groups + 1):
+            start, end = match.span(index)
+            if start == -1:
+                values.append('')
+            else:
+                value = content[start:end]
+                values.append(value.decode('utf-8', 'replace') if decode else value)
+        
+        return values[0] if groups == 1 else tuple(values)
+
+
+class _PreparedContent:
+    """Content plus derived views and prefilter results, computed on demand."""
+    
+    def __init__(self, content):
+        """
+        Initialize the prepared content.
+        
+        Args:
+            content (str): Content the patterns will run over
+        """
+        self.content = content
+        self._lowered = None
+        self._can_lower = None
+        self._has_digit = None
+        self._literal_cache = {}
+        self._start_positions = {}
+    
+    @property
+    def can_lower(self):
+        """True if lowercased content can stand in for case-insensitive matching."""
+        if self._can_lower is None:
+            content = self.content
+            self._can_lower = content.isascii() or not any(
+                char in content for char in _ASCII_CASE_FOLDING_CHARS
+            )
+        return self._can_lower
+    
+    @property
+    def lowered(self):
+        """Lowercased content."""
+        if self._lowered is None:
+            self._lowered = self.content.lower()
+        return self._lowered
+    
+    def start_positions(self, start):
+        """
+        Get the positions where a start regex matches.
+        
+        Args:
+            start (re.Pattern): Start regex
+            
+        Returns:
+            list: Match start offsets, ascending
+        """
+        if start not in self._start_positions:
+            self._start_positions[start] = [match.start() for match in start.finditer(self.content)]
+        return self._start_positions[start]
+    
+    def may_match(self, ignore_case, requirements):
+        """
+        Check whether a pattern can match the content.
+        
+        Args:
+            ignore_case (bool): True for IGNORECASE patterns
+            requirements (list): Prefilter requirements, or None for no prefilter
+            
+        Returns:
+            bool: False only if the pattern certainly has no match
+        """
+        if not requirements:
+            return True
+        
+        if ignore_case and not self.can_lower:
+            # Case folding matches ASCII letters with other characters
+            # here (e.g. the Kelvin sign), so lowered literals are unsafe
+            return True
+        
+        for alternatives in requirements:
+            if not any(self._contains(literal, ignore_case) for literal in alternatives):
+                return False
+        
+        return True
+    
+    def _contains(self, literal, ignore_case):
+        """Check for a literal (or DIGIT) in the content."""
+        if literal is DIGIT:
+            if self._has_digit is None:
+                self._has_digit = _DIGIT_PATTERN.search(self.content) is not None
+            return self._has_digit
+        
+        key = (literal, ignore_case)
+        if key not in self._literal_cache:
+            haystack = self.lowered if ignore_case else self.content
+            self._literal_cache[key] = literal in haystack
+        return self._literal_cache[key]
+
+
+def _buffer_contains(buffer, alternatives, ignore_case, cache):
+    """
+    Check a bytes buffer for any of a prefilter requirement's alternatives.
+    
+    Args:
+        buffer (bytes-like): Content being scanned
+        alternatives (tuple): Alternative literals (or DIGIT)
+        ignore_case (bool): Match the literals case-insensitively
+        cache (dict): Results already computed for this buffer
+        
+    Returns:
+        bool: True if one of the alternatives occurs in the buffer
+    """
+    key = (alternatives, ignore_case)
+    if key not in cache:
+        sources = [
+            rb'\d' if literal is DIGIT else re.escape(literal.encode('utf-8'))
+            for literal in alternatives
+        ]
+        search = re.compile(b'|'.join(sources), re.IGNORECASE if ignore_case else 0)
+        cache[key] = search.search(buffer) is not None
+    return cache[key]
+
+
+def _split_inline_flags(source):
+    """Split leading global inline flags, e.g. '(?i)', from a pattern source."""
+    match = _INLINE_FLAGS.match(source)
+    if match:
+        return match.group(), source[match.end():]
+    return '', source
+
+
+def _lowercase_literals(source):
+    """
+    Lowercase the letters of a pattern source, leaving escapes intact.
+    
+    On lowercased content the result matches exactly where the original
+    matches case-insensitively.
+    """
+    result = []
+    escaped = False
+    
+    for char in source:
+        if escaped:
+            result.append(char)
+            escaped = False
+        elif char == '\\':
+            result.append(char)
+            escaped = True
+        else:
+            result.append(char.lower())
+    
+    return ''.join(result)
@@ -0,0 +1,223 @@
+"""
+Profiling of scans, including their worker processes.
+"""
+
+from collections import Counter
+from pathlib import Path
+
+
+# 'cprofile' traces every call; 'sampling' records the stack at intervals
+PROFILE_MODES = ('cprofile', 'sampling')
+
+# Seconds between stack samples in sampling mode
+SAMPLING_INTERVAL = 0.005
+
+# Functions listed in the text summary
+SUMMARY_FUNCTIONS = 50
+
+# Profiler running in this process; a forked worker inherits it from its parent
+_active_profiler = None
+
+
+def worker_profile_path(output_file, pid):
+    """
+    Get the profile path of a worker process, next to the scan's profile.
+    
+    Args:
+        output_file (str): Profile path of the scan
+        pid (int): Process id of the worker
+        
+    Returns:
+        Path: The scan's path with '.worker-PID' before its extension
+            (scan.prof: scan.worker-PID.prof)
+    """
+    output_path = Path(output_file)
+    return output_path.with_name(f"{output_path.stem}.worker-{pid}{output_path.suffix}")
+
+
+class ScanProfiler:
+    """
+    Profiles one process of a scan.
+    
+    In 'cprofile' mode every call is traced and the profile is written in
+    pstats format, for pstats, snakeviz and similar tools. In 'sampling'
+    mode the Python stack is recorded every SAMPLING_INTERVAL seconds of
+    wall-clock time, with little overhead, and written as collapsed stacks
+    ('outer;inner;leaf count' lines) for flame graph tools. Sampling needs
+    Unix interval timers and the main thread.
+    
+    Worker processes profile themselves into worker_profile_path() files;
+    write_summary() combines those with the main profile.
+    """
+    
+    def __init__(self, output_file, mode='cprofile'):
+        """
+        Initialize the ScanProfiler.
+        
+        Args:
+            output_file (str): Profile output path
+            mode (str): 'cprofile' or 'sampling'
+        """
+        # Imported here, like the profilers, so that importing PROFILE_MODES stays cheap
+        import signal
+        
+        if mode not in PROFILE_MODES:
+            raise ValueError(f"Unknown profile mode: {mode} (available: {', '.join(PROFILE_MODES)})")
+        if mode == 'sampling' and not hasattr(signal, 'setitimer'):
+            raise ValueError("Sampling profiles need Unix interval timers; use --profile-mode cprofile")
+        
+        self.output_path = Path(output_file)
+        self.mode = mode
+        self._profile = None
+        self._samples = None
+        self._previous_handler = None
+    
+    @property
+    def summary_path(self):
+        """Path of the text summary."""
+        return self.output_path.with_name(self.output_path.name + '.txt')
+    
+    def worker_files(self):
+        """Get the profiles written by worker processes."""
+        pattern = f"{self.output_path.stem}.worker-*{self.output_path.suffix}"
+        return sorted(self.output_path.parent.glob(pattern))
+    
+    def clear_worker_files(self):
+        """Remove worker profiles left by an earlier scan."""
+        for worker_file in self.worker_files():
+            worker_file.unlink(missing_ok=True)
+    
+    def start(self):
+        """Start profiling this process."""
+        global _active_profiler
+        
+        # A forked worker starts with its parent's profiler still attached
+        if _active_profiler is not None:
+            _active_profiler._detach()
+        
+        if self.mode == 'cprofile':
+            # Imported here so that scans without --profile don't load them
+            import cProfile
+            
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+        else:
+            import signal
+            
+            self._samples = Counter()
+            try:
+                self._previous_handler = signal.signal(signal.SIGALRM, self._sample)
+            except ValueError:
+                raise ValueError("Sampling profiles can only be taken in the main thread")
+            signal.setitimer(signal.ITIMER_REAL, SAMPLING_INTERVAL, SAMPLING_INTERVAL)
+        
+        _active_profiler = self
+    
+    def stop(self):
+        """Stop profiling and write the profile of this process."""
+        global _active_profiler
+        
+        if _active_profiler is not self:
+            return
+        self._detach()
+        _active_profiler = None
+        
+        if self.mode == 'cprofile':
+            self._profile.dump_stats(str(self.output_path))
+        else:
+            with open(self.output_path, 'w', encoding='utf-8') as f:
+                for stack, count in self._samples.most_common():
+                    f.write(f"{';'.join(_frame_label(frame) for frame in stack)} {count}\n")
+    
+    def _detach(self):
+        """Stop collecting without writing anything."""
+        if self.mode == 'cprofile':
+            self._profile.disable()
+        else:
+            import signal
+            
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            signal.signal(signal.SIGALRM, self._previous_handler or signal.SIG_DFL)
+    
+    def _sample(self, signum, frame):
+        """Record the interrupted stack, outermost frame first."""
+        stack = []
+        while frame is not None:
+            code = frame.f_code
+            stack.append((code.co_filename, code.co_firstlineno, code.co_name))
+            frame = frame.f_back
+        stack.reverse()
+        self._samples[tuple(stack)] += 1
+    
+    def write_summary(self, title=None):
+        """
+        Write the text summary of this process's and the workers' profiles.
+        
+        The SUMMARY_FUNCTIONS functions with the most cumulative time (or
+        samples) are listed, over all profiled processes.
+        
+        Args:
+            title (str): First line of the summary (optional)
+        
+        Returns:
+            Path: Summary path
+        """
+        worker_files = self.worker_files()
+        profiles = [self.output_path] + worker_files
+        
+        with open(self.summary_path, 'w', encoding='utf-8') as f:
+            if title:
+                f.write(f"{title}\n")
+            f.write(f"Mode: {self.mode}\n")
+            f.write(f"Profiles: {', '.join(str(path) for path in profiles)}\n\n")
+            
+            if self.mode == 'cprofile':
+                import pstats
+                
+                stats = pstats.Stats(*(str(path) for path in profiles), stream=f)
+                stats.sort_stats('cumulative').print_stats(SUMMARY_FUNCTIONS)
+            else:
+                _write_sample_summary(profiles, f)
+        
+        return self.summary_path
+
+
+def _frame_label(frame):
+    """Format a (filename, first line, function) frame for collapsed stacks."""
+    filename, first_line, name = frame
+    return f"{name} ({Path(filename).name}:{first_line})"
+
+
+def _write_sample_summary(profiles, output):
+    """
+    Write the functions with the most samples in collapsed stack files.
+    
+    Cumulative samples count every sample a function was on the stack for,
+    self samples those it was executing itself.
+    """
+    cumulative = Counter()
+    own = Counter()
+    total = 0
+    
+    for profile in profiles:
+        with open(profile, encoding='utf-8') as f:
+            for line in f:
+                stack, _, count = line.rstrip('\n').rpartition(' ')
+                if not stack:
+                    continue
+                count = int(count)
+                frames = stack.split(';')
+                total += count
+                own[frames[-1]] += count
+                for frame in set(frames):
+                    cumulative[frame] += count
+    
+    output.write(f"{total} samples, {SAMPLING_INTERVAL * 1000:g} ms apart\n\n")
+    if not total:
+        return
+    
+    output.write(f"{'cumulative':>12} {'self':>12}  function\n")
+    for frame, count in cumulative.most_common(SUMMARY_FUNCTIONS):
+        output.write(
+            f"{count:>6} {count / total:6.1%} {own[frame]:>5} {own[frame] / total:6.1%}  {frame}\n"
+        )
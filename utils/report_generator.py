@@ -5,10 +5,77 @@ Report generation utilities for file analysis results.
 import json
 import csv
 import io
-from datetime import datetime
-from collections import Counter, defaultdict
+import sys
+from collections import Counter
 from pathlib import Path
 
+from utils.accumulators import Histogram, MinMax, MonthCounter, QuantileSketch, Summary, TopK
+from utils.file_record import export_entry, json_default
+from utils.timestamps import format_timestamp, timestamp_ns
+
+
+# Size histogram buckets: < 1KB, 1KB - 10KB, 10KB - 100KB, 100KB - 1MB, >= 1MB
+SIZE_CATEGORY_EDGES = (1024, 10240, 102400, 1048576)
+SIZE_CATEGORIES = ('tiny', 'small', 'medium', 'large', 'very_large')
+
+# Percentiles reported in the size distribution
+SIZE_PERCENTILES = (10, 25, 50, 75, 90, 95, 99)
+
+# Implementations of the size and timestamp statistics
+STATISTICS_BACKENDS = ('python', 'numpy')
+
+# Formats written record by record while files are analyzed
+STREAMING_FORMATS = ('ndjson', 'sqlite')
+
+
+def format_size(size_bytes):
+    """Format file size in human-readable format."""
+    for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
+        if size_bytes < 1024.0:
+            return f"{size_bytes:.1f} {unit}"
+        size_bytes /= 1024.0
+    return f"{size_bytes:.1f} PB"
+
+
+def _percentiles(sorted_sizes):
+    """Get p10-p99 percentiles of an already sorted size list."""
+    if not sorted_sizes:
+        return {}
+    
+    length = len(sorted_sizes)
+    
+    percentiles = {}
+    for p in SIZE_PERCENTILES:
+        index = int(length * p / 100)
+        if index >= length:
+            index = length - 1
+        percentiles[f'p{p}'] = sorted_sizes[index]
+    
+    return percentiles
+
+
+def month_histograms(month_counts):
+    """
+    Build the modification histograms by year and by month.
+    
+    Args:
+        month_counts (iterable): ((year, month), count) pairs in chronological order
+    
+    Returns:
+        dict: 'modification_by_year' in chronological order and
+            'modification_by_month' with the 12 busiest months
+    """
+    years = Counter()
+    months = Counter()
+    for (year, month), count in month_counts:
+        years[year] += count
+        months[f"{year}-{month:02d}"] += count
+    
+    return {
+        'modification_by_year': dict(years),
+        'modification_by_month': dict(months.most_common(12))
+    }
+
 
 class ReportGenerator:
     """Generates various types of reports from analysis results."""
@@ -21,247 +88,20 @@ class ReportGenerator:
         """
         Generate comprehensive statistics from analysis results.
         
+        The file list is read once; FileAnalyzer instead feeds a
+        StatisticsAccumulator while it scans.
+        
         Args:
             analysis_results (dict): Analysis results
-            
+        
         Returns:
             dict: Statistics
         """
-        stats = {
-            'overview': {},
-            'file_types': {},
-            'size_distribution': {},
-            'security_summary': {},
-            'quality_summary': {},
-            'content_patterns': {},
-            'timestamps': {}
-        }
-        
-        files = analysis_results.get('file_analysis', [])
-        
-        if not files:
-            return stats
-        
-        # Overview statistics
-        stats['overview'] = self._generate_overview_stats(files, analysis_results)
-        
-        # File type statistics
-        stats['file_types'] = self._generate_file_type_stats(files)
-        
-        # Size distribution
-        stats['size_distribution'] = self._generate_size_stats(files)
-        
-        # Security summary
-        stats['security_summary'] = self._generate_security_stats(files)
-        
-        # Quality summary
-        stats['quality_summary'] = self._generate_quality_stats(files)
-        
-        # Content patterns
-        stats['content_patterns'] = self._generate_pattern_stats(files)
+        accumulator = StatisticsAccumulator()
+        for file_data in analysis_results.get('file_analysis', []):
+            accumulator.add(file_data)
         
-        # Timestamp analysis
-        stats['timestamps'] = self._generate_timestamp_stats(files)
-        
-        return stats
-    
-    def _generate_overview_stats(self, files, analysis_results):
-        """Generate overview statistics."""
-        total_files = len(files)
-        total_size = sum(f.get('metadata', {}).get('size', 0) for f in files)
-        
-        text_files = sum(1 for f in files if f.get('content_analysis', {}).get('file_type_analysis', {}).get('is_text', False))
-        binary_files = total_files - text_files
-        
-        readable_files = sum(1 for f in files if not f.get('content_analysis', {}).get('error'))
-        
-        scan_info = analysis_results.get('scan_info', {})
-        
-        return {
-            'total_files': total_files,
-            'text_files': text_files,
-            'binary_files': binary_files,
-            'readable_files': readable_files,
-            'unreadable_files': total_files - readable_files,
-            'total_size': total_size,
-            'total_size_formatted': self._format_size(total_size),
-            'average_file_size': total_size / total_files if total_files > 0 else 0,
-            'scan_duration': scan_info.get('scan_duration', 0),
-            'errors_count': len(analysis_results.get('errors', []))
-        }
-    
-    def _generate_file_type_stats(self, files):
-        """Generate file type statistics."""
-        extensions = []
-        categories = []
-        mime_types = []
-        
-        for file_data in files:
-            metadata = file_data.get('metadata', {})
-            content_analysis = file_data.get('content_analysis', {})
-            file_type_analysis = content_analysis.get('file_type_analysis', {})
-            
-            extensions.append(metadata.get('suffix', '').lower())
-            categories.append(file_type_analysis.get('category', 'unknown'))
-            mime_types.append(file_type_analysis.get('mime_type', 'unknown'))
-        
-        return {
-            'by_extension': dict(Counter(extensions).most_common()),
-            'by_category': dict(Counter(categories).most_common()),
-            'by_mime_type': dict(Counter(mime_types).most_common()),
-            'unique_extensions': len(set(extensions)),
-            'unique_categories': len(set(categories)),
-            'unique_mime_types': len(set(mime_types))
-        }
-    
-    def _generate_size_stats(self, files):
-        """Generate file size statistics."""
-        sizes = [f.get('metadata', {}).get('size', 0) for f in files]
-        
-        if not sizes:
-            return {}
-        
-        sizes.sort()
-        
-        # Size categories
-        size_categories = {
-            'tiny': sum(1 for s in sizes if s < 1024),  # < 1KB
-            'small': sum(1 for s in sizes if 1024 <= s < 10240),  # 1KB - 10KB
-            'medium': sum(1 for s in sizes if 10240 <= s < 102400),  # 10KB - 100KB
-            'large': sum(1 for s in sizes if 102400 <= s < 1048576),  # 100KB - 1MB
-            'very_large': sum(1 for s in sizes if s >= 1048576)  # >= 1MB
-        }
-        
-        return {
-            'total_size': sum(sizes),
-            'average_size': sum(sizes) / len(sizes),
-            'median_size': sizes[len(sizes) // 2],
-            'min_size': min(sizes),
-            'max_size': max(sizes),
-            'size_categories': size_categories,
-            'largest_files': self._get_largest_files(files, 5),
-            'size_distribution': self._get_size_distribution(sizes)
-        }
-    
-    def _generate_security_stats(self, files):
-        """Generate security statistics."""
-        total_issues = 0
-        risk_levels = []
-        issue_types = []
-        files_with_issues = 0
-        
-        for file_data in files:
-            security_analysis = file_data.get('content_analysis', {}).get('security_analysis', {})
-            
-            if security_analysis:
-                issues_count = security_analysis.get('issues_found', 0)
-                total_issues += issues_count
-                
-                if issues_count > 0:
-                    files_with_issues += 1
-                    risk_levels.append(security_analysis.get('risk_level', 'low'))
-                    
-                    for issue in security_analysis.get('issues', []):
-                        issue_types.append(issue.get('type', 'unknown'))
-        
-        return {
-            'total_security_issues': total_issues,
-            'files_with_security_issues': files_with_issues,
-            'security_issue_rate': files_with_issues / len(files) if files else 0,
-            'risk_level_distribution': dict(Counter(risk_levels)),
-            'issue_type_distribution': dict(Counter(issue_types).most_common()),
-            'high_risk_files': sum(1 for level in risk_levels if level == 'high')
-        }
-    
-    def _generate_quality_stats(self, files):
-        """Generate quality statistics."""
-        quality_metrics = defaultdict(list)
-        
-        for file_data in files:
-            quality_analysis = file_data.get('content_analysis', {}).get('quality_metrics', {})
-            
-            if quality_analysis:
-                complexity = quality_analysis.get('complexity_indicators', {})
-                
-                for metric, value in complexity.items():
-                    if isinstance(value, (int, float)):
-                        quality_metrics[metric].append(value)
-        
-        # Calculate averages
-        average_metrics = {}
-        for metric, values in quality_metrics.items():
-            if values:
-                average_metrics[f'average_{metric}'] = sum(values) / len(values)
-                average_metrics[f'max_{metric}'] = max(values)
-        
-        return {
-            'files_analyzed_for_quality': len([f for f in files if f.get('content_analysis', {}).get('quality_metrics')]),
-            'average_metrics': average_metrics,
-            'code_files_with_comments': self._count_files_with_comments(files),
-            'code_files_with_docstrings': self._count_files_with_docstrings(files)
-        }
-    
-    def _generate_pattern_stats(self, files):
-        """Generate content pattern statistics."""
-        pattern_totals = defaultdict(int)
-        pattern_files = defaultdict(int)
-        
-        for file_data in files:
-            patterns = file_data.get('content_analysis', {}).get('content_patterns', {})
-            
-            for pattern_name, pattern_data in patterns.items():
-                if isinstance(pattern_data, dict) and 'count' in pattern_data:
-                    count = pattern_data['count']
-                    pattern_totals[pattern_name] += count
-                    if count > 0:
-                        pattern_files[pattern_name] += 1
-        
-        return {
-            'pattern_totals': dict(pattern_totals),
-            'files_with_patterns': dict(pattern_files),
-            'most_common_patterns': dict(Counter(pattern_totals).most_common(10))
-        }
-    
-    def _generate_timestamp_stats(self, files):
-        """Generate timestamp statistics."""
-        created_dates = []
-        modified_dates = []
-        
-        for file_data in files:
-            metadata = file_data.get('metadata', {})
-            
-            if metadata.get('created'):
-                try:
-                    created_dates.append(datetime.fromisoformat(metadata['created'].replace('Z', '+00:00')))
-                except:
-                    pass
-            
-            if metadata.get('modified'):
-                try:
-                    modified_dates.append(datetime.fromisoformat(metadata['modified'].replace('Z', '+00:00')))
-                except:
-                    pass
-        
-        stats = {}
-        
-        if created_dates:
-            created_dates.sort()
-            stats['oldest_file'] = created_dates[0].isoformat()
-            stats['newest_file'] = created_dates[-1].isoformat()
-        
-        if modified_dates:
-            modified_dates.sort()
-            stats['oldest_modification'] = modified_dates[0].isoformat()
-            stats['newest_modification'] = modified_dates[-1].isoformat()
-            
-            # Modification activity by year/month
-            modification_years = [d.year for d in modified_dates]
-            modification_months = [f"{d.year}-{d.month:02d}" for d in modified_dates]
-            
-            stats['modification_by_year'] = dict(Counter(modification_years))
-            stats['modification_by_month'] = dict(Counter(modification_months).most_common(12))
-        
-        return stats
+        return accumulator.finalize(analysis_results)
     
     def save_report(self, analysis_results, output_file, format_type='json'):
         """
@@ -270,7 +110,7 @@ class ReportGenerator:
         Args:
             analysis_results (dict): Analysis results
             output_file (str): Output file path
-            format_type (str): Output format ('json', 'csv', 'txt')
+            format_type (str): Output format ('json', 'csv', 'txt', 'ndjson', 'sqlite')
         """
         output_path = Path(output_file)
         
@@ -280,13 +120,45 @@ class ReportGenerator:
             self._save_csv_report(analysis_results, output_path)
         elif format_type == 'txt':
             self._save_text_report(analysis_results, output_path)
+        elif format_type in STREAMING_FORMATS:
+            self._save_streamed_report(analysis_results, output_path, format_type)
         else:
             raise ValueError(f"Unsupported format: {format_type}")
     
     def _save_json_report(self, analysis_results, output_path):
         """Save report as JSON."""
         with open(output_path, 'w', encoding='utf-8') as f:
-            json.dump(analysis_results, f, indent=2, default=str, ensure_ascii=False)
+            json.dump(analysis_results, f, indent=2, default=json_default, ensure_ascii=False)
+    
+    def _save_streamed_report(self, analysis_results, output_path, format_type):
+        """Save report as newline-delimited JSON or a SQLite database."""
+        writer = self.open_stream(output_path, format_type)
+        try:
+            for file_data in analysis_results.get('file_analysis', []):
+                writer.write_file(file_data)
+            writer.write_summary(analysis_results)
+        finally:
+            writer.close()
+    
+    def open_stream(self, output_file=None, format_type='ndjson'):
+        """
+        Open a streaming report.
+        
+        Args:
+            output_file (str): Output file path (standard output if omitted;
+                required for 'sqlite')
+            format_type (str): Streaming format ('ndjson', 'sqlite')
+        
+        Returns:
+            NDJSONReportWriter or SQLiteReportWriter: Writer for file and summary records
+        """
+        if format_type == 'sqlite':
+            # sqlite3 is only loaded for SQLite reports
+            from utils.sqlite_report import SQLiteReportWriter
+            return SQLiteReportWriter(output_file)
+        if format_type == 'ndjson':
+            return NDJSONReportWriter(output_file)
+        raise ValueError(f"Unsupported streaming format: {format_type}")
     
     def _save_csv_report(self, analysis_results, output_path):
         """Save report as CSV."""
@@ -317,8 +189,8 @@ class ReportGenerator:
                     'extension': metadata.get('suffix', ''),
                     'category': file_type_analysis.get('category', ''),
                     'mime_type': file_type_analysis.get('mime_type', ''),
-                    'created': metadata.get('created', ''),
-                    'modified': metadata.get('modified', ''),
+                    'created': format_timestamp(metadata.get('created', '')),
+                    'modified': format_timestamp(metadata.get('modified', '')),
                     'is_text': file_type_analysis.get('is_text', False),
                     'is_binary': file_type_analysis.get('is_binary', False),
                     'security_issues': security_analysis.get('issues_found', 0),
@@ -345,7 +217,18 @@ class ReportGenerator:
             f.write(f"Duration: {scan_info.get('scan_duration', 0):.2f} seconds\n")
             f.write(f"Total Files: {scan_info.get('total_files', 0)}\n")
             f.write(f"Total Directories: {scan_info.get('total_directories', 0)}\n")
-            f.write(f"Total Size: {self._format_size(scan_info.get('total_size', 0))}\n\n")
+            f.write(f"Total Size: {self._format_size(scan_info.get('total_size', 0))}\n")
+            
+            cache_info = scan_info.get('cache')
+            if cache_info:
+                f.write(f"Cache Hits: {cache_info.get('hits', 0)}\n")
+                f.write(f"Cache Misses: {cache_info.get('misses', 0)}\n")
+                f.write(f"Cache Hit Rate: {cache_info.get('hit_rate', 0):.1%}\n")
+            
+            content_memo = scan_info.get('content_memo')
+            if content_memo:
+                f.write(f"Content Analyses Skipped (identical content): {content_memo.get('analyses_skipped', 0)}\n")
+            f.write("\n")
             
             # Write statistics
             stats = analysis_results.get('statistics', {})
@@ -380,6 +263,23 @@ class ReportGenerator:
                     f.write(f"Files with Issues: {security.get('files_with_security_issues', 0)}\n")
                     f.write(f"High Risk Files: {security.get('high_risk_files', 0)}\n\n")
             
+            # Write duplicate files
+            duplicates = analysis_results.get('duplicates')
+            if duplicates:
+                f.write("DUPLICATE FILES\n")
+                f.write("-" * 30 + "\n")
+                f.write(f"Duplicate Groups: {duplicates.get('group_count', 0)}\n")
+                f.write(f"Redundant Copies: {duplicates.get('duplicate_files', 0)}\n")
+                f.write(f"Reclaimable Space: {self._format_size(duplicates.get('reclaimable_bytes', 0))}\n")
+                f.write(f"Hardlinked Paths (not counted as copies): {duplicates.get('hardlinked_paths', 0)}\n\n")
+                for group in duplicates.get('groups', [])[:10]:  # Show 10 largest groups
+                    f.write(f"{group['count']} copies of {self._format_size(group['size'])}:\n")
+                    for path in group['paths']:
+                        f.write(f"  {path}\n")
+                if len(duplicates.get('groups', [])) > 10:
+                    f.write(f"... and {len(duplicates['groups']) - 10} more groups\n")
+                f.write("\n")
+            
             # Write errors if any
             errors = analysis_results.get('errors', [])
             if errors:
@@ -397,72 +297,464 @@ class ReportGenerator:
     
     def _format_size(self, size_bytes):
         """Format file size in human-readable format."""
-        for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
-            if size_bytes < 1024.0:
-                return f"{size_bytes:.1f} {unit}"
-            size_bytes /= 1024.0
-        return f"{size_bytes:.1f} PB"
-    
-    def _get_largest_files(self, files, count=5):
-        """Get largest files."""
-        sorted_files = sorted(
-            files,
-            key=lambda f: f.get('metadata', {}).get('size', 0),
-            reverse=True
-        )
-        
-        return [
-            {
-                'path': f.get('path', ''),
-                'size': f.get('metadata', {}).get('size', 0),
-                'size_formatted': self._format_size(f.get('metadata', {}).get('size', 0))
-            }
-            for f in sorted_files[:count]
-        ]
-    
-    def _get_size_distribution(self, sizes):
-        """Get size distribution percentiles."""
-        if not sizes:
-            return {}
-        
-        sorted_sizes = sorted(sizes)
-        length = len(sorted_sizes)
-        
-        percentiles = {}
-        for p in [10, 25, 50, 75, 90, 95, 99]:
-            index = int(length * p / 100)
-            if index >= length:
-                index = length - 1
-            percentiles[f'p{p}'] = sorted_sizes[index]
-        
-        return percentiles
-    
-    def _count_files_with_comments(self, files):
-        """Count code files that have comments."""
-        count = 0
-        
-        for file_data in files:
-            content_analysis = file_data.get('content_analysis', {})
-            file_type_analysis = content_analysis.get('file_type_analysis', {})
-            quality_metrics = content_analysis.get('quality_metrics', {})
+        return format_size(size_bytes)
+
+
+class StatisticsAccumulator:
+    """
+    Running statistics over per-file analysis entries.
+    
+    Each entry is folded in once as it is analyzed, using counters, sums,
+    min/max, a top-K heap and a size histogram, so statistics are ready when
+    the scan ends without another pass over the file list. Accumulators of
+    disjoint sets of files can be combined with merge(). finalize() returns
+    the structure of ReportGenerator.generate_statistics.
+    
+    Size percentiles are exact by default, which needs every size. With a
+    sketch threshold, sizes beyond it are folded into a QuantileSketch and
+    the percentiles are estimated in bounded memory instead. The 'numpy'
+    backend keeps sizes and timestamps in int64 columns (ArrayStatistics)
+    and aggregates them with vectorized operations in finalize().
+    """
+    
+    def __init__(self, largest_files_count=5, sketch_threshold=None, backend='python'):
+        """
+        Initialize the StatisticsAccumulator.
+        
+        Args:
+            largest_files_count (int): Number of largest files to keep
+            sketch_threshold (int): Number of sizes kept for exact percentiles
+                before switching to a QuantileSketch (None keeps every size,
+                0 always estimates)
+            backend (str): 'python', or 'numpy' for the NumPy size and
+                timestamp columns
+        """
+        if backend not in STATISTICS_BACKENDS:
+            raise ValueError(f"Unknown statistics backend: {backend}")
+        if backend == 'numpy' and sketch_threshold is not None:
+            raise ValueError("Size percentile sketches are not supported by the numpy statistics backend")
+        
+        # Overview
+        self.total_files = 0
+        self.text_files = 0
+        self.readable_files = 0
+        
+        # File types
+        self.extensions = Counter()
+        self.categories = Counter()
+        self.mime_types = Counter()
+        
+        # Sizes; the exact percentiles need every size
+        self.size_summary = Summary()
+        self.sizes = []
+        self.sketch_threshold = sketch_threshold
+        self.size_sketch = None
+        self.size_categories = Histogram(SIZE_CATEGORY_EDGES, SIZE_CATEGORIES)
+        self.largest_files = TopK(largest_files_count)
+        
+        # NumPy columns replacing the size and timestamp aggregates
+        self.arrays = None
+        if backend == 'numpy':
+            from utils.array_statistics import ArrayStatistics
             
-            if (file_type_analysis.get('category') == 'code' and
-                quality_metrics.get('best_practices', {}).get('has_comments')):
-                count += 1
+            self.arrays = ArrayStatistics()
+        
+        # Security
+        self.total_security_issues = 0
+        self.files_with_security_issues = 0
+        self.risk_levels = Counter()
+        self.issue_types = Counter()
+        
+        # Quality
+        self.files_analyzed_for_quality = 0
+        self.metrics = {}
+        self.code_files_with_comments = 0
+        self.code_files_with_docstrings = 0
+        
+        # Content patterns
+        self.pattern_totals = Counter()
+        self.pattern_files = Counter()
         
-        return count
+        # Timestamps, as nanoseconds since the epoch
+        self.created = MinMax()
+        self.modified = MinMax()
+        self.modification_months = MonthCounter()
     
-    def _count_files_with_docstrings(self, files):
-        """Count code files that have docstrings."""
-        count = 0
+    def add(self, file_data):
+        """
+        Fold one per-file analysis entry into the statistics.
+        
+        Args:
+            file_data (dict): Per-file analysis entry
+        """
+        metadata = file_data.get('metadata', {})
+        content_analysis = file_data.get('content_analysis', {})
+        file_type_analysis = content_analysis.get('file_type_analysis', {})
+        size = metadata.get('size', 0)
+        
+        # Overview
+        self.total_files += 1
+        if file_type_analysis.get('is_text', False):
+            self.text_files += 1
+        if not content_analysis.get('error'):
+            self.readable_files += 1
+        
+        # File types
+        self.extensions[metadata.get('suffix', '').lower()] += 1
+        self.categories[file_type_analysis.get('category', 'unknown')] += 1
+        self.mime_types[file_type_analysis.get('mime_type', 'unknown')] += 1
+        
+        # Sizes and timestamps
+        self.size_summary.add(size)
+        self.largest_files.add(size, file_data.get('path', ''))
+        if self.arrays is not None:
+            self.arrays.add(
+                size,
+                timestamp_ns(metadata.get('created')),
+                timestamp_ns(metadata.get('modified'))
+            )
+        else:
+            self._add_size(size)
+            self._add_timestamps(metadata)
+        
+        # Security
+        security_analysis = content_analysis.get('security_analysis', {})
+        if security_analysis:
+            issues_count = security_analysis.get('issues_found', 0)
+            self.total_security_issues += issues_count
+            
+            if issues_count > 0:
+                self.files_with_security_issues += 1
+                self.risk_levels[security_analysis.get('risk_level', 'low')] += 1
+                
+                for issue in security_analysis.get('issues', []):
+                    self.issue_types[issue.get('type', 'unknown')] += 1
         
-        for file_data in files:
-            content_analysis = file_data.get('content_analysis', {})
-            file_type_analysis = content_analysis.get('file_type_analysis', {})
-            quality_metrics = content_analysis.get('quality_metrics', {})
+        # Quality
+        quality_analysis = content_analysis.get('quality_metrics', {})
+        if quality_analysis:
+            self.files_analyzed_for_quality += 1
             
-            if (file_type_analysis.get('category') == 'code' and
-                quality_metrics.get('best_practices', {}).get('has_docstrings')):
-                count += 1
+            for metric, value in quality_analysis.get('complexity_indicators', {}).items():
+                if isinstance(value, (int, float)):
+                    summary = self.metrics.get(metric)
+                    if summary is None:
+                        summary = self.metrics[metric] = Summary()
+                    summary.add(value)
+        
+        if file_type_analysis.get('category') == 'code':
+            best_practices = quality_analysis.get('best_practices', {})
+            if best_practices.get('has_comments'):
+                self.code_files_with_comments += 1
+            if best_practices.get('has_docstrings'):
+                self.code_files_with_docstrings += 1
+        
+        # Content patterns
+        for pattern_name, pattern_data in content_analysis.get('content_patterns', {}).items():
+            if isinstance(pattern_data, dict) and 'count' in pattern_data:
+                count = pattern_data['count']
+                self.pattern_totals[pattern_name] += count
+                if count > 0:
+                    self.pattern_files[pattern_name] += 1
+    
+    def _add_size(self, size):
+        """Add a size to the histogram and the percentile sizes or sketch."""
+        self.size_categories.add(size)
+        if self.size_sketch is not None:
+            self.size_sketch.add(size)
+        else:
+            self.sizes.append(size)
+            self._check_sketch_threshold()
+    
+    def _add_timestamps(self, metadata):
+        """Add the creation and modification times of a file."""
+        created = timestamp_ns(metadata.get('created'))
+        if created is not None:
+            self.created.add(created)
+        
+        modified = timestamp_ns(metadata.get('modified'))
+        if modified is not None:
+            self.modified.add(modified)
+            self.modification_months.add(modified)
+    
+    def merge(self, other):
+        """
+        Fold in the statistics of another accumulator.
+        
+        The other accumulator's files count as added after this one's.
+        Float metric averages may differ from a single pass in the last digits.
+        
+        Args:
+            other (StatisticsAccumulator): Statistics of a disjoint set of
+                files, using the same backend
+        """
+        if (self.arrays is None) != (other.arrays is None):
+            raise ValueError("Cannot merge statistics of different backends")
+        
+        self.total_files += other.total_files
+        self.text_files += other.text_files
+        self.readable_files += other.readable_files
+        
+        self.extensions.update(other.extensions)
+        self.categories.update(other.categories)
+        self.mime_types.update(other.mime_types)
+        
+        self.size_summary.merge(other.size_summary)
+        self.largest_files.merge(other.largest_files)
+        if self.arrays is not None:
+            self.arrays.merge(other.arrays)
+        else:
+            self._merge_sizes(other)
+            self.size_categories.merge(other.size_categories)
+            self.created.merge(other.created)
+            self.modified.merge(other.modified)
+            self.modification_months.merge(other.modification_months)
+        
+        self.total_security_issues += other.total_security_issues
+        self.files_with_security_issues += other.files_with_security_issues
+        self.risk_levels.update(other.risk_levels)
+        self.issue_types.update(other.issue_types)
+        
+        self.files_analyzed_for_quality += other.files_analyzed_for_quality
+        for metric, other_summary in other.metrics.items():
+            summary = self.metrics.get(metric)
+            if summary is None:
+                summary = self.metrics[metric] = Summary()
+            summary.merge(other_summary)
+        self.code_files_with_comments += other.code_files_with_comments
+        self.code_files_with_docstrings += other.code_files_with_docstrings
+        
+        self.pattern_totals.update(other.pattern_totals)
+        self.pattern_files.update(other.pattern_files)
+    
+    def _check_sketch_threshold(self):
+        """Switch to a sketch once the kept sizes exceed the threshold."""
+        if self.sketch_threshold is not None and len(self.sizes) > self.sketch_threshold:
+            self._start_sketch()
+    
+    def _start_sketch(self):
+        """Move the kept sizes into a QuantileSketch."""
+        self.size_sketch = QuantileSketch()
+        for size in self.sizes:
+            self.size_sketch.add(size)
+        self.sizes = []
+    
+    def _merge_sizes(self, other):
+        """Fold in the sizes of another accumulator, sketched if either one is."""
+        if other.size_sketch is not None and self.size_sketch is None:
+            self._start_sketch()
+        
+        if self.size_sketch is None:
+            self.sizes.extend(other.sizes)
+            self._check_sketch_threshold()
+        elif other.size_sketch is not None:
+            self.size_sketch.merge(other.size_sketch)
+        else:
+            for size in other.sizes:
+                self.size_sketch.add(size)
+    
+    def _size_percentiles(self):
+        """
+        Get the median and the size percentiles.
+        
+        Returns:
+            tuple: (median size, percentiles dict), estimated when sketched
+        """
+        if self.size_sketch is None:
+            sizes = sorted(self.sizes)
+            return sizes[len(sizes) // 2], _percentiles(sizes)
+        
+        fractions = [0.5] + [p / 100 for p in SIZE_PERCENTILES]
+        median, *values = self.size_sketch.quantiles(fractions)
+        return median, {f'p{p}': value for p, value in zip(SIZE_PERCENTILES, values)}
+    
+    def finalize(self, analysis_results):
+        """
+        Build the statistics structure.
+        
+        Args:
+            analysis_results (dict): Analysis results, used for scan info and errors
+        
+        Returns:
+            dict: Statistics
+        """
+        stats = {
+            'overview': {},
+            'file_types': {},
+            'size_distribution': {},
+            'security_summary': {},
+            'quality_summary': {},
+            'content_patterns': {},
+            'timestamps': {}
+        }
         
-        return count
+        if not self.total_files:
+            return stats
+        
+        total_files = self.total_files
+        total_size = self.size_summary.total
+        scan_info = analysis_results.get('scan_info', {})
+        
+        stats['overview'] = {
+            'total_files': total_files,
+            'text_files': self.text_files,
+            'binary_files': total_files - self.text_files,
+            'readable_files': self.readable_files,
+            'unreadable_files': total_files - self.readable_files,
+            'total_size': total_size,
+            'total_size_formatted': format_size(total_size),
+            'average_file_size': self.size_summary.mean,
+            'scan_duration': scan_info.get('scan_duration', 0),
+            'errors_count': len(analysis_results.get('errors', []))
+        }
+        
+        stats['file_types'] = {
+            'by_extension': dict(self.extensions.most_common()),
+            'by_category': dict(self.categories.most_common()),
+            'by_mime_type': dict(self.mime_types.most_common()),
+            'unique_extensions': len(self.extensions),
+            'unique_categories': len(self.categories),
+            'unique_mime_types': len(self.mime_types)
+        }
+        
+        if self.arrays is not None:
+            counts, median_size, percentiles = self.arrays.size_statistics(SIZE_CATEGORY_EDGES, SIZE_PERCENTILES)
+            size_categories = dict(zip(SIZE_CATEGORIES, counts))
+        else:
+            median_size, percentiles = self._size_percentiles()
+            size_categories = self.size_categories.to_dict()
+        
+        stats['size_distribution'] = {
+            'total_size': total_size,
+            'average_size': self.size_summary.mean,
+            'median_size': median_size,
+            'min_size': self.size_summary.min,
+            'max_size': self.size_summary.max,
+            'size_categories': size_categories,
+            'largest_files': [
+                {
+                    'path': path,
+                    'size': size,
+                    'size_formatted': format_size(size)
+                }
+                for size, path in self.largest_files.items()
+            ],
+            'size_distribution': percentiles
+        }
+        if self.size_sketch is not None:
+            stats['size_distribution']['percentiles_estimated'] = True
+            stats['size_distribution']['percentile_rank_error'] = self.size_sketch.rank_error
+        
+        stats['security_summary'] = {
+            'total_security_issues': self.total_security_issues,
+            'files_with_security_issues': self.files_with_security_issues,
+            'security_issue_rate': self.files_with_security_issues / total_files,
+            'risk_level_distribution': dict(self.risk_levels),
+            'issue_type_distribution': dict(self.issue_types.most_common()),
+            'high_risk_files': self.risk_levels['high']
+        }
+        
+        average_metrics = {}
+        for metric, summary in self.metrics.items():
+            average_metrics[f'average_{metric}'] = summary.mean
+            average_metrics[f'max_{metric}'] = summary.max
+        
+        stats['quality_summary'] = {
+            'files_analyzed_for_quality': self.files_analyzed_for_quality,
+            'average_metrics': average_metrics,
+            'code_files_with_comments': self.code_files_with_comments,
+            'code_files_with_docstrings': self.code_files_with_docstrings
+        }
+        
+        stats['content_patterns'] = {
+            'pattern_totals': dict(self.pattern_totals),
+            'files_with_patterns': dict(self.pattern_files),
+            'most_common_patterns': dict(self.pattern_totals.most_common(10))
+        }
+        
+        if self.arrays is not None:
+            timestamps, month_counts = self.arrays.timestamp_statistics()
+            if month_counts:
+                timestamps.update(month_histograms(month_counts))
+            stats['timestamps'] = timestamps
+        else:
+            stats['timestamps'] = self._timestamp_statistics()
+        
+        return stats
+    
+    def _timestamp_statistics(self):
+        """Build the timestamp summary from the running aggregates."""
+        timestamps = {}
+        if self.created.count:
+            timestamps['oldest_file'] = format_timestamp(self.created.min)
+            timestamps['newest_file'] = format_timestamp(self.created.max)
+        
+        if self.modified.count:
+            timestamps['oldest_modification'] = format_timestamp(self.modified.min)
+            timestamps['newest_modification'] = format_timestamp(self.modified.max)
+            timestamps.update(month_histograms(sorted(self.modification_months.counts.items())))
+        
+        return timestamps
+
+
+class NDJSONReportWriter:
+    """
+    Streams analysis results as newline-delimited JSON.
+    
+    Every analyzed file is written as its own 'file' record as soon as it is
+    available; the stream ends with a single 'summary' record holding scan
+    info, statistics and errors.
+    """
+    
+    def __init__(self, output_file=None):
+        """
+        Initialize the NDJSONReportWriter.
+        
+        Args:
+            output_file (str): Output file path (standard output if omitted)
+        """
+        if output_file:
+            self._stream = open(output_file, 'w', encoding='utf-8')
+            self._owns_stream = True
+        else:
+            self._stream = sys.stdout
+            self._owns_stream = False
+    
+    def write_file(self, file_data):
+        """
+        Write one per-file analysis record.
+        
+        Args:
+            file_data (dict): Per-file analysis entry
+        """
+        self._write({'record_type': 'file', **export_entry(file_data)})
+    
+    def write_summary(self, analysis_results):
+        """
+        Write the trailing summary record.
+        
+        Args:
+            analysis_results (dict): Analysis results
+        """
+        summary = {
+            'record_type': 'summary',
+            'scan_info': analysis_results.get('scan_info', {}),
+            'directory_structure': analysis_results.get('directory_structure', {}),
+            'statistics': analysis_results.get('statistics', {}),
+            'errors': analysis_results.get('errors', [])
+        }
+        if 'duplicates' in analysis_results:
+            summary['duplicates'] = analysis_results['duplicates']
+        self._write(summary)
+    
+    def _write(self, record):
+        """Serialize a record as a single line."""
+        self._stream.write(json.dumps(record, default=json_default, ensure_ascii=False))
+        self._stream.write('\n')
+    
+    def close(self):
+        """Flush and close the output stream."""
+        if self._owns_stream:
+            self._stream.close()
+        else:
+            self._stream.flush()
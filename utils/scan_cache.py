@@ -0,0 +1,153 @@
+"""
+Persistent incremental scan cache for file analysis results.
+"""
+
+import json
+import sqlite3
+from pathlib import Path
+
+
+# Bump when the shape of cached analysis results changes
+CACHE_VERSION = 1
+
+
+class ScanCache:
+    """
+    Stores per-file analysis results in a SQLite database between scans.
+    
+    Each entry is keyed by the file's absolute path and is only served while
+    the file's (device, inode, size, mtime_ns) still match the values recorded
+    when it was analyzed, so unchanged files skip checksums and content
+    analysis on the next run.
+    """
+    
+    def __init__(self, cache_path, commit_interval=1000, settings=''):
+        """
+        Initialize the ScanCache.
+        
+        Args:
+            cache_path (str): Path of the SQLite cache file
+            commit_interval (int): Number of stored entries per transaction
+            settings (str): Analysis settings the cached results depend on,
+                such as the hash algorithms; entries stored under other
+                settings are discarded
+        """
+        self.cache_path = Path(cache_path)
+        self.commit_interval = commit_interval
+        self.settings = settings
+        self._pending_writes = 0
+        
+        self._connection = sqlite3.connect(str(self.cache_path))
+        self._connection.execute('PRAGMA journal_mode=WAL')
+        self._connection.execute('PRAGMA synchronous=NORMAL')
+        self._create_schema()
+    
+    def _create_schema(self):
+        """Create the cache tables, discarding entries from other cache versions or settings."""
+        connection = self._connection
+        connection.execute('CREATE TABLE IF NOT EXISTS cache_info (key TEXT PRIMARY KEY, value TEXT)')
+        
+        expected = {'version': str(CACHE_VERSION), 'settings': self.settings}
+        stored = dict(connection.execute('SELECT key, value FROM cache_info').fetchall())
+        if any(stored.get(key) != value for key, value in expected.items()):
+            connection.execute('DROP TABLE IF EXISTS files')
+            connection.executemany(
+                'INSERT OR REPLACE INTO cache_info (key, value) VALUES (?, ?)',
+                expected.items()
+            )
+        
+        connection.execute('''
+            CREATE TABLE IF NOT EXISTS files (
+                path TEXT PRIMARY KEY,
+                device INTEGER NOT NULL,
+                inode INTEGER NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                checksums TEXT,
+                content_analysis TEXT
+            )
+        ''')
+        connection.commit()
+    
+    def _find(self, columns, file_path, file_stats):
+        """Fetch the requested columns of a file's entry if it is still fresh."""
+        if file_stats is None:
+            return None
+        
+        return self._connection.execute(
+            f'SELECT {columns} FROM files '
+            'WHERE path = ? AND device = ? AND inode = ? AND size = ? AND mtime_ns = ?',
+            (str(file_path), file_stats.st_dev, file_stats.st_ino,
+             file_stats.st_size, file_stats.st_mtime_ns)
+        ).fetchone()
+    
+    def contains(self, file_path, file_stats):
+        """
+        Check whether an unchanged file has a cached analysis.
+        
+        Args:
+            file_path (Path): Absolute path of the file
+            file_stats (os.stat_result): Current stat result of the file
+            
+        Returns:
+            bool: True if lookup() would return an entry
+        """
+        return self._find('1', file_path, file_stats) is not None
+    
+    def lookup(self, file_path, file_stats):
+        """
+        Look up the cached analysis of an unchanged file.
+        
+        Args:
+            file_path (Path): Absolute path of the file
+            file_stats (os.stat_result): Current stat result of the file
+            
+        Returns:
+            dict: Cached 'checksums' and 'content_analysis', or None on a miss
+        """
+        row = self._find('checksums, content_analysis', file_path, file_stats)
+        if row is None:
+            return None
+        
+        return {
+            'checksums': json.loads(row[0]),
+            'content_analysis': json.loads(row[1])
+        }
+    
+    def store(self, file_path, file_stats, file_analysis):
+        """
+        Store the analysis of a file.
+        
+        Results whose metadata could not be extracted are not cached, so the
+        file is analyzed again next time.
+        
+        Args:
+            file_path (Path): Absolute path of the file
+            file_stats (os.stat_result): Stat result the analysis was based on
+            file_analysis (dict): Per-file analysis entry
+        """
+        metadata = file_analysis.get('metadata', {})
+        if file_stats is None or metadata.get('error') or metadata.get('checksums', {}).get('error'):
+            return
+        
+        self._connection.execute(
+            'INSERT OR REPLACE INTO files '
+            '(path, device, inode, size, mtime_ns, checksums, content_analysis) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            (str(file_path), file_stats.st_dev, file_stats.st_ino,
+             file_stats.st_size, file_stats.st_mtime_ns,
+             json.dumps(metadata.get('checksums', {}), default=str),
+             json.dumps(file_analysis.get('content_analysis', {}), default=str))
+        )
+        
+        self._pending_writes += 1
+        if self._pending_writes >= self.commit_interval:
+            self._connection.commit()
+            self._pending_writes = 0
+    
+    def close(self):
+        """Commit pending entries and close the database."""
+        if self._connection is not None:
+            self._connection.commit()
+            self._connection.close()
+            self._connection = None
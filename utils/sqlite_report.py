@@ -0,0 +1,261 @@
+"""
+SQLite report output for file analysis results.
+"""
+
+import json
+import sqlite3
+from pathlib import Path
+
+from utils.file_record import json_default
+from utils.timestamps import timestamp_ns
+
+
+# Stored as PRAGMA user_version; bump when the schema changes
+SQLITE_REPORT_VERSION = 1
+
+SCHEMA = '''
+    CREATE TABLE files (
+        id INTEGER PRIMARY KEY,
+        path TEXT NOT NULL,
+        absolute_path TEXT,
+        name TEXT,
+        extension TEXT,
+        size INTEGER,
+        created INTEGER,
+        modified INTEGER,
+        accessed INTEGER,
+        permissions TEXT,
+        uid INTEGER,
+        gid INTEGER,
+        username TEXT,
+        groupname TEXT,
+        checksums TEXT,
+        category TEXT,
+        mime_type TEXT,
+        is_text INTEGER,
+        is_binary INTEGER,
+        readable INTEGER,
+        security_issues INTEGER,
+        risk_level TEXT,
+        structure_analysis TEXT,
+        quality_metrics TEXT,
+        metadata_error TEXT,
+        content_error TEXT
+    );
+    CREATE TABLE patterns (
+        file_id INTEGER NOT NULL REFERENCES files (id),
+        pattern TEXT NOT NULL,
+        count INTEGER NOT NULL,
+        unique_count INTEGER,
+        samples TEXT
+    );
+    CREATE TABLE security_issues (
+        file_id INTEGER NOT NULL REFERENCES files (id),
+        type TEXT NOT NULL,
+        severity TEXT,
+        count INTEGER,
+        description TEXT
+    );
+    CREATE TABLE errors (
+        type TEXT,
+        path TEXT,
+        message TEXT,
+        timestamp TEXT
+    );
+    CREATE TABLE summary (
+        section TEXT PRIMARY KEY,
+        data TEXT NOT NULL
+    );
+'''
+
+# Created once all rows are in, which is faster than maintaining them per insert
+INDEXES = '''
+    CREATE INDEX idx_files_path ON files (path);
+    CREATE INDEX idx_files_extension ON files (extension);
+    CREATE INDEX idx_files_category ON files (category);
+    CREATE INDEX idx_files_size ON files (size);
+    CREATE INDEX idx_files_risk_level ON files (risk_level, size);
+    CREATE INDEX idx_files_modified ON files (modified);
+    CREATE INDEX idx_patterns_pattern ON patterns (pattern, count);
+    CREATE INDEX idx_patterns_file ON patterns (file_id);
+    CREATE INDEX idx_security_issues_type ON security_issues (type);
+    CREATE INDEX idx_security_issues_file ON security_issues (file_id);
+'''
+
+
+class SQLiteReportWriter:
+    """
+    Writes analysis results to a SQLite database.
+    
+    Each file becomes a row of the files table, using the report field names
+    (path, size, extension, category, mime_type, created, modified,
+    security_issues, risk_level, ...), with its pattern matches and security
+    issues in their own tables. Timestamps are stored as nanoseconds since
+    the epoch. Rows are bulk-inserted in batched transactions as files are
+    written; scan info, statistics and duplicates go to the summary table as
+    JSON. For example, high-risk files over 1MB modified since a date:
+    
+        SELECT path, size FROM files
+        WHERE risk_level = 'high' AND size > 1048576 AND modified >= :since_ns
+    """
+    
+    def __init__(self, output_file, batch_size=1000):
+        """
+        Initialize the SQLiteReportWriter.
+        
+        An existing database at the output path is replaced.
+        
+        Args:
+            output_file (str): Output database path
+            batch_size (int): Number of files inserted per transaction
+        """
+        if not output_file:
+            raise ValueError("SQLite output needs an output file (--output)")
+        
+        self.output_path = Path(output_file)
+        self.batch_size = batch_size
+        self._next_file_id = 1
+        self._files = []
+        self._patterns = []
+        self._security_issues = []
+        
+        self.output_path.unlink(missing_ok=True)
+        self._connection = sqlite3.connect(str(self.output_path))
+        
+        # A partially written report is discarded anyway, so skip durability
+        self._connection.execute('PRAGMA journal_mode=MEMORY')
+        self._connection.execute('PRAGMA synchronous=OFF')
+        self._connection.executescript(SCHEMA)
+        self._connection.execute(f'PRAGMA user_version = {SQLITE_REPORT_VERSION}')
+    
+    def write_file(self, file_data):
+        """
+        Add one per-file analysis entry.
+        
+        Args:
+            file_data (dict): Per-file analysis entry
+        """
+        file_id = self._next_file_id
+        self._next_file_id += 1
+        
+        metadata = file_data.get('metadata', {})
+        content_analysis = file_data.get('content_analysis', {})
+        file_type_analysis = content_analysis.get('file_type_analysis', {})
+        security_analysis = content_analysis.get('security_analysis', {})
+        owner = metadata.get('owner', {})
+        
+        self._files.append((
+            file_id,
+            file_data.get('path', ''),
+            file_data.get('absolute_path'),
+            metadata.get('name'),
+            metadata.get('suffix', ''),
+            metadata.get('size', 0),
+            timestamp_ns(metadata.get('created')),
+            timestamp_ns(metadata.get('modified')),
+            timestamp_ns(metadata.get('accessed')),
+            metadata.get('permissions', {}).get('octal'),
+            owner.get('uid'),
+            owner.get('gid'),
+            owner.get('username'),
+            owner.get('groupname'),
+            _json_or_none(metadata.get('checksums')),
+            file_type_analysis.get('category'),
+            file_type_analysis.get('mime_type'),
+            file_type_analysis.get('is_text', False),
+            file_type_analysis.get('is_binary', False),
+            not content_analysis.get('error'),
+            security_analysis.get('issues_found', 0),
+            security_analysis.get('risk_level'),
+            _json_or_none(content_analysis.get('structure_analysis')),
+            _json_or_none(content_analysis.get('quality_metrics')),
+            metadata.get('error'),
+            content_analysis.get('error')
+        ))
+        
+        # Only patterns that matched, as most files match none
+        for pattern_name, pattern_data in content_analysis.get('content_patterns', {}).items():
+            if isinstance(pattern_data, dict) and pattern_data.get('count'):
+                self._patterns.append((
+                    file_id,
+                    pattern_name,
+                    pattern_data['count'],
+                    pattern_data.get('unique_count'),
+                    _json_or_none(pattern_data.get('samples'))
+                ))
+        
+        for issue in security_analysis.get('issues', []):
+            self._security_issues.append((
+                file_id,
+                issue.get('type', 'unknown'),
+                issue.get('severity'),
+                issue.get('count'),
+                issue.get('description')
+            ))
+        
+        if len(self._files) >= self.batch_size:
+            self._flush()
+    
+    def write_summary(self, analysis_results):
+        """
+        Write the errors and the scan summary.
+        
+        Args:
+            analysis_results (dict): Analysis results
+        """
+        self._flush()
+        
+        self._connection.executemany(
+            'INSERT INTO errors (type, path, message, timestamp) VALUES (?, ?, ?, ?)',
+            [
+                (error.get('type'), error.get('path'), error.get('message'), error.get('timestamp'))
+                for error in analysis_results.get('errors', [])
+            ]
+        )
+        
+        sections = ['scan_info', 'directory_structure', 'statistics', 'duplicates']
+        self._connection.executemany(
+            'INSERT INTO summary (section, data) VALUES (?, ?)',
+            [
+                (section, json.dumps(analysis_results[section], default=json_default, ensure_ascii=False))
+                for section in sections if section in analysis_results
+            ]
+        )
+        self._connection.commit()
+    
+    def _flush(self):
+        """Insert the pending rows in one transaction."""
+        connection = self._connection
+        if self._files:
+            connection.executemany(
+                f'INSERT INTO files VALUES ({", ".join("?" * len(self._files[0]))})',
+                self._files
+            )
+        if self._patterns:
+            connection.executemany('INSERT INTO patterns VALUES (?, ?, ?, ?, ?)', self._patterns)
+        if self._security_issues:
+            connection.executemany('INSERT INTO security_issues VALUES (?, ?, ?, ?, ?)', self._security_issues)
+        connection.commit()
+        
+        self._files = []
+        self._patterns = []
+        self._security_issues = []
+    
+    def close(self):
+        """Insert pending rows, build the indexes and close the database."""
+        if self._connection is None:
+            return
+        
+        self._flush()
+        self._connection.executescript(INDEXES)
+        self._connection.execute('ANALYZE')
+        self._connection.commit()
+        self._connection.close()
+        self._connection = None
+
+
+def _json_or_none(value):
+    """Serialize a nested value as JSON, storing empty values as NULL."""
+    if not value:
+        return None
+    return json.dumps(value, default=json_default, ensure_ascii=False)
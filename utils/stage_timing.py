@@ -0,0 +1,183 @@
+"""
+Per-stage timing of the file analysis pipeline.
+"""
+
+import time
+
+from utils.accumulators import QuantileSketch, Summary, TopK
+
+
+# Percentiles of the per-file stage durations in the timing report
+STAGE_PERCENTILES = (50, 95, 99)
+
+# Number of slowest files listed in the timing report
+SLOWEST_FILES_COUNT = 10
+
+
+class StageTimer:
+    """
+    Nested stage timer for the file currently being analyzed.
+    
+    Stages are entered with `with timer.stage('hashing'):` and may nest; a
+    stage is charged only its own time, so the time of stages nested in it
+    (e.g. encoding detection inside text reading) is not counted twice.
+    Durations add up per stage until take_file() collects them.
+    """
+    
+    def __init__(self):
+        """Initialize the StageTimer."""
+        self._stack = []  # [stage, start of its current uninterrupted interval]
+        self._durations = {}
+    
+    def stage(self, name):
+        """
+        Time a stage of the current file.
+        
+        Args:
+            name (str): Stage name
+        
+        Returns:
+            Context manager timing the enclosed block as the stage
+        """
+        return _TimedStage(self, name)
+    
+    def _start(self, name):
+        """Enter a stage, pausing the enclosing one."""
+        now = time.perf_counter()
+        if self._stack:
+            parent = self._stack[-1]
+            self._charge(parent[0], now - parent[1])
+        self._stack.append([name, now])
+    
+    def _stop(self):
+        """Leave the innermost stage, resuming the enclosing one."""
+        now = time.perf_counter()
+        name, started = self._stack.pop()
+        self._charge(name, now - started)
+        if self._stack:
+            self._stack[-1][1] = now
+    
+    def _charge(self, name, seconds):
+        """Add time to a stage of the current file."""
+        self._durations[name] = self._durations.get(name, 0.0) + seconds
+    
+    def take_file(self):
+        """
+        Return the stage durations gathered since the previous call and reset them.
+        
+        Returns:
+            dict: Seconds per stage
+        """
+        durations = self._durations
+        self._durations = {}
+        return durations
+
+
+class _TimedStage:
+    """Context manager of one StageTimer stage."""
+    
+    __slots__ = ('timer', 'name')
+    
+    def __init__(self, timer, name):
+        """Initialize the _TimedStage."""
+        self.timer = timer
+        self.name = name
+    
+    def __enter__(self):
+        """Enter the stage."""
+        self.timer._start(self.name)
+        return self
+    
+    def __exit__(self, exc_type, exc_value, traceback):
+        """Leave the stage, also when the block raised."""
+        self.timer._stop()
+        return False
+
+
+class StageTimings:
+    """
+    Aggregated stage durations of a scan.
+    
+    Each stage keeps its total, count and maximum, plus a QuantileSketch of
+    its durations for the percentiles. Files are also ranked by their total
+    time, keeping the slowest with the stage they spent most time in.
+    """
+    
+    def __init__(self, slowest_files=SLOWEST_FILES_COUNT):
+        """
+        Initialize the StageTimings.
+        
+        Args:
+            slowest_files (int): Number of slowest files to keep
+        """
+        self.stages = {}  # stage -> (Summary, QuantileSketch)
+        self.slowest_files = TopK(slowest_files)
+    
+    def add(self, stage, seconds):
+        """
+        Add one duration of a stage.
+        
+        Args:
+            stage (str): Stage name
+            seconds (float): Duration
+        """
+        aggregates = self.stages.get(stage)
+        if aggregates is None:
+            aggregates = self.stages[stage] = (Summary(), QuantileSketch())
+        aggregates[0].add(seconds)
+        aggregates[1].add(seconds)
+    
+    def add_file(self, path, durations):
+        """
+        Add the stage durations of one file.
+        
+        Args:
+            path (str): Relative path of the file
+            durations (dict): Seconds per stage, as from StageTimer.take_file()
+        """
+        if not durations:
+            return
+        
+        for stage, seconds in durations.items():
+            self.add(stage, seconds)
+        
+        slowest_stage = max(durations, key=durations.get)
+        self.slowest_files.add(sum(durations.values()), (path, slowest_stage, durations))
+    
+    def to_dict(self):
+        """
+        Build the timing report.
+        
+        Returns:
+            dict: 'stages' with total_seconds, count, max_seconds and p50/p95/p99
+                per stage (estimated within percentile_rank_error), slowest
+                stage first, and 'slowest_files' with each file's seconds,
+                slowest stage and per-stage seconds
+        """
+        stages = {}
+        rank_error = 0
+        for stage, (summary, sketch) in sorted(self.stages.items(), key=lambda item: -item[1][0].total):
+            percentiles = sketch.quantiles([p / 100 for p in STAGE_PERCENTILES])
+            stages[stage] = {
+                'total_seconds': summary.total,
+                'count': summary.count,
+                'max_seconds': summary.max,
+                **{f'p{p}': value for p, value in zip(STAGE_PERCENTILES, percentiles)}
+            }
+            rank_error = sketch.rank_error
+        
+        slowest_files = [
+            {
+                'path': path,
+                'seconds': seconds,
+                'slowest_stage': slowest_stage,
+                'stages': dict(sorted(durations.items(), key=lambda item: -item[1]))
+            }
+            for seconds, (path, slowest_stage, durations) in self.slowest_files.items()
+        ]
+        
+        return {
+            'stages': stages,
+            'percentile_rank_error': rank_error,
+            'slowest_files': slowest_files
+        }
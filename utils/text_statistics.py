@@ -0,0 +1,195 @@
+"""
+Running text statistics for content analyzed in chunks.
+"""
+
+import re
+from collections import Counter
+
+
+# Characters tracked for the maximum bracket nesting depth
+_NESTING_CHARS = re.compile(r'[()\[\]{}]')
+_OPENING_CHARS = frozenset('([{')
+
+
+class TextStatistics:
+    """
+    Line, word, paragraph and nesting statistics of chunked text.
+    
+    Chunks are folded in one at a time and only a few counters plus the state
+    of the unfinished line and paragraph are kept, so memory does not grow
+    with the text. The values equal those ContentAnalyzer computes on the
+    whole content at once.
+    """
+    
+    def __init__(self):
+        """Initialize the TextStatistics."""
+        self.characters = 0
+        self.newlines = 0
+        self.words = 0
+        self.paragraphs = 0
+        self.longest_line = 0
+        self.long_lines = 0
+        self.very_long_lines = 0
+        self.empty_lines = 0
+        self.indentations = Counter()
+        self.max_nesting = 0
+        self.has_crlf = False
+        self.has_cr = False
+        
+        self._nesting = 0
+        self._last_char = ''
+        
+        # Unfinished line
+        self._line_length = 0
+        self._line_first = ''
+        self._line_has_text = False
+        
+        # Unfinished paragraph (text between '\n\n' separators)
+        self._paragraph_has_text = False
+        self._pending_newline = False
+    
+    def feed(self, chunk):
+        """
+        Add the next chunk of text.
+        
+        Args:
+            chunk (str): Text following everything fed so far
+        """
+        if not chunk:
+            return
+        
+        self.characters += len(chunk)
+        self.newlines += chunk.count('\n')
+        
+        # Words split by the chunk boundary are counted once
+        words = len(chunk.split())
+        if words and self._last_char and not self._last_char.isspace() and not chunk[0].isspace():
+            words -= 1
+        self.words += words
+        
+        if not self.has_crlf:
+            self.has_crlf = '\r\n' in self._last_char + chunk
+        if not self.has_cr:
+            self.has_cr = '\r' in chunk
+        
+        self._feed_lines(chunk)
+        self._feed_paragraphs(chunk)
+        self._feed_nesting(chunk)
+        
+        self._last_char = chunk[-1]
+    
+    def finish(self):
+        """Close the last line and paragraph."""
+        self._end_line()
+        self._end_paragraph()
+    
+    @property
+    def lines(self):
+        """Number of lines, as content.count('\\n') + 1."""
+        return self.newlines + 1
+    
+    @property
+    def average_line_length(self):
+        """Mean line length, line endings excluded."""
+        return (self.characters - self.newlines) / self.lines
+    
+    @property
+    def indentation_style(self):
+        """Most common indentation of non-blank lines ('tabs', 'spaces' or 'none')."""
+        if not self.indentations:
+            return 'none'
+        return self.indentations.most_common(1)[0][0]
+    
+    @property
+    def line_ending_style(self):
+        """Line ending style of the text."""
+        if self.has_crlf:
+            return 'CRLF (Windows)'
+        elif self.has_cr:
+            return 'CR (Mac Classic)'
+        elif self.newlines:
+            return 'LF (Unix/Linux/Mac)'
+        else:
+            return 'none'
+    
+    def _feed_lines(self, chunk):
+        """Update the per-line counters with the lines completed by a chunk."""
+        parts = chunk.split('\n')
+        
+        for part in parts[:-1]:
+            self._extend_line(part)
+            self._end_line()
+        self._extend_line(parts[-1])
+    
+    def _extend_line(self, text):
+        """Append text to the unfinished line."""
+        if not text:
+            return
+        if not self._line_length:
+            self._line_first = text[0]
+        self._line_length += len(text)
+        if not self._line_has_text:
+            self._line_has_text = not text.isspace()
+    
+    def _end_line(self):
+        """Count the unfinished line as complete and start the next one."""
+        length = self._line_length
+        if length > self.longest_line:
+            self.longest_line = length
+        if length > 100:
+            self.long_lines += 1
+            if length > 150:
+                self.very_long_lines += 1
+        
+        if not self._line_has_text:
+            self.empty_lines += 1
+        elif self._line_first == '\t':
+            self.indentations['tabs'] += 1
+        elif self._line_first == ' ':
+            self.indentations['spaces'] += 1
+        
+        self._line_length = 0
+        self._line_first = ''
+        self._line_has_text = False
+    
+    def _feed_paragraphs(self, chunk):
+        """Split a chunk on '\\n\\n' the way str.split would on the whole text."""
+        if self._pending_newline and chunk[0] == '\n':
+            # A separator straddles the chunk boundary
+            self._end_paragraph()
+            chunk = chunk[1:]
+        
+        parts = chunk.split('\n\n')
+        for part in parts[:-1]:
+            self._extend_paragraph(part)
+            self._end_paragraph()
+        self._extend_paragraph(parts[-1])
+        
+        self._pending_newline = parts[-1].endswith('\n')
+    
+    def _extend_paragraph(self, text):
+        """Append text to the unfinished paragraph."""
+        if text and not self._paragraph_has_text:
+            self._paragraph_has_text = not text.isspace()
+    
+    def _end_paragraph(self):
+        """Count the unfinished paragraph if it has any text."""
+        if self._paragraph_has_text:
+            self.paragraphs += 1
+        self._paragraph_has_text = False
+    
+    def _feed_nesting(self, chunk):
+        """Track the bracket nesting depth across a chunk."""
+        depth = self._nesting
+        max_depth = self.max_nesting
+        
+        for char in _NESTING_CHARS.findall(chunk):
+            if char in _OPENING_CHARS:
+                depth += 1
+                if depth > max_depth:
+                    max_depth = depth
+            elif depth:
+                depth -= 1
+        
+        self._nesting = depth
+        self.max_nesting = max_depth
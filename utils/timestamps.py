@@ -0,0 +1,105 @@
+"""
+Raw file timestamps and their report formatting.
+"""
+
+from datetime import datetime, timedelta
+
+
+# Metadata fields holding raw st_*_ns timestamps
+TIMESTAMP_FIELDS = ('created', 'modified', 'accessed')
+
+NANOSECONDS_PER_SECOND = 1000000000
+
+
+def format_timestamp(value):
+    """
+    Format a raw timestamp as a local ISO string.
+    
+    Args:
+        value (int): Nanoseconds since the epoch, as in os.stat_result.st_mtime_ns
+    
+    Returns:
+        str: datetime.isoformat() of the local time, to the microsecond;
+            values that are not raw timestamps (None, ISO strings) unchanged
+    """
+    if not isinstance(value, int):
+        return value
+    
+    seconds, nanoseconds = divmod(value, NANOSECONDS_PER_SECOND)
+    return (datetime.fromtimestamp(seconds) + timedelta(microseconds=round(nanoseconds / 1000))).isoformat()
+
+
+def timestamp_ns(value):
+    """
+    Get a raw timestamp from a metadata value.
+    
+    Args:
+        value: Nanoseconds since the epoch, or an ISO string from a saved report
+    
+    Returns:
+        int: Nanoseconds since the epoch, or None if there is no valid timestamp
+    """
+    if isinstance(value, int):
+        return value
+    if not value:
+        return None
+    
+    try:
+        timestamp = datetime.fromisoformat(value.replace('Z', '+00:00'))
+    except (AttributeError, ValueError):
+        return None
+    
+    # Whole seconds are exact in a float; microseconds are added separately
+    seconds = int(timestamp.replace(microsecond=0).timestamp())
+    return seconds * NANOSECONDS_PER_SECOND + timestamp.microsecond * 1000
+
+
+def format_metadata_timestamps(metadata):
+    """
+    Format the raw timestamps of file metadata for a report.
+    
+    Args:
+        metadata (dict): File metadata
+    
+    Returns:
+        dict: The metadata with ISO timestamps; the same dict if none are raw
+    """
+    if not any(isinstance(metadata.get(field), int) for field in TIMESTAMP_FIELDS):
+        return metadata
+    
+    formatted = dict(metadata)
+    for field in TIMESTAMP_FIELDS:
+        if field in formatted:
+            formatted[field] = format_timestamp(formatted[field])
+    return formatted
+
+
+def month_range(value):
+    """
+    Get the local calendar month containing a raw timestamp.
+    
+    Args:
+        value (int): Nanoseconds since the epoch
+    
+    Returns:
+        tuple: (year, month, first nanosecond of the month, first nanosecond
+            of the next month)
+    """
+    local = datetime.fromtimestamp(value // NANOSECONDS_PER_SECOND)
+    next_year, next_month = next_month_of(local.year, local.month)
+    return (
+        local.year,
+        local.month,
+        month_start(local.year, local.month),
+        month_start(next_year, next_month)
+    )
+
+
+def month_start(year, month):
+    """Get the first nanosecond of a local calendar month."""
+    return int(datetime(year, month, 1).timestamp()) * NANOSECONDS_PER_SECOND
+
+
+def next_month_of(year, month):
+    """Get the (year, month) following a calendar month."""
+    return year + month // 12, month % 12 + 1